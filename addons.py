@@ -13,23 +13,40 @@ import math
 import socket
 import json
 import threading
-import queue
+import collections
+import selectors
+import struct
+import sys
+import time
 import csv
 import os
+import numpy as np
+from datetime import datetime
 from mathutils import Vector
 from bpy.types import Operator, Panel
-from bpy.props import StringProperty, IntProperty, BoolProperty, PointerProperty
+from bpy.props import StringProperty, IntProperty, BoolProperty, PointerProperty, FloatProperty, EnumProperty
 from bpy_extras.io_utils import ImportHelper
 
 # ======================== Global Configuration ========================
 category = "Mozi's FaceCapture"
 UDP_IP = '127.0.0.1'
 UDP_PORT = 12345
+CONTROL_PORT = 12346
 sock = None
 is_receiving = False
 udp_thread = None
-data_queue = queue.Queue()
+QUEUE_SIZE = 1024       # Default bound of the packet buffer
+RCVBUF_KB = 1024        # Default kernel receive buffer request
+MAX_DRAIN = 256         # Max datagrams read per wakeup
+PROCESS_INTERVAL = 0.02     # Seconds between process_data runs (UDP is drained by its own thread)
+SHM_POLL_INTERVAL = 0.005   # Shorter timer while attached to shared memory: it is only read here
+# Linux reports kernel-level drops per datagram via SO_RXQ_OVFL
+SO_RXQ_OVFL = getattr(socket, 'SO_RXQ_OVFL', 40 if sys.platform.startswith('linux') else None)
+data_queue = collections.deque(maxlen=QUEUE_SIZE)  # Oldest packets are dropped when full
+channel_state = {}  # Last known value of every channel (for delta packets)
 DEBUG_MAX_LINES = 20
+DEBUG_REFRESH_INTERVAL = 0.25  # Seconds between debug panel refreshes
+SUBSCRIBE_INTERVAL = 3.0  # Seconds between subscription resends (transmitter may restart)
 BASE_ARMATURE_NAME = "FaceCapture_Rig"
 
 controls = {
@@ -55,6 +72,46 @@ control_groups = [
 
 PUPIL_MOVE_RANGE = 0.1
 
+# Channel order shared with the transmitter (face_constants.FEATURE_CHANNELS)
+CHANNELS = (
+    'head_pitch', 'head_yaw', 'head_roll',
+    'mouth_open', 'mouth_width',
+    'left_eyelid', 'right_eyelid',
+    'left_pupil_x', 'left_pupil_y',
+    'right_pupil_x', 'right_pupil_y',
+    'left_brow', 'right_brow',
+    'teeth_open'
+)
+CHANNEL_INDEX = {name: i for i, name in enumerate(CHANNELS)}
+
+def _clamp_pupil(v):
+    return np.clip(v, -PUPIL_MOVE_RANGE, PUPIL_MOVE_RANGE)
+
+# Vectorized equivalent of apply_facial_data for bulk F-curve writes:
+# (channel, control, data_path, array index, value transform)
+CHANNEL_TARGETS = (
+    ('mouth_width',   'mouth',        'scale',          0, lambda v: 1.0 + v),
+    ('mouth_open',    'mouth',        'scale',          2, lambda v: v),
+    ('left_eyelid',   'left_eyelid',  'scale',          2, lambda v: v),
+    ('right_eyelid',  'right_eyelid', 'scale',          2, lambda v: v),
+    ('left_pupil_x',  'left_pupil',   'location',       0, _clamp_pupil),
+    ('left_pupil_y',  'left_pupil',   'location',       1, _clamp_pupil),
+    ('right_pupil_x', 'right_pupil',  'location',       0, _clamp_pupil),
+    ('right_pupil_y', 'right_pupil',  'location',       1, _clamp_pupil),
+    ('left_brow',     'left_brow',    'scale',          2, lambda v: 1.0 + v),
+    ('right_brow',    'right_brow',   'scale',          2, lambda v: 1.0 + v),
+    ('head_pitch',    'head',         'rotation_euler', 0, np.radians),
+    ('head_yaw',      'head',         'rotation_euler', 1, np.radians),
+    ('head_roll',     'head',         'rotation_euler', 2, np.radians),
+    ('teeth_open',    'teeth',        'scale',          2, lambda v: v),
+)
+
+# Keyframe interpolation enum values for keyframe_points.foreach_set('interpolation')
+KEY_LINEAR = 1
+KEY_BEZIER = 2
+
+TAKE_CAPACITY = 60 * 60 * 10  # Preallocated rows (10 minutes at 60 Hz)
+
 # ======================== Core Functionality ========================
 def get_armature(context, create_new=False):
     """Get or create armature"""
@@ -88,10 +145,14 @@ def get_pose_bone(armature, bone_name):
         return armature.pose.bones[bone_name]
     return None
 
-def apply_facial_data(sc, armature, info, frame, auto_key=True):
-    """Apply facial data to bones"""
+def _is_changed(changed, *keys):
+    """True if any of the channels changed (None means a full update)"""
+    return changed is None or any(k in changed for k in keys)
+
+def apply_facial_data(sc, armature, info, frame, auto_key=True, changed=None):
+    """Apply facial data to bones (only controls touched by `changed` if given)"""
     # 1. Mouth control
-    if sc.fpc_enable_mouth:
+    if sc.fpc_enable_mouth and _is_changed(changed, 'mouth_width', 'mouth_open'):
         mouth = get_pose_bone(armature, controls['mouth'])
         if mouth:
             mouth.scale[0] = 1.0 + info.get('mouth_width', 0.0)
@@ -101,7 +162,7 @@ def apply_facial_data(sc, armature, info, frame, auto_key=True):
 
     # 2. Eyelid control
     for side in ('left', 'right'):
-        if getattr(sc, f'fpc_enable_{side}_eyelid'):
+        if getattr(sc, f'fpc_enable_{side}_eyelid') and _is_changed(changed, f'{side}_eyelid'):
             eyelid = get_pose_bone(armature, controls[f'{side}_eyelid'])
             if eyelid:
                 eyelid.scale[2] = info.get(f'{side}_eyelid', 0.0)
@@ -110,7 +171,7 @@ def apply_facial_data(sc, armature, info, frame, auto_key=True):
 
     # 3. Pupil control
     for side in ('left', 'right'):
-        if getattr(sc, f'fpc_enable_{side}_pupil'):
+        if getattr(sc, f'fpc_enable_{side}_pupil') and _is_changed(changed, f'{side}_pupil_x', f'{side}_pupil_y'):
             pupil = get_pose_bone(armature, controls[f'{side}_pupil'])
             if pupil:
                 x = max(min(info.get(f'{side}_pupil_x', 0.0), PUPIL_MOVE_RANGE), -PUPIL_MOVE_RANGE)
@@ -121,7 +182,7 @@ def apply_facial_data(sc, armature, info, frame, auto_key=True):
 
     # 4. Eyebrow control
     for side in ('left', 'right'):
-        if getattr(sc, f'fpc_enable_{side}_brow'):
+        if getattr(sc, f'fpc_enable_{side}_brow') and _is_changed(changed, f'{side}_brow'):
             brow = get_pose_bone(armature, controls[f'{side}_brow'])
             if brow:
                 brow.scale[2] = 1.0 + info.get(f'{side}_brow', 0.0)
@@ -129,7 +190,7 @@ def apply_facial_data(sc, armature, info, frame, auto_key=True):
                     brow.keyframe_insert(data_path='scale', frame=frame)
 
     # 5. Head Control
-    if sc.fpc_enable_head:
+    if sc.fpc_enable_head and _is_changed(changed, 'head_pitch', 'head_yaw', 'head_roll'):
         head = get_pose_bone(armature, controls['head'])
         if head:
             head.rotation_mode = 'XYZ'
@@ -141,99 +202,871 @@ def apply_facial_data(sc, armature, info, frame, auto_key=True):
                 head.keyframe_insert(data_path='rotation_euler', frame=frame)
 
     # 6. Teeth Control
-    if sc.fpc_enable_teeth:
+    if sc.fpc_enable_teeth and _is_changed(changed, 'teeth_open'):
         teeth = get_pose_bone(armature, controls['teeth'])
         if teeth:
             teeth.scale[2] = info.get('teeth_open', 0.0)
             if auto_key:
                 teeth.keyframe_insert(data_path='scale', frame=frame)
 
+def merge_packet(info):
+    """Merge a packet into channel_state, return the set of changed channels.
+
+    Delta packets (`_delta` set) only carry channels that moved; full packets
+    (keyframes or senders without delta mode) replace the state and return None.
+    """
+    channels = {k: v for k, v in info.items() if not k.startswith('_')}
+    if info.get('_delta'):
+        channel_state.update(channels)
+        return set(channels)
+    channel_state.clear()
+    channel_state.update(channels)
+    return None
+
 def process_data():
     """Process queued data"""
     sc = bpy.context.scene
     frame = sc.frame_current
     armature = sc.fpc_active_armature
+    take = active_take
+    interval = PROCESS_INTERVAL
+    if shm_reader is not None:
+        poll_shared_memory()
+        if shm_reader.shm is not None:
+            interval = SHM_POLL_INTERVAL
 
-    while not data_queue.empty() and armature:
+    # Without a rig, live packets wait in the buffer; a take always records them
+    if take is None and not armature:
+        return interval
+    # Merge every queued packet, then pose (and auto-key) the rig once for the batch:
+    # all packets land on the same frame, only the final state matters
+    batch_changed = set()
+    while data_queue:
         try:
-            info = data_queue.get_nowait()
-            apply_facial_data(sc, armature, info, frame, auto_key=sc.tool_settings.use_keyframe_insert_auto)
+            recv_time, info = data_queue.popleft()
+            changed = merge_packet(info)
+            if take is not None:
+                take.append(recv_time, channel_state, info.get('_time'))
+            if batch_changed is not None:
+                batch_changed = None if changed is None else batch_changed | changed
         except Exception as e:
             print(f"Error processing data: {str(e)}")
-    
-    return 0.02
-
-def udp_listener():
-    """UDP listener thread"""
-    global sock, is_receiving
-    while is_receiving:
+    if armature and (batch_changed is None or batch_changed):
+        # Takes are keyed when the recording stops (commit_take), never per packet
+        auto_key = take is None and sc.tool_settings.use_keyframe_insert_auto
         try:
-            data, _ = sock.recvfrom(4096)
-            txt = data.decode('utf-8')
-            info = json.loads(txt)
-            data_queue.put(info)
-            
-            if bpy.context.scene.fpc_debug_show:
-                debug_str = json.dumps(info, indent=2)
-                lines = debug_str.split('\n')[:DEBUG_MAX_LINES]
-                bpy.context.scene.fpc_debug_data = '\n'.join(lines)
-                
+            apply_facial_data(sc, armature, channel_state, frame, auto_key=auto_key, changed=batch_changed)
         except Exception as e:
-            print(f"Receiving Error: {str(e)}")
+            print(f"Error processing data: {str(e)}")
+    return interval
+
+# ======================== Live Take Recording ========================
+class TakeRecorder:
+    """Buffers timestamped channel values in a preallocated NumPy array"""
+    def __init__(self, start_frame, capacity=TAKE_CAPACITY):
+        self.start_frame = start_frame
+        self.buffer = np.zeros((capacity, 1 + len(CHANNELS)), dtype=np.float64)
+        self.count = 0
+        self.clock_offset = None  # Capture clock minus receive clock, from the last stamped packet
+
+    def append(self, timestamp, state, capture_time=None):
+        """timestamp is the arrival time; a packet's capture time (`_time`) is used instead
+        when present, so network and queueing jitter do not shift the samples"""
+        if capture_time is not None:
+            self.clock_offset = capture_time - timestamp
+            timestamp = capture_time
+        elif self.clock_offset is not None:
+            timestamp += self.clock_offset  # Keep unstamped packets on the capture clock
+        if self.count == len(self.buffer):
+            self.buffer = np.concatenate([self.buffer, np.zeros_like(self.buffer)])
+        row = self.buffer[self.count]
+        row[0] = timestamp
+        row[1:] = [state.get(name, 0.0) for name in CHANNELS]
+        self.count += 1
+
+    @property
+    def timestamps(self):
+        return self.buffer[:self.count, 0]
+
+    @property
+    def values(self):
+        return self.buffer[:self.count, 1:]
+
+active_take = None
+
+def resample_to_frames(timestamps, values, fps, start_frame):
+    """Interpolate (N, C) samples onto whole scene frames from their timestamps"""
+    # Guard against clock steps: np.interp needs non-decreasing sample times
+    timestamps = np.maximum.accumulate(np.asarray(timestamps, dtype=np.float64))
+    offsets = (timestamps - timestamps[0]) * fps
+    frame_offsets = np.arange(int(math.floor(offsets[-1])) + 1, dtype=np.float64)
+    resampled = np.empty((len(frame_offsets), values.shape[1]))
+    for c in range(values.shape[1]):
+        resampled[:, c] = np.interp(frame_offsets, offsets, values[:, c])
+    return start_frame + frame_offsets, resampled
+
+def rdp_keep_mask(x, y, tolerance):
+    """Ramer-Douglas-Peucker on a sampled curve: mask of keys to keep so that
+    linear interpolation between kept keys stays within `tolerance` of y"""
+    count = len(x)
+    keep = np.zeros(count, dtype=bool)
+    if count < 3 or tolerance <= 0:
+        keep[:] = True
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        xs, ys = x[start + 1:end], y[start + 1:end]
+        t = (xs - x[start]) / (x[end] - x[start])
+        error = np.abs(ys - (y[start] + t * (y[end] - y[start])))
+        worst = int(np.argmax(error))
+        if error[worst] > tolerance:
+            split = start + 1 + worst
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+def write_channel_fcurves(sc, armature, action, frames, values, tolerances=None):
+    """Bulk-write keys for all enabled controls, values in CHANNELS order.
+
+    Existing keys inside the written frame range are replaced, keys outside
+    it are kept. `tolerances` (channel -> max error in property units)
+    enables keyframe reduction; reduced keys use LINEAR interpolation, which
+    is what the reduction error is measured against (Bezier handles could
+    overshoot the kept samples). Returns the number of keys written.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    written = 0
+    for channel, control, data_path, index, transform in CHANNEL_TARGETS:
+        bone_name = controls[control]
+        if not getattr(sc, f'fpc_enable_{control}') or bone_name not in armature.pose.bones:
+            continue
+        column = np.asarray(transform(values[:, CHANNEL_INDEX[channel]]), dtype=np.float64)
+        key_frames = frames
+        reduced = bool(tolerances) and tolerances.get(channel, 0) > 0
+        if reduced:
+            mask = rdp_keep_mask(frames, column, tolerances[channel])
+            key_frames, column = frames[mask], column[mask]
+        interpolation = np.full(len(key_frames), KEY_LINEAR if reduced else KEY_BEZIER, dtype=np.int32)
+        merged = False
+
+        path = f'pose.bones["{bone_name}"].{data_path}'
+        fcurve = action.fcurves.find(path, index=index)
+        if fcurve is None:
+            fcurve = action.fcurves.new(path, index=index, action_group=bone_name)
+        elif len(fcurve.keyframe_points):
+            count = len(fcurve.keyframe_points)
+            old = np.empty(count * 2, dtype=np.float32)
+            fcurve.keyframe_points.foreach_get('co', old)
+            old = old.reshape(-1, 2)
+            old_interpolation = np.empty(count, dtype=np.int32)
+            fcurve.keyframe_points.foreach_get('interpolation', old_interpolation)
+            outside = (old[:, 0] < frames[0]) | (old[:, 0] > frames[-1])
+            key_frames = np.concatenate([old[outside, 0], key_frames])
+            column = np.concatenate([old[outside, 1], column])
+            interpolation = np.concatenate([old_interpolation[outside], interpolation])
+            order = np.argsort(key_frames, kind='stable')
+            key_frames, column, interpolation = key_frames[order], column[order], interpolation[order]
+            fcurve.keyframe_points.clear()
+            merged = True
 
-def start_receiving(ip, port):
+        co = np.empty(len(key_frames) * 2, dtype=np.float32)
+        co[0::2] = key_frames
+        co[1::2] = column
+        fcurve.keyframe_points.add(len(key_frames))
+        fcurve.keyframe_points.foreach_set('co', co)
+        if reduced or merged:
+            # New keys default to BEZIER; kept keys outside the range keep their own
+            fcurve.keyframe_points.foreach_set('interpolation', interpolation)
+        fcurve.update()
+        written += len(key_frames)
+    return written
+
+def reduction_tolerances(sc):
+    """Per-channel keyframe reduction tolerance from the scene settings"""
+    if not sc.fpc_bake_reduce:
+        return None
+    tolerances = {}
+    for channel, control, data_path, index, transform in CHANNEL_TARGETS:
+        if control == 'head':
+            tolerances[channel] = math.radians(sc.fpc_bake_head_tolerance)
+        elif control.endswith('_pupil'):
+            # Pupils move within +-PUPIL_MOVE_RANGE, scale the tolerance down
+            tolerances[channel] = sc.fpc_bake_tolerance * PUPIL_MOVE_RANGE
+        else:
+            tolerances[channel] = sc.fpc_bake_tolerance
+    return tolerances
+
+def commit_take(sc, armature, take):
+    """Write a recorded take to a new action on the armature"""
+    fps = sc.render.fps / sc.render.fps_base
+    frames, values = resample_to_frames(take.timestamps, take.values, fps, take.start_frame)
+
+    head = get_pose_bone(armature, controls['head'])
+    if head:
+        head.rotation_mode = 'XYZ'  # Head keys are Euler XYZ
+
+    action = bpy.data.actions.new(f"FPC_Take_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    write_channel_fcurves(sc, armature, action, frames, values)
+    if armature.animation_data is None:
+        armature.animation_data_create()
+    armature.animation_data.action = action
+    return action, len(frames)
+
+class ReceiverStats:
+    """Thread-safe counters written by the listener thread, read by the UI"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.packets = 0
+            self.bytes = 0
+            self.errors = 0
+            self.dropped = 0
+            self.kernel_drops = None  # None: not reported by this OS
+            self.last_packet = None
+            self.last_error = ""
+
+    def record_batch(self, packets, size, dropped, kernel_drops, last_info):
+        with self.lock:
+            self.packets += packets
+            self.bytes += size
+            self.dropped += dropped
+            if kernel_drops is not None:
+                self.kernel_drops = kernel_drops
+            if last_info is not None:
+                self.last_packet = last_info
+
+    def record_error(self, message):
+        with self.lock:
+            self.errors += 1
+            self.last_error = message
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'packets': self.packets,
+                'bytes': self.bytes,
+                'errors': self.errors,
+                'dropped': self.dropped,
+                'kernel_drops': self.kernel_drops,
+                'last_packet': self.last_packet,
+                'last_error': self.last_error,
+            }
+
+receiver_stats = ReceiverStats()
+
+def _recv_datagram(listen_sock, track_drops):
+    """Receive one datagram, returns (data, cumulative kernel drops or None)"""
+    if not track_drops:
+        data, _ = listen_sock.recvfrom(4096)
+        return data, None
+    data, ancdata, _, _ = listen_sock.recvmsg(4096, socket.CMSG_SPACE(4))
+    for level, kind, payload in ancdata:
+        if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL and len(payload) >= 4:
+            return data, struct.unpack('I', payload[:4])[0]
+    return data, None
+
+def udp_listener(listen_sock, track_drops=False):
+    """UDP listener thread (never touches bpy)"""
+    sel = selectors.DefaultSelector()
+    sel.register(listen_sock, selectors.EVENT_READ)
+    try:
+        while is_receiving:
+            # Timeout lets the loop notice stop_receiving() without a packet
+            if not sel.select(timeout=0.2):
+                continue
+
+            # Drain everything that is pending, then publish counters once
+            packets = size = dropped = 0
+            kernel_drops = last_info = None
+            for _ in range(MAX_DRAIN):
+                try:
+                    data, drops = _recv_datagram(listen_sock, track_drops)
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError as e:
+                    if is_receiving:
+                        receiver_stats.record_error(f"Receiving Error: {str(e)}")
+                    break
+                if drops is not None:
+                    kernel_drops = drops
+
+                try:
+                    info = json.loads(data)
+                except ValueError as e:
+                    receiver_stats.record_error(f"Invalid packet: {str(e)}")
+                    continue
+                if len(data_queue) == data_queue.maxlen:
+                    dropped += 1
+                data_queue.append((time.perf_counter(), info))
+                packets += 1
+                size += len(data)
+                last_info = info
+
+            receiver_stats.record_batch(packets, size, dropped, kernel_drops, last_info)
+    finally:
+        sel.close()
+
+def start_receiving(ip, port, rcvbuf_kb=RCVBUF_KB, queue_size=QUEUE_SIZE):
     """Start UDP receiving"""
-    global sock, is_receiving, udp_thread
+    global sock, is_receiving, udp_thread, data_queue
     stop_receiving()
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    if rcvbuf_kb > 0:
+        # The OS may clamp this (e.g. net.core.rmem_max on Linux)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf_kb * 1024)
+    track_drops = False
+    if SO_RXQ_OVFL is not None and hasattr(sock, 'recvmsg'):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+            track_drops = True
+        except OSError:
+            pass
     sock.bind((ip, port))
+    sock.setblocking(False)
+    data_queue = collections.deque(maxlen=max(queue_size, 1))
+    receiver_stats.reset()
     is_receiving = True
-    udp_thread = threading.Thread(target=udp_listener, daemon=True)
+    udp_thread = threading.Thread(target=udp_listener, args=(sock, track_drops), daemon=True)
     udp_thread.start()
+    print(f"Receiving on {ip}:{port}, SO_RCVBUF={sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)}")
 
 def stop_receiving():
     """Stop UDP receiving"""
-    global sock, is_receiving
+    global sock, is_receiving, udp_thread, shm_reader
     is_receiving = False
+    if shm_reader:
+        shm_reader.close()
+        shm_reader = None
+    # Let the listener leave select() before the socket goes away
+    if udp_thread:
+        udp_thread.join(timeout=1.0)
+        udp_thread = None
     if sock:
         try: sock.close()
         except: pass
         sock = None
 
+# ======================== Shared Memory Transport ========================
+# Same-host alternative to UDP; layout matches SharedMemoryTransmitter in utils/network.py:
+#   header (magic, version, channel count, capacity, uint64 write count),
+#   channel names as JSON at offset 64, records (seq u8, time f8, values f4[n]) at 4096
+SHM_NAME = 'fpc_features'
+SHM_MAGIC = b'FPCS'
+SHM_HEADER = struct.Struct('<4sIII')
+SHM_COUNT_OFFSET = 16
+SHM_NAMES_OFFSET = 64
+SHM_DATA_OFFSET = 4096
+SHM_RETRY_INTERVAL = 1.0  # Seconds between (re)attach attempts while no data arrives
+
+class SharedMemoryReader:
+    """Polls the transmitter's shared memory ring buffer (main thread, no syscalls per record)"""
+    def __init__(self, name):
+        self.name = name
+        self.shm = None
+        self.views = None
+        self.names = ()
+        self.record_size = 0
+        self.last_count = 0
+        self.last_activity = 0.0
+        self.last_attempt = -SHM_RETRY_INTERVAL
+
+    def _attach(self):
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(self.name)
+        if os.name == 'posix':
+            # Attaching registers the segment for cleanup at exit; only the transmitter owns it
+            from multiprocessing import resource_tracker
+            try:
+                resource_tracker.unregister(shm._name, 'shared_memory')
+            except Exception:
+                pass
+        try:
+            magic, _, channels, capacity = SHM_HEADER.unpack_from(shm.buf, 0)
+            if magic != SHM_MAGIC:
+                raise ValueError(f"'{self.name}' is not a face capture buffer")
+            names = bytes(shm.buf[SHM_NAMES_OFFSET:SHM_DATA_OFFSET]).rstrip(b'\0')
+            dtype = np.dtype([('seq', '<u8'), ('time', '<f8'), ('values', '<f4', (channels,))])
+            records = np.ndarray((capacity,), dtype=dtype, buffer=shm.buf, offset=SHM_DATA_OFFSET)
+            count = np.ndarray((1,), dtype='<u8', buffer=shm.buf, offset=SHM_COUNT_OFFSET)
+        except Exception:
+            shm.close()
+            raise
+        self.close()
+        self.shm = shm
+        self.names = tuple(json.loads(names))
+        self.record_size = dtype.itemsize
+        self.views = (count, records['seq'], records['time'], records['values'], capacity)
+        self.last_count = int(count[0])  # Start with the next record, do not replay history
+
+    def poll(self):
+        """Returns (new (timestamp, info) items, records lost to overwrites)"""
+        now = time.perf_counter()
+        idle = self.shm is None or now - self.last_activity > SHM_RETRY_INTERVAL
+        if idle and now - self.last_attempt >= SHM_RETRY_INTERVAL:
+            # The transmitter may have been restarted with a fresh segment
+            self.last_attempt = now
+            try:
+                self._attach()
+            except (OSError, ValueError) as e:
+                if self.shm is None:
+                    receiver_stats.record_error(f"Shared memory: {str(e)}")
+        if self.shm is None:
+            return [], 0
+
+        count_view, seqs, times, values, capacity = self.views
+        count = int(count_view[0])
+        if count < self.last_count:
+            self.last_count = count  # Counter went backwards: writer restarted
+        start = max(self.last_count, count - capacity)
+        dropped = start - self.last_count
+        items = []
+        for n in range(start, count):
+            slot = n % capacity
+            seq = seqs[slot]
+            row = values[slot].tolist()
+            timestamp = float(times[slot])
+            # Record was being rewritten while we read it
+            if seq != n + 1 or seqs[slot] != n + 1:
+                dropped += 1
+                continue
+            items.append((timestamp, {name: v for name, v in zip(self.names, row) if v == v}))
+        self.last_count = count
+        if items:
+            self.last_activity = now
+        return items, dropped
+
+    def close(self):
+        self.views = None  # Views must be released before the buffer can be closed
+        if self.shm:
+            self.shm.close()
+            self.shm = None
+
+shm_reader = None
+
+def start_shared_memory(name, queue_size=QUEUE_SIZE):
+    """Start polling the shared memory transport from process_data"""
+    global shm_reader, data_queue
+    stop_receiving()
+    data_queue = collections.deque(maxlen=max(queue_size, 1))
+    receiver_stats.reset()
+    shm_reader = SharedMemoryReader(name)
+    print(f"Polling shared memory '{name}'")
+
+def poll_shared_memory():
+    """Move new shared memory records into the packet buffer"""
+    items, dropped = shm_reader.poll()
+    if not items and not dropped:
+        return
+    dropped += max(len(data_queue) + len(items) - data_queue.maxlen, 0)
+    data_queue.extend(items)
+    receiver_stats.record_batch(len(items), len(items) * shm_reader.record_size, dropped, None,
+                                items[-1][1] if items else None)
+
+_debug_state = {'time': 0.0, 'packets': 0}
+
+def update_debug_info():
+    """Refresh debug text from receiver_stats on the main thread (throttled)"""
+    sc = bpy.context.scene
+    if sc and sc.fpc_subscribe and time.perf_counter() - _subscription_state['time'] >= SUBSCRIBE_INTERVAL:
+        # Subscriptions are fire-and-forget UDP: resend so a transmitter
+        # started or restarted after the addon still receives one
+        send_subscription(sc)
+    if not sc or not sc.fpc_debug_show:
+        return DEBUG_REFRESH_INTERVAL
+
+    stats = receiver_stats.snapshot()
+    now = time.perf_counter()
+    elapsed = now - _debug_state['time']
+    rate = (stats['packets'] - _debug_state['packets']) / elapsed if elapsed > 0 else 0.0
+    rate = max(rate, 0.0)  # Counters were reset by a restart
+    _debug_state.update(time=now, packets=stats['packets'])
+
+    lines = [
+        f"Packets: {stats['packets']} ({rate:.1f}/s), {stats['bytes'] / 1024:.1f} KB",
+        f"Errors: {stats['errors']}, Buffer drops: {stats['dropped']}, Kernel drops: "
+        + ("n/a" if stats['kernel_drops'] is None else str(stats['kernel_drops'])),
+    ]
+    if stats['last_error']:
+        lines.append(stats['last_error'])
+    if stats['last_packet'] is not None:
+        lines += json.dumps(stats['last_packet'], indent=2).split('\n')
+    text = '\n'.join(lines[:DEBUG_MAX_LINES])
+
+    if sc.fpc_debug_data != text:
+        sc.fpc_debug_data = text
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == 'VIEW_3D':
+                    area.tag_redraw()
+    return DEBUG_REFRESH_INTERVAL
+
+def send_control_command(ip, port, command, fields=None):
+    """Send a command (with optional extra message fields) to the transmitter's control channel"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as ctrl:
+        ctrl.sendto(json.dumps({'cmd': command, **(fields or {})}).encode(), (ip, port))
+
+def subscribed_channels(sc):
+    """Channels consumed by the enabled controls, None when every control is enabled"""
+    channels = [channel for channel, control, *_ in CHANNEL_TARGETS if getattr(sc, f'fpc_enable_{control}')]
+    return None if len(channels) == len(CHANNEL_TARGETS) else channels
+
+_subscription_state = {'time': float('-inf')}
+
+def send_subscription(sc):
+    """Ask the transmitter to send only the channels and rate this receiver uses.
+
+    The transmitter matches the subscription to one of its destinations by
+    (control message source IP, udp_port) and keeps sending everything otherwise.
+    """
+    if not (sc.fpc_receiving and sc.fpc_transport == 'UDP'):
+        return
+    _subscription_state['time'] = time.perf_counter()
+    if sc.fpc_subscribe:
+        channels, rate = subscribed_channels(sc), sc.fpc_subscribe_rate
+    else:
+        channels, rate = None, 0  # Back to the default: everything, every frame
+    try:
+        send_control_command(sc.fpc_control_ip, sc.fpc_control_port, 'subscribe',
+                             {'port': sc.udp_port, 'channels': channels, 'rate': rate})
+    except OSError as e:
+        print(f"Subscription failed: {str(e)}")
+
+def _on_subscription_changed(self, context):
+    send_subscription(context.scene)
+
 # ======================== Recording Import ========================
 def parse_recording_data(filepath):
-    """Parse recorded CSV data"""
-    data = []
-    
-    # Ensure absolute path
+    """Parse recorded CSV data into a list of per-row dicts"""
+    _, values = load_recording_arrays(filepath)
+    if values is None:
+        return []
+    return [dict(zip(CHANNELS, row)) for row in values.tolist()]
+
+def load_recording_arrays(filepath):
+    """Read a CSV recording into (timestamps, values) with values in CHANNELS order"""
     abs_path = bpy.path.abspath(filepath)
     if not os.path.exists(abs_path):
         print(f"File not found: {abs_path}")
-        return []
-    
+        return None, None
+
     try:
-        with open(abs_path, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Convert data types
-                frame_data = {
-                    'head_pitch': float(row.get('head_pitch', 0)),
-                    'head_yaw': float(row.get('head_yaw', 0)),
-                    'head_roll': float(row.get('head_roll', 0)),
-                    'mouth_open': float(row.get('mouth_open', 0)),
-                    'mouth_width': float(row.get('mouth_width', 0)),
-                    'left_eyelid': float(row.get('left_eyelid', 0)),
-                    'right_eyelid': float(row.get('right_eyelid', 0)),
-                    'left_pupil_x': float(row.get('left_pupil_x', 0)),
-                    'left_pupil_y': float(row.get('left_pupil_y', 0)),
-                    'right_pupil_x': float(row.get('right_pupil_x', 0)),
-                    'right_pupil_y': float(row.get('right_pupil_y', 0))
-                }
-                data.append(frame_data)
-        return data
+        with open(abs_path, 'r', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            rows = [row for row in reader if row]
+        data = np.array(rows, dtype=np.float64).reshape(len(rows), len(header))
     except Exception as e:
         print(f"Error reading recording: {str(e)}")
-        return []
+        return None, None
+
+    values = np.zeros((len(data), len(CHANNELS)))
+    for col, name in enumerate(header):
+        if name in CHANNEL_INDEX:
+            values[:, CHANNEL_INDEX[name]] = data[:, col]
+    if 'timestamp' in header:
+        timestamps = data[:, header.index('timestamp')]
+    else:
+        timestamps = np.arange(len(data), dtype=np.float64) / 30.0
+    return timestamps, values
+
+class RecordingReader:
+    """Indexed, chunked reader for CSV recordings (used for playback)
+
+    Nothing is loaded up front: rows are located by binary search on the byte
+    offset (timestamps are increasing) and parsed in small chunks on demand,
+    so long takes start immediately and seeking never reloads the file.
+    """
+    CHUNK_BYTES = 1 << 16
+    MAX_CHUNKS = 16  # Chunks kept for scrubbing back and forth
+
+    def __init__(self, filepath):
+        self.file = open(bpy.path.abspath(filepath), 'rb')
+        header = self.file.readline().decode('utf-8').strip().split(',')
+        self.data_start = self.file.tell()
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.columns = [(col, CHANNEL_INDEX[name]) for col, name in enumerate(header) if name in CHANNEL_INDEX]
+        self.chunks = collections.OrderedDict()  # offset -> (timestamps, values, next offset)
+        self.current = None
+
+        if 'timestamp' in header:
+            self.ts_col = header.index('timestamp')
+        else:
+            # No timestamps to search on: load everything as one chunk (30 fps as in load_recording_arrays)
+            self.ts_col = None
+            rows = self._parse(self._read(self.data_start, self.size - self.data_start))
+            self._store(self.data_start, np.arange(len(rows)) / 30.0, rows, self.size)
+        first = self._load(self.data_start)
+        if not len(first[0]):
+            self.close()
+            raise ValueError("Recording is empty")
+        self.start_time = first[0][0]
+        self.end_time = self._last_timestamp()
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time
+
+    def close(self):
+        self.file.close()
+        self.chunks.clear()
+
+    def _read(self, offset, size):
+        self.file.seek(offset)
+        return self.file.read(size)
+
+    def _parse(self, block):
+        lines = [line for line in block.decode('utf-8').splitlines() if line.strip()]
+        if not lines:
+            return np.zeros((0, 0))
+        return np.loadtxt(lines, delimiter=',', ndmin=2)
+
+    def _timestamp_after(self, offset):
+        """(start offset, timestamp) of the first full line at or after offset, or (None, None)"""
+        self.file.seek(offset)
+        if offset > self.data_start:
+            self.file.readline()  # Skip the partial line we landed in
+        start = self.file.tell()
+        line = self.file.readline()
+        if not line.strip():
+            return None, None
+        return start, float(line.split(b',')[self.ts_col])
+
+    def _last_timestamp(self):
+        if self.ts_col is None:
+            return next(reversed(self.chunks.values()))[0][-1]
+        tail = self._read(max(self.size - 4096, self.data_start), 4096).rstrip().rsplit(b'\n', 1)[-1]
+        return float(tail.split(b',')[self.ts_col])
+
+    def _store(self, offset, timestamps, rows, next_offset):
+        values = np.zeros((len(rows), len(CHANNELS)))
+        for col, index in self.columns:
+            if len(rows):
+                values[:, index] = rows[:, col]
+        chunk = (timestamps, values, next_offset)
+        self.chunks[offset] = chunk
+        while len(self.chunks) > self.MAX_CHUNKS:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    def _load(self, offset):
+        """Parse the chunk starting at a line-aligned offset (plus one overlapping row)"""
+        chunk = self.chunks.get(offset)
+        if chunk is not None:
+            self.chunks.move_to_end(offset)
+            return chunk
+        block = self._read(offset, self.CHUNK_BYTES)
+        end = block.rfind(b'\n') + 1
+        if end == 0 or offset + len(block) >= self.size:
+            end = len(block)  # Last chunk (or a single huge line)
+        next_offset = offset + end
+        # One extra row so consecutive chunks overlap and every time falls inside one
+        self.file.seek(next_offset)
+        rows = self._parse(block[:end] + self.file.readline())
+        timestamps = rows[:, self.ts_col] if len(rows) else np.zeros(0)
+        return self._store(offset, timestamps, rows, next_offset)
+
+    def _find_offset(self, t):
+        """Binary search on byte offsets for a line-aligned offset at or just before time t"""
+        lo, hi = self.data_start, self.size
+        while hi - lo > self.CHUNK_BYTES // 2:
+            mid = (lo + hi) // 2
+            start, ts = self._timestamp_after(mid)
+            if start is None or ts > t:
+                hi = mid
+            else:
+                lo = start
+        return lo
+
+    def _chunk_for(self, t):
+        current = self.current
+        if current is not None and current[0][0] <= t <= current[0][-1]:
+            return current
+        for chunk in reversed(self.chunks.values()):
+            if len(chunk[0]) and chunk[0][0] <= t <= chunk[0][-1]:
+                return chunk
+        # Sequential playback reads the next chunk without searching
+        if current is not None and t > current[0][-1] and current[2] < self.size:
+            chunk = self._load(current[2])
+            if len(chunk[0]) and t <= chunk[0][-1]:
+                return chunk
+        return self._load(self._find_offset(t))
+
+    def sample(self, t):
+        """Channel values (CHANNELS order) at time t, linearly interpolated"""
+        t = min(max(t, self.start_time), self.end_time)
+        if self.ts_col is None:
+            timestamps, values, _ = next(iter(self.chunks.values()))
+        else:
+            timestamps, values, _ = self.current = self._chunk_for(t)
+        i = int(np.searchsorted(timestamps, t, side='right'))
+        if i <= 0:
+            return values[0]
+        if i >= len(timestamps):
+            return values[-1]
+        t0, t1 = timestamps[i - 1], timestamps[i]
+        w = (t - t0) / (t1 - t0) if t1 > t0 else 0.0
+        return values[i - 1] + (values[i] - values[i - 1]) * w
+
+# ======================== Offline Smoothing ========================
+def _odd_extend(values, pad):
+    pad = min(pad, len(values) - 1)
+    if pad < 1:
+        return values, 0
+    head = 2 * values[0] - values[pad:0:-1]
+    tail = 2 * values[-1] - values[-2:-pad - 2:-1]
+    return np.concatenate([head, values, tail]), pad
+
+FILTER_BLOCK = 64  # Samples per block of the vectorized recursive filters
+
+# Bake smoothing groups; the CLI (tools/smooth_recording, offline_smoothing in config.yaml) uses the same
+BAKE_GROUPS = ('head', 'eyelids', 'pupils', 'mouth', 'brows', 'teeth')
+
+def channel_group(channel):
+    """Group of a channel, as face_constants.feature_group"""
+    if 'pupil' in channel:
+        return 'pupils'
+    if channel.endswith('_eyelid'):
+        return 'eyelids'
+    if channel.startswith('head'):
+        return 'head'
+    if 'mouth' in channel:
+        return 'mouth'
+    if 'brow' in channel:
+        return 'brows'
+    return 'teeth'
+
+def _state_space_filter(values, A, B, C, D, state, block=FILTER_BLOCK):
+    """Linear recursion s[n+1] = A s[n] + B x[n], y[n] = C s[n] + D x[n], one block at a time.
+
+    Each block is a lower-triangular impulse response matrix times the input
+    plus the zero-input response of the carried state, so Python only loops
+    once per block (about 30x faster than a per-sample loop).
+    """
+    n = len(values)
+    size = min(block, n)
+    powers = [np.eye(len(A))]
+    for _ in range(size):
+        powers.append(A @ powers[-1])
+    response = np.array([C @ p for p in powers[:size]])
+    impulse = np.array([D] + [C @ p @ B for p in powers[:size - 1]])
+    lag = np.arange(size)[:, None] - np.arange(size)[None, :]
+    transfer = np.where(lag >= 0, impulse[np.maximum(lag, 0)], 0.0)
+    inject = np.array([powers[size - 1 - k] @ B for k in range(size)]).T
+    advance = powers[size]
+    out = np.empty_like(values)
+    for start in range(0, n, size):
+        x = values[start:start + size]
+        count = len(x)
+        if count < size:
+            # Zero-pad the last block: the filter is causal, the first count outputs are exact
+            x = np.concatenate([x, np.zeros((size - count,) + x.shape[1:])])
+        out[start:start + count] = (transfer @ x + response @ state)[:count]
+        state = advance @ state + inject @ x
+    return out
+
+def _exponential_pass(values, alpha):
+    """y[n] = alpha * y[n-1] + (1 - alpha) * x[n], starting from the first sample"""
+    return _state_space_filter(values, np.array([[alpha]]), np.array([1 - alpha]), np.array([alpha]),
+                               1 - alpha, values[:1].copy())
+
+def _butterworth_sections(cutoff, fs, order):
+    """Even-order Butterworth low-pass as biquad sections [(b, a), ...]"""
+    if order < 2 or order % 2:
+        raise ValueError(f"Butterworth order must be a positive even number, got {order}")
+    w0 = 2 * math.pi * min(cutoff, 0.45 * fs) / fs
+    cos_w0, sin_w0 = math.cos(w0), math.sin(w0)
+    sections = []
+    for k in range(order // 2):
+        q = 1 / (2 * math.cos(math.pi * (2 * k + 1) / (2 * order)))
+        alpha = sin_w0 / (2 * q)
+        a0 = 1 + alpha
+        b = np.array([(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]) / a0
+        a = np.array([1.0, -2 * cos_w0 / a0, (1 - alpha) / a0])
+        sections.append((b, a))
+    return sections
+
+def _biquad(values, b, a):
+    """Transposed direct form II section, state starts at steady state for the first sample"""
+    A = np.array([[-a[1], 1.0], [-a[2], 0.0]])
+    B = np.array([b[1] - a[1] * b[0], b[2] - a[2] * b[0]])
+    z2 = (b[2] - a[2]) * values[0]
+    state = np.stack([(b[1] - a[1]) * values[0] + z2, z2])
+    return _state_space_filter(values, A, B, np.array([1.0, 0.0]), b[0], state)
+
+def zero_phase_smooth(values, fs, method, cutoff=8.0, window=9, alpha=0.5, order=2, polyorder=2):
+    """Forward-backward filtering of a whole (N, C) recording, no phase lag"""
+    if method == 'NONE' or len(values) < 3:
+        return values
+    if method == 'SAVGOL':
+        window = int(window) | 1
+        if polyorder >= window:
+            raise ValueError(f"polyorder ({polyorder}) must be less than window ({window})")
+        if len(values) < window:
+            return values
+        half = window // 2
+        vander = np.vander(np.arange(-half, half + 1, dtype=np.float64), polyorder + 1, increasing=True)
+        padded, _ = _odd_extend(values, half)
+        windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)
+        return windows @ np.linalg.pinv(vander)[0]
+    if method == 'EXPONENTIAL':
+        forward = _exponential_pass(values, alpha)
+        return _exponential_pass(forward[::-1], alpha)[::-1]
+    sections = _butterworth_sections(cutoff, fs, order)
+    padded, pad = _odd_extend(values, int(3 * fs / max(cutoff, 1e-6)))
+    for b, a in sections:
+        padded = _biquad(padded, b, a)
+    padded = padded[::-1]
+    for b, a in sections:
+        padded = _biquad(padded, b, a)
+    return padded[::-1][pad:len(padded) - pad]
+
+BAKE_SMOOTH_PARAMS = ('cutoff', 'order', 'window', 'polyorder', 'alpha')
+BAKE_SMOOTH_METHODS = [
+    ('NONE', "None", "Bake the recorded values as they are"),
+    ('BUTTERWORTH', "Butterworth", "Zero-phase Butterworth low-pass"),
+    ('SAVGOL', "Savitzky-Golay", "Savitzky-Golay polynomial smoothing"),
+    ('EXPONENTIAL', "Exponential", "Forward-backward exponential smoothing"),
+]
+
+def bake_smooth_settings(sc, group):
+    """Global bake smoothing settings with the group's overrides (0 keeps the global value),
+    like offline_filter.channel_settings"""
+    settings = {'method': sc.fpc_bake_smooth}
+    settings.update((key, getattr(sc, f'fpc_bake_smooth_{key}')) for key in BAKE_SMOOTH_PARAMS)
+    method = getattr(sc, f'fpc_bake_{group}_smooth')
+    if method != 'GLOBAL':
+        settings['method'] = method
+    for key in BAKE_SMOOTH_PARAMS:
+        value = getattr(sc, f'fpc_bake_{group}_{key}')
+        if value:
+            settings[key] = value
+    return settings
+
+def smooth_recording_values(sc, values, fs):
+    """Per-group zero-phase smoothing before baking; groups with equal settings are filtered together"""
+    batches = {}
+    for group in BAKE_GROUPS:
+        settings = bake_smooth_settings(sc, group)
+        if settings['method'] == 'NONE':
+            continue
+        cols = [i for i, channel in enumerate(CHANNELS) if channel_group(channel) == group]
+        key = tuple(sorted(settings.items()))
+        batches.setdefault(key, []).extend(cols)
+    if not batches:
+        return values
+    out = values.copy()
+    for key, cols in batches.items():
+        settings = dict(key)
+        out[:, cols] = zero_phase_smooth(values[:, cols], fs, settings.pop('method'), **settings)
+    return out
 
 class FPC_OT_ImportRecording(Operator, ImportHelper):
     """Import recording file"""
@@ -250,90 +1083,114 @@ class FPC_OT_ImportRecording(Operator, ImportHelper):
         sc.fpc_record_file = bpy.path.abspath(self.filepath)
         return {'FINISHED'}
 
+active_playback = None  # Running FPC_OT_PlayRecording instance, toggled by the button
+
 class FPC_OT_PlayRecording(Operator):
-    """Play/Pause recording"""
+    """Play/Pause recording (streams the file; scrub the timeline to seek)"""
     bl_idname = "fpc.play_recording"
     bl_label = "Play/Pause Recording"
-    
-    _timer = None
-    _recording_data = []
-    _current_index = 0
-    _is_playing = False
-    _start_frame = 0
-    
+
     def modal(self, context, event):
         sc = context.scene
-        
+
         # ESC to cancel
-        if event.type == 'ESC':
+        if event.type == 'ESC' or active_playback is not self:
             self.cancel(context)
             return {'CANCELLED'}
-            
+
         # Space to toggle play/pause
         if event.type == 'SPACE' and event.value == 'PRESS':
-            self._is_playing = not self._is_playing
-            if not self._is_playing:
-                return {'PASS_THROUGH'}
-        
-        if event.type == 'TIMER' and self._is_playing:
-            if not self._recording_data or self._current_index >= len(self._recording_data):
+            self.toggle(sc)
+
+        if event.type == 'TIMER':
+            if not self.update(sc):
                 self.cancel(context)
                 return {'CANCELLED'}
-            
-            # Set current frame
-            frame = self._start_frame + self._current_index
-            sc.frame_set(frame)
-            
-            # Apply data
-            armature = sc.fpc_active_armature
-            if armature:
-                apply_facial_data(sc, armature, self._recording_data[self._current_index], frame, auto_key=False)
-            
-            self._current_index += 1
-            
         return {'PASS_THROUGH'}
-    
+
+    def toggle(self, sc):
+        self.playing = not self.playing
+        if self.playing:
+            # Resume from the current position
+            self.clock_start = time.perf_counter() - self.position
+        sc.fpc_recording_playing = self.playing
+
+    def update(self, sc):
+        """Advance or seek, then pose the rig; returns False when playback ended"""
+        if sc.frame_current != self.shown_frame:
+            # Timeline was scrubbed: seek there without reloading anything
+            self.shown_frame = sc.frame_current
+            self.position = max(sc.frame_current - self.start_frame, 0) / self.fps
+            self.clock_start = time.perf_counter() - self.position
+        elif self.playing:
+            self.position = time.perf_counter() - self.clock_start
+            if self.position > self.reader.duration:
+                return False
+        else:
+            return True
+
+        # Follow the wall clock, sampling the recording on scene frames
+        index = int(self.position * self.fps)
+        frame = self.start_frame + index
+        if frame == self.applied_frame:
+            return True
+        if self.playing and sc.fpc_playback_follow_frame:
+            sc.frame_set(frame)  # Re-evaluates the whole scene
+            self.shown_frame = frame
+
+        armature = sc.fpc_active_armature
+        if armature:
+            values = self.reader.sample(self.reader.start_time + index / self.fps)
+            apply_facial_data(sc, armature, dict(zip(CHANNELS, values.tolist())), frame, auto_key=False)
+        self.applied_frame = frame
+        return True
+
     def execute(self, context):
+        global active_playback
         sc = context.scene
-        
-        # Toggle play/pause
-        if self._is_playing:
-            self._is_playing = False
+
+        # Toggle play/pause of the running playback
+        if active_playback is not None:
+            active_playback.toggle(sc)
             return {'FINISHED'}
-        
+
         if not sc.fpc_record_file:
             self.report({'ERROR'}, "Please select a recording file first")
             return {'CANCELLED'}
-            
-        # Load recording data
-        self._recording_data = parse_recording_data(sc.fpc_record_file)
-        if not self._recording_data:
-            self.report({'ERROR'}, "Failed to read recording file or file is empty")
+
+        # Open the recording; rows are read on demand while playing
+        try:
+            self.reader = RecordingReader(sc.fpc_record_file)
+        except (OSError, ValueError, IndexError) as e:
+            self.report({'ERROR'}, f"Failed to read recording file: {str(e)}")
             return {'CANCELLED'}
-        
-        # Set start frame to current frame
-        self._start_frame = sc.frame_current
-        self._current_index = 0
-        self._is_playing = True
-        
-        # Calculate timer interval based on frame rate
-        fps = sc.render.fps / sc.render.fps_base
-        interval = 1.0 / fps
-        
+
+        self.fps = sc.render.fps / sc.render.fps_base
+        self.start_frame = sc.frame_current
+        self.shown_frame = sc.frame_current
+        self.applied_frame = None
+        self.position = 0.0
+        self.playing = False
+        self.toggle(sc)
+
         # Start timer
         wm = context.window_manager
-        self._timer = wm.event_timer_add(interval, window=context.window)
+        self._timer = wm.event_timer_add(1.0 / self.fps, window=context.window)
         wm.modal_handler_add(self)
-        
+        active_playback = self
         return {'RUNNING_MODAL'}
-    
+
     def cancel(self, context):
-        wm = context.window_manager
-        if self._timer:
-            wm.event_timer_remove(self._timer)
-        self._recording_data = []
-        self._current_index = 0
-        self._is_playing = False
+        global active_playback
+        if getattr(self, '_timer', None):
+            context.window_manager.event_timer_remove(self._timer)
+            self._timer = None
+        if getattr(self, 'reader', None):
+            self.reader.close()
+            self.reader = None
+        if active_playback is self:
+            active_playback = None
+            context.scene.fpc_recording_playing = False
 
 class FPC_OT_BakeRecording(Operator):
     """Bake recording to keyframes"""
@@ -348,8 +1205,8 @@ class FPC_OT_BakeRecording(Operator):
             return {'CANCELLED'}
             
         # Load recording data
-        recording_data = parse_recording_data(sc.fpc_record_file)
-        if not recording_data:
+        timestamps, values = load_recording_arrays(sc.fpc_record_file)
+        if values is None or not len(values):
             self.report({'ERROR'}, "Failed to read recording file or file is empty")
             return {'CANCELLED'}
             
@@ -357,22 +1214,33 @@ class FPC_OT_BakeRecording(Operator):
         if not armature:
             self.report({'ERROR'}, "Please select or create an armature first")
             return {'CANCELLED'}
+
+        # Optional zero-phase smoothing over the whole take (global settings, per-group overrides)
+        dt = np.median(np.diff(timestamps)) if len(timestamps) > 1 else 0
+        fs = 1.0 / dt if dt > 0 else 30.0
+        try:
+            values = smooth_recording_values(sc, values, fs)
+        except ValueError as e:
+            self.report({'ERROR'}, f"Bake smoothing: {str(e)}")
+            return {'CANCELLED'}
+
+        # Bulk-write all frames into the armature's action
+        if armature.animation_data is None:
+            armature.animation_data_create()
+        action = armature.animation_data.action
+        if action is None:
+            action = bpy.data.actions.new(f"{armature.name}Action")
+            armature.animation_data.action = action
+        head = get_pose_bone(armature, controls['head'])
+        if head:
+            head.rotation_mode = 'XYZ'
+
+        # Place samples by their timestamps on the scene's fps timeline
+        fps = sc.render.fps / sc.render.fps_base
+        frames, values = resample_to_frames(timestamps, values, fps, sc.fpc_record_start_frame)
+        keys = write_channel_fcurves(sc, armature, action, frames, values, reduction_tolerances(sc))
         
-        # Save original auto keyframe setting
-        original_auto_key = sc.tool_settings.use_keyframe_insert_auto
-        sc.tool_settings.use_keyframe_insert_auto = True
-        
-        # Bake each frame
-        start_frame = sc.fpc_record_start_frame
-        for i, frame_data in enumerate(recording_data):
-            frame = start_frame + i
-            sc.frame_set(frame)
-            apply_facial_data(sc, armature, frame_data, frame, auto_key=True)
-        
-        # Restore original setting
-        sc.tool_settings.use_keyframe_insert_auto = original_auto_key
-        
-        self.report({'INFO'}, f"Successfully baked {len(recording_data)} frames")
+        self.report({'INFO'}, f"Successfully baked {len(values)} frames ({keys} keys)")
         return {'FINISHED'}
 
 # ======================== UI Panels ========================
@@ -392,9 +1260,14 @@ class FPC_OT_Start(bpy.types.Operator):
 
     def execute(self, context):
         sc = context.scene
-        start_receiving(sc.udp_ip, sc.udp_port)
+        if sc.fpc_transport == 'SHM':
+            start_shared_memory(sc.fpc_shm_name, sc.fpc_queue_size)
+            self.report({'INFO'}, f"Polling shared memory '{sc.fpc_shm_name}'")
+        else:
+            start_receiving(sc.udp_ip, sc.udp_port, sc.fpc_rcvbuf_kb, sc.fpc_queue_size)
+            self.report({'INFO'}, "UDP receiving started")
         sc.fpc_receiving = True
-        self.report({'INFO'}, "UDP receiving started")
+        send_subscription(sc)
         return {'FINISHED'}
 
 class FPC_OT_Stop(bpy.types.Operator):
@@ -404,7 +1277,56 @@ class FPC_OT_Stop(bpy.types.Operator):
     def execute(self, context):
         stop_receiving()
         context.scene.fpc_receiving = False
-        self.report({'INFO'}, "UDP receiving stopped")
+        self.report({'INFO'}, "Receiving stopped")
+        return {'FINISHED'}
+
+class FPC_OT_RecordTake(bpy.types.Operator):
+    """Record incoming data in memory and commit it to a new action on stop"""
+    bl_idname = "fpc.record_take"
+    bl_label = "Record Take"
+
+    def execute(self, context):
+        global active_take
+        sc = context.scene
+
+        if active_take is None:
+            if not sc.fpc_active_armature:
+                self.report({'ERROR'}, "Please select or create an armature first")
+                return {'CANCELLED'}
+            active_take = TakeRecorder(sc.frame_current)
+            sc.fpc_take_recording = True
+            self.report({'INFO'}, "Take recording started")
+            return {'FINISHED'}
+
+        take, active_take = active_take, None
+        sc.fpc_take_recording = False
+        if take.count < 2:
+            self.report({'WARNING'}, "Take is empty, nothing was recorded")
+            return {'CANCELLED'}
+
+        armature = sc.fpc_active_armature
+        if not armature:
+            self.report({'ERROR'}, "Active armature was removed, take discarded")
+            return {'CANCELLED'}
+        action, frames = commit_take(sc, armature, take)
+        self.report({'INFO'}, f"Take saved to action '{action.name}' ({frames} frames)")
+        return {'FINISHED'}
+
+class FPC_OT_SendCommand(bpy.types.Operator):
+    """Send a command to the transmitter (works without its preview window)"""
+    bl_idname = "fpc.send_command"
+    bl_label = "Send Transmitter Command"
+
+    command: StringProperty()
+
+    def execute(self, context):
+        sc = context.scene
+        try:
+            send_control_command(sc.fpc_control_ip, sc.fpc_control_port, self.command)
+        except OSError as e:
+            self.report({'ERROR'}, f"Failed to send command: {str(e)}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Sent '{self.command}' to transmitter")
         return {'FINISHED'}
 
 class FPC_PT_Panel(bpy.types.Panel):
@@ -425,13 +1347,46 @@ class FPC_PT_Panel(bpy.types.Panel):
         
         # UDP control
         layout.separator()
-        layout.prop(sc, 'udp_ip')
-        layout.prop(sc, 'udp_port')
+        layout.prop(sc, 'fpc_transport', expand=True)
+        if sc.fpc_transport == 'SHM':
+            layout.prop(sc, 'fpc_shm_name')
+            layout.prop(sc, 'fpc_queue_size')
+        else:
+            layout.prop(sc, 'udp_ip')
+            layout.prop(sc, 'udp_port')
+            row = layout.row(align=True)
+            row.prop(sc, 'fpc_rcvbuf_kb')
+            row.prop(sc, 'fpc_queue_size')
         
         if sc.fpc_receiving:
             layout.operator('fpc.stop', icon='CANCEL')
         else:
             layout.operator('fpc.start', icon='PLAY')
+        if sc.fpc_take_recording:
+            layout.operator('fpc.record_take', text="Stop Take", icon='PAUSE')
+        elif sc.fpc_receiving:
+            layout.operator('fpc.record_take', text="Record Take", icon='REC')
+
+        # Transmitter remote control
+        layout.separator()
+        box = layout.box()
+        box.label(text="Transmitter Control")
+        row = box.row(align=True)
+        row.prop(sc, 'fpc_control_ip', text="")
+        row.prop(sc, 'fpc_control_port', text="")
+        row = box.row(align=True)
+        row.operator('fpc.send_command', text="Calibrate Face", icon='USER').command = 'calibrate_face'
+        row.operator('fpc.send_command', text="Calibrate Head", icon='ORIENTATION_GIMBAL').command = 'calibrate_head'
+        row = box.row(align=True)
+        row.operator('fpc.send_command', text="Record", icon='REC').command = 'record_start'
+        row.operator('fpc.send_command', text="Stop", icon='CANCEL').command = 'record_stop'
+        box.operator('fpc.send_command', text="Shutdown Transmitter", icon='QUIT').command = 'shutdown'
+        if sc.fpc_transport == 'UDP':
+            row = box.row(align=True)
+            row.prop(sc, 'fpc_subscribe')
+            sub = row.row(align=True)
+            sub.enabled = sc.fpc_subscribe
+            sub.prop(sc, 'fpc_subscribe_rate')
 
 class FPC_PT_ControlPanel(bpy.types.Panel):
     bl_space_type = 'VIEW_3D'
@@ -453,6 +1408,13 @@ class FPC_PT_ControlPanel(bpy.types.Panel):
                             text=control.replace('_', ' ').title(),
                             toggle=True)
 
+def draw_smooth_params(row, sc, prefix, method):
+    """Parameter fields of a bake smoothing method (prefix: global or per-group properties)"""
+    params = {'BUTTERWORTH': ('cutoff', 'order'), 'SAVGOL': ('window', 'polyorder'),
+              'EXPONENTIAL': ('alpha',)}.get(method, ())
+    for key in params:
+        row.prop(sc, f'{prefix}_{key}')
+
 class FPC_PT_RecordPanel(bpy.types.Panel):
     """Recording import panel"""
     bl_space_type = 'VIEW_3D'
@@ -473,7 +1435,27 @@ class FPC_PT_RecordPanel(bpy.types.Panel):
         # Start frame setting
         layout.prop(sc, 'fpc_record_start_frame', text="Start Frame")
         
+        # Bake smoothing
+        layout.prop(sc, 'fpc_bake_smooth', text="Bake Smoothing")
+        draw_smooth_params(layout.row(align=True), sc, 'fpc_bake_smooth', sc.fpc_bake_smooth)
+        layout.prop(sc, 'fpc_bake_smooth_groups')
+        if sc.fpc_bake_smooth_groups:
+            box = layout.box()
+            for group in BAKE_GROUPS:
+                row = box.row(align=True)
+                row.prop(sc, f'fpc_bake_{group}_smooth', text=group.title())
+                method = bake_smooth_settings(sc, group)['method']
+                draw_smooth_params(row, sc, f'fpc_bake_{group}', method)
+        
+        # Keyframe reduction
+        layout.prop(sc, 'fpc_bake_reduce')
+        if sc.fpc_bake_reduce:
+            row = layout.row(align=True)
+            row.prop(sc, 'fpc_bake_tolerance')
+            row.prop(sc, 'fpc_bake_head_tolerance')
+        
         # Action buttons
+        layout.prop(sc, 'fpc_playback_follow_frame')
         row = layout.row(align=True)
         row.operator('fpc.play_recording', icon='PLAY' if not sc.fpc_recording_playing else 'PAUSE')
         row.operator('fpc.bake_recording', icon='KEYINGSET')
@@ -510,6 +1492,8 @@ classes = (
     FPC_OT_CreateControls,
     FPC_OT_Start,
     FPC_OT_Stop,
+    FPC_OT_RecordTake,
+    FPC_OT_SendCommand,
     FPC_OT_ImportRecording,
     FPC_OT_PlayRecording,
     FPC_OT_BakeRecording,
@@ -529,6 +1513,34 @@ def register():
     bpy.types.Scene.udp_port = IntProperty(
         name="UDP Port", default=UDP_PORT, min=1, max=65535)
     bpy.types.Scene.fpc_receiving = BoolProperty(default=False)
+    bpy.types.Scene.fpc_take_recording = BoolProperty(default=False)
+    bpy.types.Scene.fpc_rcvbuf_kb = IntProperty(
+        name="Recv Buffer (KB)", default=RCVBUF_KB, min=0, max=65536,
+        description="Kernel receive buffer size (SO_RCVBUF), 0 for OS default")
+    bpy.types.Scene.fpc_queue_size = IntProperty(
+        name="Queue Size", default=QUEUE_SIZE, min=1, max=65536,
+        description="Max buffered packets; the oldest are dropped when full")
+    bpy.types.Scene.fpc_transport = EnumProperty(
+        name="Transport",
+        items=[('UDP', "UDP", "Receive packets over the network"),
+               ('SHM', "Shared Memory", "Read the transmitter's shared memory (same machine, --transport shm)")],
+        default='UDP')
+    bpy.types.Scene.fpc_shm_name = StringProperty(
+        name="Memory Name", default=SHM_NAME,
+        description="Shared memory name (network.shm.name in the transmitter's config.yaml)")
+
+    # Transmitter control properties
+    bpy.types.Scene.fpc_control_ip = StringProperty(
+        name="Control IP", default=UDP_IP,
+        description="Address of the machine running the transmitter")
+    bpy.types.Scene.fpc_control_port = IntProperty(
+        name="Control Port", default=CONTROL_PORT, min=1, max=65535)
+    bpy.types.Scene.fpc_subscribe = BoolProperty(
+        name="Subscribe", default=True, update=_on_subscription_changed,
+        description="Ask the transmitter to send only the channels of enabled controls")
+    bpy.types.Scene.fpc_subscribe_rate = IntProperty(
+        name="Max Rate (Hz)", default=0, min=0, max=240, update=_on_subscription_changed,
+        description="Highest packet rate to request from the transmitter, 0 for every frame")
     
     # Armature properties
     bpy.types.Scene.fpc_active_armature = PointerProperty(
@@ -558,11 +1570,58 @@ def register():
         default=1,
         description="Frame to start playback/baking from"
     )
+    bpy.types.Scene.fpc_bake_smooth = EnumProperty(
+        name="Bake Smoothing",
+        items=BAKE_SMOOTH_METHODS,
+        default='NONE',
+        description="Offline zero-phase filter applied before baking"
+    )
+    bpy.types.Scene.fpc_bake_smooth_cutoff = FloatProperty(
+        name="Cutoff (Hz)", default=8.0, min=0.1, max=60.0)
+    bpy.types.Scene.fpc_bake_smooth_order = IntProperty(
+        name="Order", default=2, min=2, max=8, description="Butterworth order (even)")
+    bpy.types.Scene.fpc_bake_smooth_window = IntProperty(
+        name="Window (frames)", default=9, min=3, max=99)
+    bpy.types.Scene.fpc_bake_smooth_polyorder = IntProperty(
+        name="Poly Order", default=2, min=1, max=6)
+    bpy.types.Scene.fpc_bake_smooth_alpha = FloatProperty(
+        name="Smoothing", default=0.5, min=0.0, max=0.99)
+    bpy.types.Scene.fpc_bake_smooth_groups = BoolProperty(
+        name="Per-Group Smoothing", default=False,
+        description="Show per-group overrides of the bake smoothing (as offline_smoothing.channels in config.yaml)")
+    # Per-group overrides; GLOBAL and 0 keep the global setting
+    for group in BAKE_GROUPS:
+        setattr(bpy.types.Scene, f'fpc_bake_{group}_smooth', EnumProperty(
+            name=f"{group.title()} Smoothing",
+            items=[('GLOBAL', "Global", "Use the global bake smoothing")] + BAKE_SMOOTH_METHODS,
+            default='GLOBAL'))
+        setattr(bpy.types.Scene, f'fpc_bake_{group}_cutoff', FloatProperty(
+            name="Cutoff (Hz)", default=0.0, min=0.0, max=60.0, description="0 uses the global cutoff"))
+        setattr(bpy.types.Scene, f'fpc_bake_{group}_order', IntProperty(
+            name="Order", default=0, min=0, max=8, description="Butterworth order (even), 0 uses the global order"))
+        setattr(bpy.types.Scene, f'fpc_bake_{group}_window', IntProperty(
+            name="Window (frames)", default=0, min=0, max=99, description="0 uses the global window"))
+        setattr(bpy.types.Scene, f'fpc_bake_{group}_polyorder', IntProperty(
+            name="Poly Order", default=0, min=0, max=6, description="0 uses the global polynomial order"))
+        setattr(bpy.types.Scene, f'fpc_bake_{group}_alpha', FloatProperty(
+            name="Smoothing", default=0.0, min=0.0, max=0.99, description="0 uses the global smoothing"))
+    bpy.types.Scene.fpc_bake_reduce = BoolProperty(
+        name="Reduce Keyframes", default=False,
+        description="Drop keys that linear interpolation reproduces within the tolerance (reduced curves are baked with LINEAR interpolation)")
+    bpy.types.Scene.fpc_bake_tolerance = FloatProperty(
+        name="Tolerance", default=0.005, min=0.0, max=1.0, precision=4,
+        description="Max error for facial controls (scale/location units, scaled down for pupils)")
+    bpy.types.Scene.fpc_bake_head_tolerance = FloatProperty(
+        name="Head (deg)", default=0.2, min=0.0, max=10.0,
+        description="Max error for head rotation in degrees")
     bpy.types.Scene.fpc_recording_playing = BoolProperty(
         name="Recording Playing",
         default=False,
         description="Is recording currently playing"
     )
+    bpy.types.Scene.fpc_playback_follow_frame = BoolProperty(
+        name="Move Timeline", default=False,
+        description="Advance the scene frame during playback (re-evaluates the whole scene every frame)")
     
     # Control properties
     control_props = {
@@ -580,28 +1639,42 @@ def register():
     for prop, default in control_props.items():
         setattr(bpy.types.Scene, f'fpc_enable_{prop}', 
                BoolProperty(name=prop.replace('_', ' ').title(), 
-               default=default))
+               default=default, update=_on_subscription_changed))
     
     bpy.app.timers.register(process_data)
+    bpy.app.timers.register(update_debug_info)
 
 def unregister():
+    global active_take
     stop_receiving()
+    active_take = None
+    for timer in (process_data, update_debug_info):
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
     
     # Remove custom properties
     props_to_remove = [
-        'udp_ip', 'udp_port', 'fpc_receiving', 'fpc_active_armature',
+        'udp_ip', 'udp_port', 'fpc_receiving', 'fpc_take_recording', 'fpc_rcvbuf_kb', 'fpc_queue_size',
+        'fpc_transport', 'fpc_shm_name',
+        'fpc_control_ip', 'fpc_control_port', 'fpc_subscribe', 'fpc_subscribe_rate',
+        'fpc_active_armature',
         'fpc_debug_show', 'fpc_debug_data', 'fpc_record_file', 
-        'fpc_record_start_frame', 'fpc_recording_playing'
+        'fpc_record_start_frame', 'fpc_recording_playing', 'fpc_playback_follow_frame', 'fpc_bake_smooth',
+        'fpc_bake_smooth_cutoff', 'fpc_bake_smooth_order', 'fpc_bake_smooth_window',
+        'fpc_bake_smooth_polyorder', 'fpc_bake_smooth_alpha', 'fpc_bake_smooth_groups',
+        'fpc_bake_reduce', 'fpc_bake_tolerance', 'fpc_bake_head_tolerance'
     ]
     
-    # Remove control properties
-    for prop in control_props.keys():
+    # Remove control properties (registered for every entry in controls)
+    for prop in controls:
         prop_name = f'fpc_enable_{prop}'
         if hasattr(bpy.types.Scene, prop_name):
             delattr(bpy.types.Scene, prop_name)
     
+    props_to_remove += [f'fpc_bake_{group}_{key}' for group in BAKE_GROUPS
+                        for key in ('smooth',) + BAKE_SMOOTH_PARAMS]
     for prop in props_to_remove:
         if hasattr(bpy.types.Scene, prop):
             delattr(bpy.types.Scene, prop)
@@ -5,10 +5,24 @@ CONFIG_FILE = 'config.yaml'
 
 DEFAULT_CONFIG = {
     'hardware_acceleration': {
-        'enable': True,
+        'enable': 'auto',
         'opencl': True,
         'backend': 'auto'
     },
+    'detector': {
+        'backend': 'legacy',
+        'model_path': 'face_landmarker.task',
+        'running_mode': 'live_stream',
+        'delegate': 'cpu',
+        'head_pose_from_matrix': False
+    },
+    'motion_gate': {
+        'enable': False,
+        'threshold': 2.0,
+        'refresh_interval': 15,
+        'size': 32,
+        'margin': 0.15
+    },
     'smoothing': {
         'enable': True,
         'head': 0.8,
@@ -18,6 +32,32 @@ DEFAULT_CONFIG = {
         'brows': 0.5,
         'teeth': 0.4
     },
+    'kalman': {
+        'enable': False,
+        'latency': 'auto',
+        'latency_extra': 0.02,
+        'max_horizon': 0.15,
+        'reset_gap': 0.5,
+        'groups': {
+            'head': {'noise': 0.5, 'accel': 40.0},
+            'eyelids': {'noise': 0.02, 'accel': 40.0},
+            'pupils': {'noise': 0.003, 'accel': 0.5},
+            'mouth': {'noise': 0.01, 'accel': 20.0},
+            'brows': {'noise': 0.01, 'accel': 5.0},
+            'teeth': {'noise': 0.01, 'accel': 20.0}
+        }
+    },
+    'offline_smoothing': {
+        'method': 'butterworth',
+        'cutoff': 8.0,
+        'order': 2,
+        'window': 9,
+        'polyorder': 2,
+        'channels': {
+            'head': {'cutoff': 5.0},
+            'pupils': {'method': 'savgol', 'window': 7}
+        }
+    },
     'calibration': {
         'file': 'calibration.json',
         'ref_points': [33, 263]
@@ -29,7 +69,8 @@ DEFAULT_CONFIG = {
     'recording': {
         'fps': 30,
         'output_dir': 'recordings',
-        'auto_timestamp': True
+        'auto_timestamp': True,
+        'landmarks': False
     },
     'preview': {
         'fps': 30,
@@ -38,7 +79,39 @@ DEFAULT_CONFIG = {
     'camera': {
         'width': 'auto',
         'height': 'auto',
-        'preferred_format': 'MJPG'
+        'preferred_format': 'MJPG',
+        'mjpeg_decode': {
+            'enable': False,
+            'workers': 2,
+            'scale': 1
+        }
+    },
+    'control': {
+        'enable': True,
+        'ip': '127.0.0.1',
+        'port': 12346
+    },
+    'network': {
+        'transport': 'udp',
+        'shm': {
+            'name': 'fpc_features',
+            'capacity': 256
+        },
+        'sndbuf': 0,
+        'destinations': [],
+        'delta': {
+            'enable': False,
+            'keyframe_interval': 30,
+            'heartbeat_interval': 10,
+            'thresholds': {
+                'head': 0.05,
+                'eyelids': 0.005,
+                'pupils': 0.0005,
+                'mouth': 0.002,
+                'brows': 0.005,
+                'teeth': 0.005
+            }
+        }
     }
 }
 
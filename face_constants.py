@@ -100,4 +100,88 @@ MODEL_POINTS = np.array([
     [173, 425, 108],
     [360, 574, 128],
     [391, 425, 108]
-], dtype=np.float64)
\ No newline at end of file
+], dtype=np.float64)
+# --------------------------
+# 特征通道定义 (发送/平滑/录制共用)
+# --------------------------
+FEATURE_CHANNELS = [
+    'head_pitch', 'head_yaw', 'head_roll',
+    'mouth_open', 'mouth_width',
+    'left_eyelid', 'right_eyelid',
+    'left_pupil_x', 'left_pupil_y',
+    'right_pupil_x', 'right_pupil_y',
+    'left_brow', 'right_brow',
+    'teeth_open'
+]
+
+def feature_group(key):
+    """返回特征通道所属的分组名 (与 smoothing 配置键一致)"""
+    if 'pupil' in key:
+        return 'pupils'
+    if key.endswith('_eyelid'):
+        return 'eyelids'
+    if key.startswith('head'):
+        return 'head'
+    if 'mouth' in key:
+        return 'mouth'
+    if 'brow' in key:
+        return 'brows'
+    if 'teeth' in key:
+        return 'teeth'
+    return None
+
+CHANNEL_INDEX = {name: i for i, name in enumerate(FEATURE_CHANNELS)}
+
+class FeatureFrame:
+    """固定通道表的特征帧: 按 FEATURE_CHANNELS 顺序存放在一个 float64 数组中
+
+    支持按通道名读写和 items()/get() 等映射接口, 只在 JSON 等边界处转换为字典
+    """
+    __slots__ = ('values',)
+
+    def __init__(self, values=None):
+        self.values = np.zeros(len(FEATURE_CHANNELS)) if values is None else values
+
+    @classmethod
+    def from_mapping(cls, data):
+        """由字典构造, 不在通道表中的键被忽略, 缺失的通道为 0"""
+        frame = cls()
+        frame.update(data)
+        return frame
+
+    def __getitem__(self, key):
+        return float(self.values[CHANNEL_INDEX[key]])
+
+    def __setitem__(self, key, value):
+        self.values[CHANNEL_INDEX[key]] = value
+
+    def __contains__(self, key):
+        return key in CHANNEL_INDEX
+
+    def __iter__(self):
+        return iter(FEATURE_CHANNELS)
+
+    def __len__(self):
+        return len(FEATURE_CHANNELS)
+
+    def get(self, key, default=None):
+        i = CHANNEL_INDEX.get(key)
+        return default if i is None else float(self.values[i])
+
+    def update(self, data):
+        for key, value in data.items():
+            i = CHANNEL_INDEX.get(key)
+            if i is not None:
+                self.values[i] = value
+
+    def keys(self):
+        return FEATURE_CHANNELS
+
+    def items(self):
+        return zip(FEATURE_CHANNELS, self.values.tolist())
+
+    def copy(self):
+        return FeatureFrame(self.values.copy())
+
+    def to_dict(self):
+        return dict(zip(FEATURE_CHANNELS, self.values.tolist()))
@@ -1,15 +1,19 @@
 import argparse
 import cv2
-import mediapipe as mp
 import time
 import traceback
 from config.settings import CONFIG
+from face_constants import FeatureFrame
 from utils.camera import CameraManager
-from models.face_utils import calculate_features, draw_preview, save_calibration, save_head_calibration
-from utils.network import UDPTransmitter
-from models.smoother import FeatureSmoother
-from utils.recording import Recorder
+from models.face_utils import calculate_features, draw_preview, save_calibration, save_head_calibration, landmarks_to_array, head_rotator
+from models.detector import create_detector
+from models.motion_gate import MotionGate
+from utils.network import UDPTransmitter, SharedMemoryTransmitter
+from models.smoother import FeatureSmoother, KalmanPredictor
+from utils.recording import Recorder, LandmarkRecorder
 from utils.hw_check import print_hw_info
+from utils.control import ControlServer
+from utils.profiling import PipelineProfiler, NullProfiler
 
 print_hw_info()
 
@@ -20,85 +24,188 @@ def parse_args():
     parser.add_argument('--udp_port', type=int, default=12345, help='UDP port')
     parser.add_argument('--preview', action='store_true', help='Enable Live Preview')
     parser.add_argument('--no_smooth', action='store_true', help='Disable Smoothing')
+    parser.add_argument('--predict', action='store_true', help='Use Kalman smoothing with latency prediction')
     parser.add_argument('--record_fps', type=float, default=None, help='Override recording FPS')
+    parser.add_argument('--motion_gate', action='store_true', help='Skip inference on static frames and reuse landmarks')
+    parser.add_argument('--record_landmarks', action='store_true', help='Also record raw landmarks (.npy) while recording')
+    parser.add_argument('--dest', action='append', default=None, metavar='IP:PORT', help='Additional UDP destination (repeatable)')
+    parser.add_argument('--transport', choices=('udp', 'shm'), default=None, help='udp (default) or shm (same-host shared memory)')
+    parser.add_argument('--delta', action='store_true', help='Send only changed channels (dead-band delta encoding)')
+    parser.add_argument('--control_port', type=int, default=None, help='Local control port (0 to disable)')
+    parser.add_argument('--profile', type=float, default=None, metavar='SECONDS', help='Profile the pipeline for N seconds, then exit')
+    parser.add_argument('--profile_dir', type=str, default='profiles', help='Output directory for profile results')
     parser.add_argument('--camera_config', type=str, default=None, help='Custom camera config file')
     return parser.parse_args()
 
-class FaceMeshDetector:
-    def __init__(self):
-        self.face_mesh = mp.solutions.face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-    
-    def close(self):  # 添加的 close 方法
-        self.face_mesh.close()
-    
-    def __enter__(self):
-        return self
-    
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()  # 调用 close 方法
-
-    def process(self, frame):
-        if CONFIG['hardware_acceleration']['enable']:
-            frame_umat = cv2.UMat(frame)
-            rgb = cv2.cvtColor(frame_umat, cv2.COLOR_BGR2RGB)
-            rgb = cv2.UMat.get(rgb)
-        else:
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        return self.face_mesh.process(rgb)
+# 预览窗口快捷键与控制命令的映射
+KEY_COMMANDS = {
+    27: 'shutdown',  # ESC
+    ord('c'): 'calibrate_face',
+    ord('h'): 'calibrate_head',
+    ord('r'): 'record_toggle',
+}
 
 def main():
     args = parse_args()
     
-    camera, detector, transmitter, smoother, recorder = None, None, None, None, None
+    camera, detector, transmitter, smoother, recorder, control = None, None, None, None, None, None
+    landmark_recorder, gate = None, None
+    profiler = NullProfiler()
     recording = False  # 新增录制状态标志
+    record_landmarks = args.record_landmarks or CONFIG['recording'].get('landmarks', False)
+    running = True
+    raw_features = None  # 最近一帧的原始特征 (用于校准)
+    base_features = FeatureFrame()  # 每帧复用, 特征直接写入其数组
+
+    def handle_command(cmd):
+        """执行快捷键或控制通道发来的命令"""
+        nonlocal recording, recorder, landmark_recorder, running
+        if cmd == 'shutdown':
+            running = False
+        elif cmd in ('calibrate_face', 'calibrate_head'):
+            if raw_features is None:
+                print("No face detected yet, calibration skipped")
+            elif cmd == 'calibrate_face':  # 面部校准
+                save_calibration(raw_features)
+            else:  # 头部校准
+                save_head_calibration(raw_features)
+        elif cmd == 'record_toggle':
+            handle_command('record_stop' if recording else 'record_start')
+        elif cmd == 'record_start' and not recording:
+            # 开始录制
+            recorder = Recorder(fps=args.record_fps)
+            if record_landmarks:
+                landmark_recorder = LandmarkRecorder(recorder.output_path, (camera.width, camera.height),
+                                                     start_time=recorder.recording_start_time)
+            recording = True
+            print("Recording started")
+        elif cmd == 'record_stop' and recording:
+            # 停止录制
+            recording = False
+            recorder.close()
+            recorder = None
+            if landmark_recorder:
+                landmark_recorder.close()
+                landmark_recorder = None
+            print("Recording stopped")
     
+    def handle_subscribe(msg, addr):
+        """接收端通过控制通道订阅通道与频率, 地址为 (控制消息来源 IP, 接收端口)"""
+        if not isinstance(transmitter, UDPTransmitter):
+            print("Subscriptions are only supported by the UDP transport")
+            return
+        channels = msg.get('channels')
+        try:
+            port = int(msg.get('port', 0))
+            rate = float(msg.get('rate') or 0)
+            if channels is not None and not (isinstance(channels, list) and all(isinstance(c, str) for c in channels)):
+                raise TypeError
+        except (TypeError, ValueError):
+            print(f"Invalid subscription from {addr[0]}: {msg}")
+            return
+        transmitter.subscribe((addr[0], port), channels, rate)
+
     try:
         camera = CameraManager(args.input)
-        detector = FaceMeshDetector()
-        transmitter = UDPTransmitter(args.udp_ip, args.udp_port)
+        detector = create_detector()
+        head_from_matrix = CONFIG.get('detector', {}).get('head_pose_from_matrix', False)
+        if args.motion_gate or CONFIG.get('motion_gate', {}).get('enable', False):
+            gate = MotionGate()
+        transport = args.transport or CONFIG['network'].get('transport', 'udp')
+        if transport == 'shm':
+            transmitter = SharedMemoryTransmitter()
+        else:
+            transmitter = UDPTransmitter(args.udp_ip, args.udp_port, delta=True if args.delta else None,
+                                         destinations=args.dest)
+
+        control_cfg = CONFIG.get('control', {})
+        control_port = control_cfg.get('port', 12346) if args.control_port is None else args.control_port
+        if control_cfg.get('enable', True) and control_port:
+            control = ControlServer(control_cfg.get('ip', '127.0.0.1'), control_port)
         
         if not args.no_smooth:
-            smoother = FeatureSmoother()
+            if args.predict or CONFIG.get('kalman', {}).get('enable', False):
+                smoother = KalmanPredictor()
+            else:
+                smoother = FeatureSmoother()
         
         print(f"Camera initialized: {camera.width}x{camera.height}")
         
         last_send = 0
+        last_lm = None
         frame_counter = 0
         start_time = time.time()
+        if args.profile:
+            profiler = PipelineProfiler(args.profile, args.profile_dir)
         
-        while True:
+        while running and not profiler.expired:
+            profiler.next_frame()
+            if control:
+                for msg, addr in control.poll():
+                    if msg['cmd'] == 'subscribe':
+                        handle_subscribe(msg, addr)
+                    else:
+                        handle_command(msg['cmd'])
+                if not running:
+                    break
+
+            profiler.stage('capture')
             frame = camera.read_frame()
+            frame_time = camera.frame_time  # 并行解码时早于当前时间 (排队中的帧)
             if frame is None: 
                 print("End of video stream")
                 break
 
-            res = detector.process(frame)
-            if not res.multi_face_landmarks: 
+            # 运动门控: 画面静止时复用上次的关键点, 跳过推理
+            profiler.stage('inference')
+            # should_skip 每帧都调用 (计入 skip_ratio); 只有推理得到过关键点后才会返回 True
+            gated = gate is not None and gate.should_skip(frame)
+            if gated:
+                lm = last_lm
+            else:
+                profiler.stage('convert')
+                rgb = detector.convert(frame)
+                profiler.stage('inference')
+                lm = detector.process(frame, frame_time, rgb=rgb)
+                # 异步检测器返回的是更早一帧的结果, 平滑/预测和关键点录制使用该帧的采集时间
+                frame_time = detector.result_time or frame_time
+                if gate:
+                    gate.update(frame, lm)
+            if lm is None: 
                 if args.preview:
                     cv2.imshow('Preview', frame)
                 continue
 
-            lm = res.multi_face_landmarks[0].landmark
-            features, raw_features = calculate_features(lm, frame.shape)
+            # 异步检测器在新结果到达前返回同一对象, 不重复计算和发送
+            if lm is not last_lm or gated:
+                if lm is not last_lm:
+                    profiler.stage('features')
+                    last_lm = lm
+                    _, raw_features = calculate_features(lm, frame.shape, out=base_features)
+                    if head_from_matrix and detector.transform_matrix is not None:
+                        head_features, head_raw = head_rotator.calculate_from_matrix(detector.transform_matrix)
+                        base_features.update(head_features)
+                        raw_features.update(head_raw)
 
-            if smoother:
-                features = smoother.apply(features)
+                profiler.stage('smoothing')
+                features = smoother.apply(base_features, frame_time) if smoother else base_features
 
-            current_time = time.time()
-            if current_time - last_send > 1/CONFIG['preview']['fps']:
-                transmitter.send(features)
-                last_send = current_time
+                profiler.stage('send')
+                current_time = time.time()
+                if current_time - last_send > 1/CONFIG['preview']['fps']:
+                    transmitter.send(features, frame_time)
+                    last_send = current_time
 
-            # 录制处理 - 如果正在录制则记录数据
-            if recording and recorder:
-                recorder.record(features)
+                # 录制处理 - 如果正在录制则记录数据
+                profiler.stage('record')
+                if recording and recorder:
+                    recorder.record(features)
+                if recording and landmark_recorder and not gated:
+                    # 门控帧复用的是旧关键点, 不写入重复的行
+                    landmark_recorder.record(landmarks_to_array(lm), frame_time)
 
             if args.preview:
+                profiler.stage('preview')
                 preview_img = frame.copy()
                 preview_img = draw_preview(preview_img, features, lm)
                 
@@ -119,33 +226,24 @@ def main():
                 
                 cv2.imshow('Preview', preview_img)
                 key = cv2.waitKey(1)
-                if key == 27:  # ESC
-                    break
-                elif key == ord('c'):  # 面部校准
-                    save_calibration(raw_features)
-                elif key == ord('h'):  # 头部校准
-                    save_head_calibration(raw_features)
-                elif key == ord('r'):  # 录制开关
-                    if not recording:
-                        # 开始录制
-                        recorder = Recorder(fps=args.record_fps)
-                        recording = True
-                        print("Recording started")
-                    else:
-                        # 停止录制
-                        recording = False
-                        recorder.close()
-                        recorder = None
-                        print("Recording stopped")
+                if key in KEY_COMMANDS:
+                    handle_command(KEY_COMMANDS[key])
     
     except Exception as e:
         print(f"Fatal error: {str(e)}")
         traceback.print_exc()
     
     finally:
+        profiler.stop()
+        if gate:
+            print(f"Motion gate skipped {gate.skip_ratio:.1%} of frames")
         # 确保录制被正确关闭
         if recording and recorder:
             recorder.close()
+        if landmark_recorder:
+            landmark_recorder.close()
+        if control:
+            control.close()
         if transmitter:
             transmitter.close()
         if detector:
@@ -0,0 +1,157 @@
+import threading
+import time
+import cv2
+import numpy as np
+import mediapipe as mp
+from config.settings import CONFIG
+
+def to_rgb(frame, dst=None):
+    """BGR -> RGB, CPU 路径写入复用的 dst; OpenCL 仅在启动基准判定更快时使用"""
+    if CONFIG['hardware_acceleration']['enable'] is True:
+        frame_umat = cv2.UMat(frame)
+        rgb = cv2.cvtColor(frame_umat, cv2.COLOR_BGR2RGB)
+        return cv2.UMat.get(rgb)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=dst)
+
+class FaceMeshDetector:
+    """旧版 mp.solutions.face_mesh 同步检测"""
+    def __init__(self):
+        self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+        self.transform_matrix = None  # 旧版API不提供变换矩阵
+        self.result_time = None  # 返回的关键点对应帧的采集时间 (同步检测即当前帧)
+        self._rgb = None
+
+    def close(self):  # 添加的 close 方法
+        self.face_mesh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()  # 调用 close 方法
+
+    def convert(self, frame):
+        """BGR 帧转为检测输入 (写入复用缓冲区); 主循环单独计入 convert 阶段"""
+        self._rgb = to_rgb(frame, self._rgb)
+        return self._rgb
+
+    def process(self, frame, frame_time=None, rgb=None):
+        """返回关键点列表, 未检测到人脸时返回 None; frame_time 为帧采集时间, rgb 为 convert() 的结果"""
+        self.result_time = frame_time
+        res = self.face_mesh.process(self.convert(frame) if rgb is None else rgb)
+        if not res.multi_face_landmarks:
+            return None
+        return res.multi_face_landmarks[0].landmark
+
+class FaceLandmarkerDetector:
+    """MediaPipe Tasks FaceLandmarker, 支持 LIVE_STREAM 异步模式
+
+    异步模式下 process() 提交当前帧后立即返回最近一次完成的结果,
+    推理与采集并行; 同一结果在新结果到达前返回同一个对象。
+    result_time 为该结果对应帧的采集时间 (异步模式下早于当前帧)。
+    """
+    def __init__(self, cfg=None):
+        from mediapipe.tasks.python import BaseOptions
+        from mediapipe.tasks.python import vision
+
+        cfg = CONFIG.get('detector', {}) if cfg is None else cfg
+        mode_name = str(cfg.get('running_mode', 'live_stream')).upper()
+        self.mode = getattr(vision.RunningMode, mode_name)
+        delegate = getattr(BaseOptions.Delegate, str(cfg.get('delegate', 'cpu')).upper())
+
+        options = vision.FaceLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=cfg.get('model_path', 'face_landmarker.task'),
+                                     delegate=delegate),
+            running_mode=self.mode,
+            num_faces=1,
+            min_face_detection_confidence=0.5,
+            min_face_presence_confidence=0.5,
+            min_tracking_confidence=0.5,
+            output_facial_transformation_matrixes=True,
+            result_callback=self._on_result if self.mode == vision.RunningMode.LIVE_STREAM else None
+        )
+        self.landmarker = vision.FaceLandmarker.create_from_options(options)
+        self.live_stream = self.mode == vision.RunningMode.LIVE_STREAM
+        self.video = self.mode == vision.RunningMode.VIDEO
+        self.lock = threading.Lock()
+        self._latest = (None, None, None)  # (landmarks, transform_matrix, 采集时间), 由回调线程更新
+        self._submitted = {}  # Tasks 时间戳(毫秒) -> 帧采集时间, 等待回调
+        self.transform_matrix = None
+        self.result_time = None
+        self.last_timestamp = -1
+        self._rgb = None  # mp.Image 会复制数据, 转换缓冲区可复用
+        print(f"FaceLandmarker backend ({mode_name.lower()}, {delegate.name.lower()})")
+
+    def close(self):
+        self.landmarker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _next_timestamp(self):
+        # Tasks API 要求时间戳(毫秒)严格递增
+        self.last_timestamp = max(int(time.monotonic() * 1000), self.last_timestamp + 1)
+        return self.last_timestamp
+
+    def _store(self, result, timestamp_ms=None, frame_time=None):
+        if result.face_landmarks:
+            matrices = result.facial_transformation_matrixes
+            landmarks = result.face_landmarks[0]
+            matrix = np.asarray(matrices[0]) if matrices else None
+        else:
+            landmarks, matrix = None, None
+        with self.lock:
+            if timestamp_ms is not None:
+                # 取出该结果对应帧的采集时间, 丢弃被跳过的更早的帧
+                frame_time = self._submitted.pop(timestamp_ms, None)
+                for ts in [ts for ts in self._submitted if ts < timestamp_ms]:
+                    del self._submitted[ts]
+            self._latest = (landmarks, matrix, frame_time)
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        """LIVE_STREAM 回调 (在 MediaPipe 线程中执行)"""
+        self._store(result, timestamp_ms)
+
+    def convert(self, frame):
+        """BGR 帧转为检测输入 (写入复用缓冲区); 主循环单独计入 convert 阶段"""
+        self._rgb = to_rgb(frame, self._rgb)
+        return self._rgb
+
+    def process(self, frame, frame_time=None, rgb=None):
+        """返回关键点列表 (异步模式下为最近完成的结果), 未检测到人脸时返回 None
+
+        frame_time 为帧采集时间 (time.time()), 结果对应帧的采集时间见 result_time;
+        rgb 为已由 convert() 转换的帧
+        """
+        frame_time = time.time() if frame_time is None else frame_time
+        rgb = self.convert(frame) if rgb is None else rgb
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+        timestamp = self._next_timestamp()
+        if self.live_stream:
+            with self.lock:
+                self._submitted[timestamp] = frame_time
+            self.landmarker.detect_async(image, timestamp)
+        elif self.video:
+            self._store(self.landmarker.detect_for_video(image, timestamp), frame_time=frame_time)
+        else:
+            self._store(self.landmarker.detect(image), frame_time=frame_time)
+        with self.lock:
+            landmarks, self.transform_matrix, self.result_time = self._latest
+        return landmarks
+
+def create_detector():
+    """按 config.yaml 中 detector.backend 创建检测器"""
+    backend = CONFIG.get('detector', {}).get('backend', 'legacy')
+    if backend == 'tasks':
+        return FaceLandmarkerDetector()
+    if backend != 'legacy':
+        print(f"Unknown detector backend '{backend}', using legacy FaceMesh")
+    return FaceMeshDetector()
@@ -3,14 +3,16 @@ import cv2
 import numpy as np
 import math
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 class HeadRotationCalculator:
     def __init__(self):
         self.calib_points = CONFIG['head_calibration']['calib_points']
     
-    def calculate_head_rotation(self, lm, frame_shape):
-        features = {}
-        raw_features = {}
+    def calculate_head_rotation(self, lm, frame_shape, features=None, raw_features=None):
+        features = {} if features is None else features
+        raw_features = {} if raw_features is None else raw_features
         try:
             h, w = frame_shape[:2]
             image_points = np.array([
@@ -59,6 +61,26 @@ class HeadRotationCalculator:
             
         return features, raw_features
 
+    def calculate_from_matrix(self, matrix):
+        """由 FaceLandmarker 的面部变换矩阵 (4x4) 计算头部姿态
+
+        矩阵定义在 MediaPipe 规范人脸坐标系 (y 轴向上), 与 solvePnP 的模型点不同,
+        切换后需要重新进行头部校准
+        """
+        euler = self._rotation_matrix_to_euler(np.asarray(matrix)[:3, :3])
+        head_calib = get_head_calib()
+        raw_features = {
+            '_raw_head_pitch': euler[0],
+            '_raw_head_yaw': -euler[1],
+            '_raw_head_roll': -euler[2]
+        }
+        features = {
+            'head_pitch': raw_features['_raw_head_pitch'] - head_calib.get('pitch', 0),
+            'head_yaw': raw_features['_raw_head_yaw'] - head_calib.get('yaw', 0),
+            'head_roll': raw_features['_raw_head_roll'] - head_calib.get('roll', 0)
+        }
+        return features, raw_features
+
     def _rotation_matrix_to_euler(self, R):
         x = math.atan2(R[2,1], R[2,2])
         y = math.atan2(-R[2,0], math.hypot(R[0,0], R[1,0]))
@@ -68,8 +90,9 @@ class HeadRotationCalculator:
 # 模块级组件
 head_rotator = HeadRotationCalculator()
 
-def calculate_mouth_features(lm):
-    features, raw_features = {}, {}
+def calculate_mouth_features(lm, features=None, raw_features=None):
+    features = {} if features is None else features
+    raw_features = {} if raw_features is None else raw_features
     
     # 眼睛外角作为参考距离
     ref_dist = math.hypot(
@@ -91,8 +114,9 @@ def calculate_mouth_features(lm):
     
     return features, raw_features
 
-def calculate_eye_features(lm):
-    features, raw_features = {}, {}
+def calculate_eye_features(lm, features=None, raw_features=None):
+    features = {} if features is None else features
+    raw_features = {} if raw_features is None else raw_features
     # 眼睛开合
     for side, up_ids, down_ids in (('left', LEFT_EYE_UP, LEFT_EYE_DOWN),
                                   ('right', RIGHT_EYE_UP, RIGHT_EYE_DOWN)):
@@ -131,8 +155,9 @@ def calculate_eye_features(lm):
         
     return features, raw_features
 
-def calculate_eyebrow_features(lm):
-    features, raw_features = {}, {}
+def calculate_eyebrow_features(lm, features=None, raw_features=None):
+    features = {} if features is None else features
+    raw_features = {} if raw_features is None else raw_features
     # 计算眉毛高度
     for side, brow_ids in (('left', LEFT_BROW_IDS), ('right', RIGHT_BROW_IDS)):
         brow_y = sum(lm[i].y for i in brow_ids)/len(brow_ids)
@@ -143,8 +168,9 @@ def calculate_eyebrow_features(lm):
         
     return features, raw_features
 
-def calculate_teeth_features(lm):
-    features, raw_features = {}, {}
+def calculate_teeth_features(lm, features=None, raw_features=None):
+    features = {} if features is None else features
+    raw_features = {} if raw_features is None else raw_features
     # 计算牙齿开合
     nose_tip = lm[NOSE_TIP]
     chin = lm[CHIN]
@@ -167,26 +193,139 @@ def calculate_teeth_features(lm):
     
     return features, raw_features
 
-def calculate_features(lm, frame_shape):
-    features, raw_features = {}, {}
-    
-    # 并行计算不同特征
-    results = [
-        calculate_mouth_features(lm),
-        calculate_eye_features(lm),
-        calculate_eyebrow_features(lm),
-        calculate_teeth_features(lm),
-        head_rotator.calculate_head_rotation(lm, frame_shape)
-    ]
-    
-    # 合并结果
-    for result in results:
-        features.update(result[0])
-        raw_features.update(result[1])
-    
-    # 返回前清理 features
-    features_clean = {k: v for k, v in features.items() if not k.startswith('_raw_')}
-    return features_clean, raw_features
+def calculate_features(lm, frame_shape, out=None):
+    """计算一帧特征, 返回 (FeatureFrame, 原始值字典 (用于校准))
+
+    各部分直接写入同一个 FeatureFrame; 传入 out 可复用预分配的帧
+    """
+    features = FeatureFrame() if out is None else out
+    raw_features = {}
+    calculate_mouth_features(lm, features, raw_features)
+    calculate_eye_features(lm, features, raw_features)
+    calculate_eyebrow_features(lm, features, raw_features)
+    calculate_teeth_features(lm, features, raw_features)
+    head_rotator.calculate_head_rotation(lm, frame_shape, features, raw_features)
+    return features, raw_features
+
+def _rotation_vectors_to_euler(rvecs):
+    """批量 Rodrigues 向量 (N, 3) -> 欧拉角 (N, 3, 角度), 与 _rotation_matrix_to_euler 一致"""
+    theta = np.linalg.norm(rvecs, axis=1)
+    safe = np.where(theta < 1e-12, 1.0, theta)
+    kx, ky, kz = (rvecs / safe[:, None]).T
+    s, c = np.sin(theta), np.cos(theta)
+    v = 1 - c
+    r00 = c + kx * kx * v
+    r10 = kz * s + kx * ky * v
+    r20 = -ky * s + kx * kz * v
+    r21 = kx * s + ky * kz * v
+    r22 = c + kz * kz * v
+    x = np.arctan2(r21, r22)
+    y = np.arctan2(-r20, np.hypot(r00, r10))
+    z = np.arctan2(r10, r00)
+    return np.degrees(np.stack([x, y, z], axis=1))
+
+def calculate_head_rotation_batch(landmarks, frame_size, workers=None):
+    """批量头部姿态 (原始值, 未校准), 返回 (N, 3): pitch, yaw, roll"""
+    w, h = frame_size
+    calib_points = head_rotator.calib_points
+    image_points = np.ascontiguousarray(landmarks[:, calib_points, :2] * (w, h), dtype=np.float64)
+    focal_length = w * 1.5
+    camera_matrix = np.array([
+        [focal_length, 0, w/2],
+        [0, focal_length, h/2],
+        [0, 0, 1]
+    ], dtype=np.float64)
+    model_points = MODEL_POINTS[:len(calib_points)]
+
+    # solvePnP 无法向量化: 分块交给线程池 (OpenCV 调用期间释放 GIL), 其余部分批量计算
+    rvecs = np.zeros((len(landmarks), 3))
+    valid = np.ones(len(landmarks), dtype=bool)
+
+    def solve(start, stop):
+        for i in range(start, stop):
+            try:
+                _, rvec, _ = cv2.solvePnP(model_points, image_points[i], camera_matrix, None,
+                                          flags=cv2.SOLVEPNP_ITERATIVE)
+                rvecs[i] = rvec.ravel()
+            except cv2.error:
+                valid[i] = False
+
+    workers = workers or os.cpu_count() or 1
+    chunk = max(256, -(-len(landmarks) // workers))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(solve, i, min(i + chunk, len(landmarks)))
+                       for i in range(0, len(landmarks), chunk)]:
+            future.result()
+
+    euler = _rotation_vectors_to_euler(rvecs)
+    raw = np.stack([-euler[:, 0], -euler[:, 1], euler[:, 2]], axis=1)
+    raw[~valid] = 0
+    return raw
+
+def calculate_features_batch(landmarks, frame_size, calib=None, head_calib=None, workers=None):
+    """批量计算特征
+
+    landmarks: (N, 478, 3) 数组 (例如 load_landmarks 的结果); frame_size: (宽, 高)
+    calib / head_calib: 校准数据, 默认读取当前校准文件; workers: 头部姿态求解线程数
+    返回 (N, len(FEATURE_CHANNELS)) 的 float64 数组, 通道顺序同 FEATURE_CHANNELS
+    """
+    lm = np.asarray(landmarks, dtype=np.float64)
+    calib = get_calib() if calib is None else calib
+    head_calib = get_head_calib() if head_calib is None else head_calib
+    x, y = lm[..., 0], lm[..., 1]
+    out = np.empty((len(lm), len(FEATURE_CHANNELS)))
+    col = {name: i for i, name in enumerate(FEATURE_CHANNELS)}
+
+    def dist(a, b):
+        return np.hypot(x[:, a] - x[:, b], y[:, a] - y[:, b])
+
+    def calibrated(raw, key):
+        # 与单帧版本一致: 缺少校准值时结果为 0
+        return raw - calib[key] if key in calib else np.zeros_like(raw)
+
+    # 嘴巴
+    raw_mw = dist(LEFT_LIP_CORNER, RIGHT_LIP_CORNER) / dist(LEFT_EYE_OUTER, RIGHT_EYE_OUTER)
+    out[:, col['mouth_width']] = calibrated(raw_mw, 'mouth_width')
+    out[:, col['mouth_open']] = np.maximum((y[:, LIPS_DOWN[0]] - y[:, LIPS_UP[0]]) * 5, 0)
+
+    # 眼睛开合与瞳孔
+    for side, up_ids, down_ids, inner, outer, pupil_ids in (
+            ('left', LEFT_EYE_UP, LEFT_EYE_DOWN, LEFT_EYE_INNER, LEFT_EYE_OUTER, LEFT_PUPIL_IDS),
+            ('right', RIGHT_EYE_UP, RIGHT_EYE_DOWN, RIGHT_EYE_INNER, RIGHT_EYE_OUTER, RIGHT_PUPIL_IDS)):
+        raw = (y[:, down_ids].mean(axis=1) - y[:, up_ids].mean(axis=1)) * 10
+        out[:, col[f'{side}_eyelid']] = np.clip(raw, 0, 1)
+
+        eye_width = x[:, outer] - x[:, inner]
+        eye_height = y[:, down_ids[0]] - y[:, up_ids[0]]
+        eye_width = np.where(np.abs(eye_width) < 1e-4, 1e-4, eye_width)
+        eye_height = np.where(np.abs(eye_height) < 1e-4, 1e-4, eye_height)
+        pupil_x = x[:, pupil_ids].mean(axis=1)
+        pupil_y = y[:, pupil_ids].mean(axis=1)
+        out[:, col[f'{side}_pupil_x']] = ((pupil_x - x[:, inner]) / eye_width - 0.5) * 0.1
+        out[:, col[f'{side}_pupil_y']] = ((pupil_y - y[:, up_ids[0]]) / eye_height - 0.5) * 0.1
+
+    # 眉毛
+    for side, brow_ids in (('left', LEFT_BROW_IDS), ('right', RIGHT_BROW_IDS)):
+        raw_brow = (y[:, NOSE_TIP] - y[:, brow_ids].mean(axis=1)) * 10
+        out[:, col[f'{side}_brow']] = calibrated(raw_brow, f'brow_{side}')
+
+    # 牙齿
+    ref_a, ref_b = CONFIG['calibration']['ref_points'][:2]
+    vertical_dist = np.abs(y[:, CHIN] - y[:, NOSE_TIP])
+    lower_lip_dist = np.abs(y[:, MOUTH_LOWER_CENTER] - y[:, NOSE_TIP])
+    raw_teeth = np.maximum((vertical_dist - lower_lip_dist) / dist(ref_a, ref_b) * 5, 0)
+    out[:, col['teeth_open']] = np.maximum(calibrated(raw_teeth, 'teeth_open'), 0)
+
+    # 头部姿态
+    head = calculate_head_rotation_batch(lm, frame_size, workers)
+    for i, (name, key) in enumerate((('head_pitch', 'pitch'), ('head_yaw', 'yaw'), ('head_roll', 'roll'))):
+        out[:, col[name]] = head[:, i] - head_calib.get(key, 0)
+
+    return out
+
+def landmarks_to_array(lm):
+    """将 MediaPipe 关键点列表转换为 (N, 3) float32 数组"""
+    return np.array([(p.x, p.y, p.z) for p in lm], dtype=np.float32)
 
 def save_calibration(raw_features):
     calib_data = {
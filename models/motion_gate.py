@@ -0,0 +1,56 @@
+import cv2
+import numpy as np
+from config.settings import CONFIG
+
+class MotionGate:
+    """帧差门控: 人脸区域几乎不动时跳过推理, 复用上一次的关键点与特征"""
+    def __init__(self):
+        cfg = CONFIG.get('motion_gate', {})
+        self.threshold = cfg.get('threshold', 2.0)  # 平均灰度差 (0-255)
+        self.refresh_interval = cfg.get('refresh_interval', 15)  # 最多连续跳过的帧数
+        self.size = cfg.get('size', 32)  # 比较用的缩略图边长
+        self.margin = cfg.get('margin', 0.15)  # 人脸框外扩比例
+        self.roi = None
+        self.reference = None
+        self.skipped = 0
+        self.frames = 0
+        self.skipped_total = 0
+
+    def _thumbnail(self, frame):
+        x0, y0, x1, y1 = self.roi
+        small = cv2.resize(frame[y0:y1, x0:x1], (self.size, self.size), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def should_skip(self, frame):
+        """与上次推理帧相比变化低于阈值时返回 True (并计数); 每帧调用一次, 尚无参考帧时返回 False"""
+        self.frames += 1
+        if self.reference is None or self.skipped >= self.refresh_interval:
+            return False
+        if cv2.absdiff(self._thumbnail(frame), self.reference).mean() >= self.threshold:
+            return False
+        self.skipped += 1
+        self.skipped_total += 1
+        return True
+
+    def update(self, frame, lm):
+        """记录一次实际推理: 更新人脸区域与参考缩略图"""
+        self.skipped = 0
+        if lm is None:
+            self.reference = None
+            return
+        h, w = frame.shape[:2]
+        xs = np.fromiter((p.x for p in lm), dtype=np.float32, count=len(lm))
+        ys = np.fromiter((p.y for p in lm), dtype=np.float32, count=len(lm))
+        x0, x1, y0, y1 = xs.min(), xs.max(), ys.min(), ys.max()
+        mx, my = (x1 - x0) * self.margin, (y1 - y0) * self.margin
+        x0, x1 = int(max((x0 - mx) * w, 0)), int(min((x1 + mx) * w, w))
+        y0, y1 = int(max((y0 - my) * h, 0)), int(min((y1 + my) * h, h))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            self.reference = None
+            return
+        self.roi = (x0, y0, x1, y1)
+        self.reference = self._thumbnail(frame)
+
+    @property
+    def skip_ratio(self):
+        return self.skipped_total / self.frames if self.frames else 0.0
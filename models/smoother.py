@@ -1,43 +1,134 @@
+import time
+import numpy as np
 from config.settings import CONFIG
+from face_constants import FEATURE_CHANNELS, FeatureFrame, feature_group
+
+FEATURE_KEYS = tuple(FEATURE_CHANNELS)
 
 class FeatureSmoother:
     def __init__(self):
-        self.smoothed = {}
         self.factors = CONFIG['smoothing']
-        
-    def apply(self, features):
+        self.keys = None
+        self.alpha = None
+        self.smoothed = None
+        self.output = FeatureFrame()
+
+    def _set_keys(self, keys, values):
+        """通道集合变化时重建状态: 已有通道保留历史值, 新通道从当前值开始"""
+        previous = {} if self.keys is None else dict(zip(self.keys, self.smoothed.tolist()))
+        # 每个通道的平滑因子（按通道分组, 未知通道 0.5）
+        self.alpha = np.array([self.factors.get(feature_group(key), 0.5) for key in keys])
+        self.smoothed = np.array([previous.get(key, val) for key, val in zip(keys, values.tolist())])
+        self.keys = keys
+
+    def apply(self, features, timestamp=None):
+        """FeatureFrame 输入时返回复用的输出帧 (下次调用前有效); 字典输入返回只含其键的字典"""
+        # timestamp 未使用, 与 KalmanPredictor 保持相同接口
         if not self.factors['enable']:
             return features  # 直接返回原始值
-            
-        output = {}
-        for key, val in features.items():
-            # 移除输入精度处理，直接转为浮点数
-            val = float(val)
-            
-            # 获取平滑因子（保持原有逻辑不变）
-            if 'pupil' in key:
-                alpha = self.factors['pupils']
-            elif key.endswith('_eyelid'):
-                alpha = self.factors['eyelids']
-            elif key.startswith('head'):
-                alpha = self.factors['head']
-            elif 'mouth' in key:
-                alpha = self.factors['mouth']
-            elif 'brow' in key:
-                alpha = self.factors['brows']
-            elif 'teeth' in key:
-                alpha = self.factors['teeth']
-            else:
-                alpha = 0.5
-                
-            # 获取历史值（使用原始精度）
-            prev = self.smoothed.get(key, val)
-            
-            # 执行平滑计算
-            smoothed_val = alpha * prev + (1 - alpha) * val
-            
-            # 更新存储值和输出值（保持原始精度）
-            self.smoothed[key] = smoothed_val
-            output[key] = smoothed_val
-            
-        return output
\ No newline at end of file
+        frame = isinstance(features, FeatureFrame)
+        if frame:
+            keys, val = FEATURE_KEYS, features.values
+        else:
+            keys = tuple(features)
+            val = np.fromiter((float(features[k]) for k in keys), dtype=np.float64, count=len(keys))
+
+        if keys != self.keys:
+            self._set_keys(keys, val)
+        self.smoothed = self.alpha * self.smoothed + (1 - self.alpha) * val  # 首帧即原始值
+        if frame:
+            self.output.values[:] = self.smoothed
+            return self.output
+        return dict(zip(keys, self.smoothed.tolist()))
+
+class KalmanPredictor:
+    """逐通道匀速模型卡尔曼滤波, 平滑的同时按管线延迟向前预测
+
+    状态为 [值, 速度], 用真实帧时间戳计算 dt, 帧率波动时仍然稳定。
+    noise 为测量噪声标准差, accel 为加速度(过程噪声)标准差, 按通道分组配置。
+    """
+    def __init__(self, cfg=None):
+        cfg = CONFIG.get('kalman', {}) if cfg is None else cfg
+        self.latency = cfg.get('latency', 'auto')  # 秒, 或 auto (实测采集到发送的耗时)
+        self.latency_extra = cfg.get('latency_extra', 0.02)  # auto 时额外补偿 (摄像头曝光/网络/渲染)
+        self.max_horizon = cfg.get('max_horizon', 0.15)
+        self.reset_gap = cfg.get('reset_gap', 0.5)  # 间隔超过该值(如丢脸后)重新初始化
+        self.groups = cfg.get('groups', {})
+        self.keys = None
+        self.last_time = None
+        self.measured_latency = 0.0
+        self.output = FeatureFrame()
+
+    def _init_state(self, keys, values):
+        self.keys = keys
+        noise = np.empty(len(keys))
+        accel = np.empty(len(keys))
+        for i, key in enumerate(keys):
+            params = self.groups.get(feature_group(key), {})
+            noise[i] = params.get('noise', 0.01)
+            accel[i] = params.get('accel', 10.0)
+        self.r = noise ** 2
+        self.q = accel ** 2
+        self.x = values.copy()
+        self.v = np.zeros_like(values)
+        # 协方差 [[p00, p01], [p01, p11]]
+        self.p00 = self.r.copy()
+        self.p01 = np.zeros_like(values)
+        self.p11 = self.q * 0.01
+
+    def horizon(self, timestamp, now):
+        """预测提前量 (秒)"""
+        if self.latency != 'auto':
+            return min(float(self.latency), self.max_horizon)
+        self.measured_latency = 0.9 * self.measured_latency + 0.1 * max(now - timestamp, 0.0)
+        return min(self.measured_latency + self.latency_extra, self.max_horizon)
+
+    def apply(self, features, timestamp=None):
+        """features: FeatureFrame 或特征字典, timestamp: 帧采集时间 (time.time())
+
+        FeatureFrame 输入时返回复用的输出帧 (下次调用前有效), 字典输入返回字典
+        """
+        now = time.time()
+        timestamp = now if timestamp is None else timestamp
+        frame = isinstance(features, FeatureFrame)
+        if frame:
+            keys, z = FEATURE_KEYS, features.values
+        else:
+            keys = tuple(features)
+            z = np.fromiter((float(features[k]) for k in keys), dtype=np.float64, count=len(keys))
+
+        dt = None if self.last_time is None else timestamp - self.last_time
+        if keys != self.keys or dt is None or dt > self.reset_gap:
+            self._init_state(keys, z)
+            self.last_time = timestamp
+            predicted = z
+        else:
+            self.last_time = max(self.last_time, timestamp)
+            predicted = self._step(z, max(dt, 0.0), self.horizon(timestamp, now))
+        if frame:
+            self.output.values[:] = predicted
+            return self.output
+        return dict(zip(keys, predicted.tolist()))
+
+    def _step(self, z, dt, horizon):
+        """一次预测+更新 (dt 为 0 时即时间戳重复, 只做测量更新), 返回外推 horizon 秒后的值"""
+        # 预测
+        x = self.x + self.v * dt
+        p00 = self.p00 + dt * (2 * self.p01 + dt * self.p11) + self.q * dt ** 3 / 3
+        p01 = self.p01 + dt * self.p11 + self.q * dt ** 2 / 2
+        p11 = self.p11 + self.q * dt
+
+        # 更新
+        s = p00 + self.r
+        k0 = p00 / s
+        k1 = p01 / s
+        y = z - x
+        self.x = x + k0 * y
+        self.v = self.v + k1 * y
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 = p11 - k1 * p01
+
+        # 速度相对其不确定度不显著时减弱外推, 避免静止时把噪声放大
+        confidence = self.v ** 2 / (self.v ** 2 + self.p11 + 1e-12)
+        return self.x + self.v * confidence * horizon
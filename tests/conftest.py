@@ -0,0 +1,17 @@
+"""测试公用设置: 在仓库根目录下导入模块 (config.yaml 按当前目录读取), 插件经 tools/bpy_stub 导入"""
+import os
+import sys
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+@pytest.fixture(scope='session')
+def addon():
+    """以 bpy 替身导入的 addons 模块"""
+    from tools import bpy_stub
+    bpy_stub.install()
+    import addons
+    return addons
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from face_constants import FEATURE_CHANNELS, feature_group
+from utils.network import UDPTransmitter
+
+THRESHOLDS = {'head': 0.05, 'eyelids': 0.005, 'pupils': 0.0005, 'mouth': 0.002, 'brows': 0.005, 'teeth': 0.005}
+
+@pytest.fixture
+def transmitter():
+    """增量模式的发送端, 发出的包记录在 sent 中而不经过 socket"""
+    transmitter = UDPTransmitter('127.0.0.1', 9, delta=True, destinations=[])
+    transmitter.thresholds = dict(THRESHOLDS)
+    transmitter.keyframe_interval = 30
+    transmitter.heartbeat_interval = 10
+    transmitter.sent = []
+    transmitter.fanout.send = lambda payload, full=None: transmitter.sent.append(payload) or 0
+    yield transmitter
+    transmitter.close()
+
+def random_walk(frames, seed=0):
+    rng = np.random.default_rng(seed)
+    scale = np.array([THRESHOLDS[feature_group(k)] for k in FEATURE_CHANNELS])
+    return np.cumsum(rng.normal(0, 1, (frames, len(FEATURE_CHANNELS))) * scale, axis=0)
+
+def test_round_trip_stays_within_dead_band(addon, transmitter):
+    addon.channel_state.clear()
+    band = np.array([THRESHOLDS[feature_group(k)] for k in FEATURE_CHANNELS])
+    for i, row in enumerate(random_walk(200).tolist()):
+        data = dict(zip(FEATURE_CHANNELS, row))
+        transmitter.send(data, timestamp=float(i))
+        if not transmitter.sent:
+            continue
+        addon.merge_packet(transmitter.sent.pop())
+        received = np.array([addon.channel_state[k] for k in FEATURE_CHANNELS])
+        assert np.all(np.abs(received - row) <= band + 1e-12)
+        if i % transmitter.keyframe_interval == 0:
+            assert received.tolist() == row
+
+def test_full_packet_replaces_state(addon):
+    addon.channel_state.clear()
+    addon.channel_state.update({'head_pitch': 1.0, 'mouth_open': 0.5})
+    assert addon.merge_packet({'_seq': 3, 'head_pitch': 2.0}) is None
+    assert addon.channel_state == {'head_pitch': 2.0}
+
+def test_delta_packet_merges_changed_channels(addon):
+    addon.channel_state.clear()
+    addon.channel_state.update({'head_pitch': 1.0, 'mouth_open': 0.5})
+    changed = addon.merge_packet({'_seq': 4, '_delta': 1, '_time': 12.5, 'mouth_open': 0.7})
+    assert changed == {'mouth_open'}
+    assert addon.channel_state == {'head_pitch': 1.0, 'mouth_open': 0.7}
+
+def test_unchanged_frames_only_send_heartbeats(transmitter):
+    data = dict(zip(FEATURE_CHANNELS, random_walk(1)[0].tolist()))
+    for i in range(30):
+        transmitter.send(data, timestamp=float(i))
+    seqs = [packet['_seq'] for packet in transmitter.sent]
+    assert seqs == [0, 10, 20]
+    assert transmitter.skipped == 27
+    for packet in transmitter.sent[1:]:
+        assert packet == {'_seq': packet['_seq'], '_delta': 1, '_time': float(packet['_seq'])}
+
+    transmitter.send(data)
+    assert transmitter.sent[-1]['_seq'] == 30 and '_delta' not in transmitter.sent[-1]
@@ -0,0 +1,34 @@
+import types
+import cv2
+import numpy as np
+from face_constants import FEATURE_CHANNELS, MODEL_POINTS, get_calib, get_head_calib
+from models.face_utils import calculate_features, calculate_features_batch, head_rotator
+
+FRAME_SIZE = (640, 480)
+
+def synthetic_landmarks(count, seed=0):
+    """(N, 478, 3) 关键点: 头部姿态点由模型点按随机姿态投影得到, 其余点在脸部范围内随机"""
+    rng = np.random.default_rng(seed)
+    lm = rng.uniform(0.3, 0.7, (count, 478, 3))
+    w, h = FRAME_SIZE
+    camera = np.array([[w * 1.5, 0, w / 2], [0, w * 1.5, h / 2], [0, 0, 1]])
+    points = MODEL_POINTS[:len(head_rotator.calib_points)]
+    for i in range(count):
+        rvec = rng.uniform(-0.3, 0.3, 3) + np.array([np.pi, 0, 0])
+        tvec = np.array([0.0, 0.0, 600.0]) + rng.uniform(-20, 20, 3)
+        projected, _ = cv2.projectPoints(points, rvec, tvec, camera, None)
+        lm[i, head_rotator.calib_points, :2] = projected.reshape(-1, 2) / (w, h)
+    return lm
+
+def as_landmark_list(frame):
+    return [types.SimpleNamespace(x=x, y=y, z=z) for x, y, z in frame.tolist()]
+
+def test_batch_matches_single_frame():
+    landmarks = synthetic_landmarks(40)
+    batch = calculate_features_batch(landmarks, FRAME_SIZE, calib=get_calib(), head_calib=get_head_calib(),
+                                     workers=2)
+    assert batch.shape == (len(landmarks), len(FEATURE_CHANNELS))
+    w, h = FRAME_SIZE
+    for frame, row in zip(landmarks, batch):
+        features, _ = calculate_features(as_landmark_list(frame), (h, w, 3))
+        np.testing.assert_allclose(row, features.values, rtol=1e-9, atol=1e-9)
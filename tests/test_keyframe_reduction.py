@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+def max_linear_error(x, y, keep):
+    return np.max(np.abs(np.interp(x, x[keep], y[keep]) - y))
+
+@pytest.mark.parametrize('tolerance', [0.001, 0.01, 0.1])
+def test_linear_interpolation_stays_within_tolerance(addon, tolerance):
+    rng = np.random.default_rng(1)
+    x = np.arange(500, dtype=np.float64)
+    y = np.cumsum(rng.normal(0, 0.02, len(x))) + 0.3 * np.sin(x / 25)
+    keep = addon.rdp_keep_mask(x, y, tolerance)
+    assert keep[0] and keep[-1]
+    assert keep.sum() < len(x)
+    assert max_linear_error(x, y, keep) <= tolerance + 1e-12
+
+def test_straight_segments_keep_only_corners(addon):
+    x = np.arange(21, dtype=np.float64)
+    y = np.where(x <= 10, x, 20 - x) * 0.5
+    keep = addon.rdp_keep_mask(x, y, 1e-6)
+    assert np.flatnonzero(keep).tolist() == [0, 10, 20]
+
+@pytest.mark.parametrize('count, tolerance', [(0, 0.1), (1, 0.1), (2, 0.1), (10, 0.0)])
+def test_short_curves_and_zero_tolerance_keep_everything(addon, count, tolerance):
+    x = np.arange(count, dtype=np.float64)
+    keep = addon.rdp_keep_mask(x, np.sin(x), tolerance)
+    assert keep.all() and len(keep) == count
+
+@pytest.fixture
+def scene(addon):
+    from tools import bpy_stub
+    addon.register()
+    sc = bpy_stub.make_scene()
+    sc.fpc_active_armature = bpy_stub.Object(addon.BASE_ARMATURE_NAME, addon.controls.values())
+    yield sc
+    addon.unregister()
+
+def test_reduced_keys_are_linear(addon, scene):
+    import bpy
+    frames = np.arange(1, 101, dtype=np.float64)
+    values = np.zeros((len(frames), len(addon.CHANNELS)))
+    values[:, addon.CHANNEL_INDEX['mouth_open']] = np.sin(frames / 10) * 0.5 + 0.5
+    action = bpy.data.actions.new('reduce_test')
+    tolerances = {'mouth_open': 0.01}
+    addon.write_channel_fcurves(scene, scene.fpc_active_armature, action, frames, values, tolerances)
+
+    assert action.fcurves.find(f'pose.bones["{addon.controls["mouth"]}"].scale', index=2) is not None
+    for fcurve in action.fcurves:
+        points = fcurve.keyframe_points
+        reduced = any(channel == 'mouth_open' and fcurve.array_index == index
+                      and fcurve.data_path == f'pose.bones["{addon.controls[control]}"].{data_path}'
+                      for channel, control, data_path, index, _ in addon.CHANNEL_TARGETS)
+        expected = addon.KEY_LINEAR if reduced else addon.KEY_BEZIER
+        assert (points.interpolation == expected).all()
+        if reduced:
+            assert len(points) < len(frames)
@@ -0,0 +1,56 @@
+import io
+import numpy as np
+import pytest
+from utils.recording import LANDMARK_SHAPE, LandmarkRecorder, _npy_header, load_landmarks
+
+@pytest.mark.parametrize('shape, dtype', [((0, 478, 3), np.float32), ((12345, 478, 3), np.float32), ((7,), np.float64)])
+def test_npy_header_is_fixed_size_and_readable(shape, dtype):
+    header = _npy_header(shape, dtype)
+    assert len(header) == 128  # 关闭时原地改写帧数, 长度不能变
+    f = io.BytesIO(header)
+    assert np.lib.format.read_magic(f) == (1, 0)
+    read_shape, fortran, read_dtype = np.lib.format.read_array_header_1_0(f)
+    assert (read_shape, fortran, read_dtype) == (shape, False, np.dtype(dtype))
+    assert f.tell() == len(header)
+
+def make_frames(count, seed=0):
+    return np.random.default_rng(seed).random((count,) + LANDMARK_SHAPE, dtype=np.float32)
+
+@pytest.fixture
+def recorder(tmp_path):
+    recorder = LandmarkRecorder(tmp_path / 'take.csv', (1280, 720), start_time=100.0)
+    yield recorder
+    recorder.close()
+
+def test_round_trip(recorder):
+    frames = make_frames(5)
+    for i, landmarks in enumerate(frames):
+        recorder.record(landmarks, 100.0 + i / 30)
+    recorder.close()
+
+    timestamps, landmarks, meta = load_landmarks(recorder.index_path)
+    np.testing.assert_allclose(timestamps, np.arange(5) / 30)
+    np.testing.assert_array_equal(landmarks, frames)
+    assert meta['frames'] == 5 and meta['frame_size'] == [1280, 720]
+    # 正常关闭后文件头记录了实际帧数, np.load 可直接读取
+    np.testing.assert_array_equal(np.load(recorder.landmarks.path), frames)
+    # 传入 .npy 路径同样可以读取
+    assert len(load_landmarks(recorder.landmarks.path)[1]) == 5
+
+def test_unclosed_recording_is_readable(recorder):
+    frames = make_frames(3, seed=1)
+    for landmarks in frames:
+        recorder.record(landmarks, 101.0)
+    recorder.landmarks.file.flush()
+    recorder.timestamps.file.flush()
+
+    # 索引与文件头仍为 0 帧, 帧数由文件大小推算
+    timestamps, landmarks, meta = load_landmarks(recorder.index_path)
+    assert meta['frames'] == 0
+    np.testing.assert_array_equal(landmarks, frames)
+    np.testing.assert_allclose(timestamps, [1.0, 1.0, 1.0])
+
+def test_empty_recording(recorder):
+    recorder.close()
+    timestamps, landmarks, _ = load_landmarks(recorder.index_path)
+    assert landmarks.shape == (0,) + LANDMARK_SHAPE and len(timestamps) == 0
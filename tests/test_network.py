@@ -0,0 +1,98 @@
+import json
+import pytest
+from utils import network
+from utils.network import Destination, Fanout, parse_destination
+
+class FakeSocket:
+    """记录 sendto 调用, 对 failing 中的地址抛出 OSError"""
+    def __init__(self, failing=()):
+        self.sent = []
+        self.failing = set(failing)
+
+    def sendto(self, packet, addr):
+        if addr in self.failing:
+            raise ConnectionRefusedError(111, 'Connection refused')
+        self.sent.append((addr, json.loads(packet)))
+
+    def received(self, addr):
+        return [data for to, data in self.sent if to == addr]
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(network.time, 'perf_counter', lambda: now[0])
+    return now
+
+PACKET = {'head_yaw': 1.0, 'mouth_open': 0.5, 'left_brow': 0.2, '_seq': 7}
+
+def test_parse_destination():
+    assert parse_destination('10.0.0.2:9000').addr == ('10.0.0.2', 9000)
+    dest = parse_destination({'ip': '10.0.0.3', 'port': '9001', 'rate': 20, 'channels': ['head']})
+    assert dest.addr == ('10.0.0.3', 9001) and dest.interval == pytest.approx(0.05)
+    with pytest.raises(ValueError):
+        parse_destination('10.0.0.2')
+
+def test_channel_filter_by_name_and_group(clock):
+    sock = FakeSocket()
+    fanout = Fanout(sock, [Destination('a', 1), Destination('b', 2, channels=['head', 'mouth_open']),
+                           Destination('c', 3, channels=[])])
+    assert fanout.send(PACKET) == 0
+    assert sock.received(('a', 1)) == [PACKET]
+    assert sock.received(('b', 2)) == [{'head_yaw': 1.0, 'mouth_open': 0.5, '_seq': 7}]
+    assert sock.received(('c', 3)) == [{'_seq': 7}]
+
+def test_rate_limited_destination_gets_full_state(clock):
+    sock = FakeSocket()
+    fanout = Fanout(sock, [Destination('fast', 1), Destination('slow', 2, rate=10)])
+    for i in range(9):
+        delta = {'_delta': 1, 'mouth_open': i}
+        fanout.send(delta, full={**PACKET, 'mouth_open': i})
+        clock[0] += 1 / 30
+    assert len(sock.received(('fast', 1))) == 9
+    slow = sock.received(('slow', 2))
+    assert [p['mouth_open'] for p in slow] == [0, 3, 6]
+    assert all('_delta' not in p and 'head_yaw' in p for p in slow)
+
+def test_errors_are_counted_not_raised(clock, capsys):
+    sock = FakeSocket(failing=[('down', 1)])
+    fanout = Fanout(sock, [Destination('down', 1), Destination('up', 2)])
+    assert [fanout.send(PACKET) for _ in range(5)] == [1] * 5
+    assert len(sock.received(('up', 2))) == 5
+    assert fanout.find(('down', 1)).errors == 5
+    assert capsys.readouterr().out.count('Send to down:1 failed') == 1
+
+    clock[0] += network.ERROR_LOG_INTERVAL
+    fanout.send(PACKET)
+    assert 'failed (5 errors)' in capsys.readouterr().out
+
+@pytest.fixture
+def transmitter(capsys):
+    tx = network.UDPTransmitter('127.0.0.1', 9000, delta=False, sndbuf=0,
+                                destinations=['127.0.0.1:9001', {'ip': '127.0.0.2', 'port': 9002}])
+    tx.sock.close()
+    tx.fanout.sock = FakeSocket()
+    capsys.readouterr()
+    yield tx
+
+def test_subscribe_only_known_destinations(transmitter, capsys):
+    assert not transmitter.subscribe(('10.9.9.9', 9001), ['head'])
+    assert not transmitter.subscribe(('10.9.9.9', 9001), ['head'])
+    assert capsys.readouterr().out.count('unknown receiver 10.9.9.9:9001') == 1
+    assert transmitter.fanout.find(('10.9.9.9', 9001)) is None
+
+    transmitter.send({'head_yaw': 1.0, 'mouth_open': 0.5})
+    assert len(transmitter.fanout.sock.sent) == 3
+
+def test_subscribe_filters_channels(transmitter, capsys):
+    assert transmitter.subscribe(('127.0.0.1', 9001), ['head'], rate=0)
+    assert transmitter.subscribe(('127.0.0.1', 9001), ['head'], rate=0)
+    assert capsys.readouterr().out.count('subscribed to 1 channels') == 1
+
+    transmitter.send({'head_yaw': 1.0, 'mouth_open': 0.5}, timestamp=5.0)
+    sock = transmitter.fanout.sock
+    assert sock.received(('127.0.0.1', 9001)) == [{'head_yaw': 1.0, '_time': 5.0}]
+    assert sock.received(('127.0.0.1', 9000)) == [{'head_yaw': 1.0, 'mouth_open': 0.5, '_time': 5.0}]
+
+    assert transmitter.subscribe(('127.0.0.1', 9001), None)
+    transmitter.send({'head_yaw': 2.0, 'mouth_open': 0.5})
+    assert sock.received(('127.0.0.1', 9001))[-1] == {'head_yaw': 2.0, 'mouth_open': 0.5}
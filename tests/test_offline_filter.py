@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from face_constants import FEATURE_CHANNELS, feature_group
+from models import offline_filter
+
+FS = 30.0
+
+def loop_biquad(values, b, a):
+    """逐样本的参考实现"""
+    out = np.empty_like(values)
+    z2 = (b[2] - a[2]) * values[0]
+    z1 = (b[1] - a[1]) * values[0] + z2
+    for i, x in enumerate(values):
+        y = b[0] * x + z1
+        z1 = b[1] * x - a[1] * y + z2
+        z2 = b[2] * x - a[2] * y
+        out[i] = y
+    return out
+
+def loop_exponential(values, alpha):
+    out = np.empty_like(values)
+    prev = values[0]
+    for i, val in enumerate(values):
+        prev = alpha * prev + (1 - alpha) * val
+        out[i] = prev
+    return out
+
+def random_walk(count, channels=3, seed=0):
+    return np.cumsum(np.random.default_rng(seed).normal(size=(count, channels)), axis=0)
+
+@pytest.mark.parametrize('count', [1, 2, 63, 64, 65, 1000])
+def test_block_recurrences_match_per_sample_loop(addon, count):
+    values = random_walk(count)
+    for b, a in offline_filter._butterworth_sections(4.0, FS, 4):
+        expected = loop_biquad(values, b, a)
+        np.testing.assert_allclose(offline_filter._biquad(values, b, a), expected, rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(addon._biquad(values, b, a), expected, rtol=1e-12, atol=1e-12)
+    expected = loop_exponential(values, 0.7)
+    np.testing.assert_allclose(offline_filter._exponential_pass(values, 0.7), expected, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(addon._exponential_pass(values, 0.7), expected, rtol=1e-12, atol=1e-12)
+
+FILTERS = [
+    lambda v: offline_filter.butterworth_filtfilt(v, 4.0, FS, 2),
+    lambda v: offline_filter.butterworth_filtfilt(v, 4.0, FS, 4),
+    lambda v: offline_filter.exponential_filtfilt(v, [0.3, 0.6, 0.9]),
+    lambda v: offline_filter.savgol_filter(v, 9, 2),
+]
+
+@pytest.mark.parametrize('smooth', FILTERS)
+def test_constant_signal_is_unchanged(smooth):
+    values = np.tile([1.5, -2.0, 0.25], (200, 1))
+    np.testing.assert_allclose(smooth(values), values, atol=1e-12)
+
+@pytest.mark.parametrize('method', ['BUTTERWORTH', 'SAVGOL', 'EXPONENTIAL'])
+def test_addon_constant_signal_is_unchanged(addon, method):
+    values = np.tile([1.5, -2.0, 0.25], (200, 1))
+    np.testing.assert_allclose(addon.zero_phase_smooth(values, FS, method, cutoff=4.0), values, atol=1e-12)
+
+@pytest.mark.parametrize('smooth', FILTERS)
+def test_sine_has_no_phase_shift(smooth):
+    t = np.arange(600) / FS
+    values = np.repeat(np.sin(2 * np.pi * 0.5 * t)[:, None], 3, axis=1)
+    out = smooth(values)[100:-100]
+    reference = np.stack([np.sin(2 * np.pi * 0.5 * t), np.cos(2 * np.pi * 0.5 * t)], axis=1)[100:-100]
+    coeffs, *_ = np.linalg.lstsq(reference, out, rcond=None)
+    phase = np.arctan2(coeffs[1], coeffs[0])
+    assert np.all(np.abs(phase) < 1e-6)
+
+@pytest.mark.parametrize('order', [2, 4])
+def test_addon_matches_butterworth_filtfilt(addon, order):
+    values = random_walk(500)
+    np.testing.assert_allclose(addon.zero_phase_smooth(values, FS, 'BUTTERWORTH', cutoff=5.0, order=order),
+                               offline_filter.butterworth_filtfilt(values, 5.0, FS, order), atol=1e-10)
+
+def test_addon_matches_savgol_and_exponential(addon):
+    values = random_walk(500)
+    np.testing.assert_allclose(addon.zero_phase_smooth(values, FS, 'SAVGOL', window=7, polyorder=3),
+                               offline_filter.savgol_filter(values, 7, 3), atol=1e-10)
+    np.testing.assert_allclose(addon.zero_phase_smooth(values, FS, 'EXPONENTIAL', alpha=0.6),
+                               offline_filter.exponential_filtfilt(values, 0.6), atol=1e-10)
+
+def test_invalid_butterworth_order(addon):
+    with pytest.raises(ValueError):
+        offline_filter.butterworth_filtfilt(random_walk(50), 5.0, FS, 3)
+    with pytest.raises(ValueError):
+        addon.zero_phase_smooth(random_walk(50), FS, 'BUTTERWORTH', order=3)
+
+@pytest.fixture
+def scene(addon):
+    from tools import bpy_stub
+    addon.register()
+    yield bpy_stub.make_scene(FS)
+    addon.unregister()
+
+def test_channel_groups_match_transmitter(addon):
+    assert list(addon.CHANNELS) == FEATURE_CHANNELS
+    assert [addon.channel_group(c) for c in addon.CHANNELS] == [feature_group(c) for c in FEATURE_CHANNELS]
+    assert set(addon.BAKE_GROUPS) == {feature_group(c) for c in FEATURE_CHANNELS}
+
+def test_bake_group_overrides_match_cli(addon, scene):
+    config = {'method': 'butterworth', 'cutoff': 8.0, 'order': 2, 'window': 9, 'polyorder': 2, 'alpha': 0.5,
+              'channels': {'head': {'cutoff': 5.0, 'order': 4},
+                           'pupils': {'method': 'savgol', 'window': 7},
+                           'eyelids': {'method': 'exponential', 'alpha': 0.8},
+                           'teeth': {'method': 'none'}}}
+    scene.fpc_bake_smooth = 'BUTTERWORTH'
+    scene.fpc_bake_head_cutoff, scene.fpc_bake_head_order = 5.0, 4
+    scene.fpc_bake_pupils_smooth, scene.fpc_bake_pupils_window = 'SAVGOL', 7
+    scene.fpc_bake_eyelids_smooth, scene.fpc_bake_eyelids_alpha = 'EXPONENTIAL', 0.8
+    scene.fpc_bake_teeth_smooth = 'NONE'
+
+    values = random_walk(400, len(FEATURE_CHANNELS))
+    expected = offline_filter.smooth_recording(FEATURE_CHANNELS, values, FS, config)
+    np.testing.assert_allclose(addon.smooth_recording_values(scene, values, FS), expected, atol=1e-10)
@@ -0,0 +1,63 @@
+import collections
+import pytest
+from face_constants import FEATURE_CHANNELS
+
+@pytest.fixture
+def scene(addon):
+    import bpy
+    from tools import bpy_stub
+    addon.register()
+    sc = bpy_stub.make_scene()
+    sc.fpc_active_armature = bpy_stub.Object(addon.BASE_ARMATURE_NAME, addon.controls.values())
+    bpy.context.scene = sc
+    addon.channel_state.clear()
+    addon.data_queue = collections.deque(maxlen=64)
+    yield sc
+    addon.unregister()
+
+def queue(addon, *infos):
+    addon.data_queue.extend((float(i), info) for i, info in enumerate(infos))
+
+def full_packet(value):
+    return {key: value for key in FEATURE_CHANNELS}
+
+def mouth(sc, addon):
+    return sc.fpc_active_armature.pose.bones[addon.controls['mouth']]
+
+def test_burst_is_posed_and_keyed_once(addon, scene):
+    from tools import bpy_stub
+    scene.tool_settings.use_keyframe_insert_auto = True
+    queue(addon, full_packet(0.1))
+    bpy_stub.calls.clear()
+    addon.process_data()
+    single = dict(bpy_stub.calls)
+
+    queue(addon, *(full_packet(0.1 * i) for i in range(2, 10)))
+    bpy_stub.calls.clear()
+    addon.process_data()
+    assert not addon.data_queue
+    assert dict(bpy_stub.calls) == single
+    assert mouth(scene, addon).scale[2] == pytest.approx(0.9)
+
+def test_delta_burst_applies_union_of_changes(addon, scene):
+    from tools import bpy_stub
+    queue(addon, full_packet(0.0))
+    addon.process_data()
+    queue(addon, {'_delta': 1, 'mouth_open': 0.3}, {'_delta': 1, 'left_eyelid': 0.4}, {'_delta': 1})
+    bpy_stub.calls.clear()
+    addon.process_data()
+    assert addon.channel_state['mouth_open'] == 0.3 and addon.channel_state['left_eyelid'] == 0.4
+    assert mouth(scene, addon).scale[2] == 0.3
+    # 嘴部 (scale[0], scale[2]) 与左眼睑 (scale[2]) 各写一次
+    assert bpy_stub.calls['property_write'] == 3
+
+    queue(addon, {'_delta': 1}, {'_delta': 1})
+    bpy_stub.calls.clear()
+    addon.process_data()
+    assert not bpy_stub.calls
+
+def test_packets_wait_without_armature(addon, scene):
+    scene.fpc_active_armature = None
+    queue(addon, full_packet(0.5))
+    addon.process_data()
+    assert len(addon.data_queue) == 1
@@ -0,0 +1,24 @@
+import sys
+from utils.profiling import PipelineProfiler
+
+def sample_twice(profiler):
+    profiler._sample(sys._getframe())
+    profiler._sample(sys._getframe())  # 同一函数的另一行
+
+def to_rgb(profiler):
+    profiler._sample(sys._getframe())
+
+def test_samples_aggregate_by_function_and_stage(tmp_path):
+    profiler = PipelineProfiler(60, output_dir=str(tmp_path), interval=3600)  # 采样线程不会触发
+    profiler.stage('inference')
+    sample_twice(profiler)
+    to_rgb(profiler)
+    stem = profiler.stop()
+
+    stacks = dict(line.rsplit(' ', 1) for line in open(f"{stem}.collapsed").read().splitlines())
+    inference = [s for s in stacks if s.startswith('inference;')]
+    assert len(inference) == 1 and stacks[inference[0]] == '2'
+    assert inference[0].endswith('sample_twice (test_profiling.py)')
+    convert = [s for s in stacks if s.startswith('convert;')]
+    assert len(convert) == 1 and convert[0].endswith('to_rgb (test_profiling.py)')
+    assert profiler.stage_samples == {'inference': 2, 'convert': 1}
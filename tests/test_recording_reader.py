@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from utils.recording import write_recording
+
+CHANNELS = ('head_yaw', 'mouth_open', 'extra_column', 'left_eyelid')  # 未知列应被忽略
+
+@pytest.fixture
+def recording(addon, tmp_path, monkeypatch):
+    """约 2000 行、间隔不均匀的录制; 小块读取以覆盖跨块与二分查找"""
+    monkeypatch.setattr(addon.RecordingReader, 'CHUNK_BYTES', 1024)
+    monkeypatch.setattr(addon.RecordingReader, 'MAX_CHUNKS', 4)
+    rng = np.random.default_rng(2)
+    # write_recording 的时间戳保留 3 位小数, 间隔取整毫秒保证严格递增
+    timestamps = 10.0 + np.cumsum(rng.integers(20, 50, 2000)) / 1000.0
+    values = rng.normal(size=(len(timestamps), len(CHANNELS)))
+    path = tmp_path / 'take.csv'
+    write_recording(path, timestamps, CHANNELS, values)
+    reader = addon.RecordingReader(str(path))
+    yield reader, timestamps, values
+    reader.close()
+
+def expected(addon, timestamps, values, t):
+    row = np.zeros(len(addon.CHANNELS))
+    for c, name in enumerate(CHANNELS):
+        if name not in addon.CHANNEL_INDEX:
+            continue
+        row[addon.CHANNEL_INDEX[name]] = np.interp(t, timestamps, values[:, c])
+    return row
+
+def test_bounds(recording):
+    reader, timestamps, _ = recording
+    assert reader.start_time == timestamps[0]
+    assert reader.end_time == timestamps[-1]
+    assert len(reader.chunks) <= reader.MAX_CHUNKS
+
+def test_sequential_playback_matches_interp(addon, recording):
+    reader, timestamps, values = recording
+    for t in np.arange(timestamps[0] - 0.5, timestamps[-1] + 0.5, 1 / 30):
+        np.testing.assert_allclose(reader.sample(t), expected(addon, timestamps, values, t), atol=1e-9)
+
+def test_random_seeks_match_interp(addon, recording):
+    reader, timestamps, values = recording
+    rng = np.random.default_rng(3)
+    times = np.concatenate([rng.uniform(timestamps[0], timestamps[-1], 300), timestamps[::97]])
+    for t in times:
+        np.testing.assert_allclose(reader.sample(t), expected(addon, timestamps, values, t), atol=1e-9)
+
+def test_recorder_writes_every_feature_channel(addon, tmp_path):
+    from face_constants import FEATURE_CHANNELS, FeatureFrame
+    from utils.recording import Recorder, load_recording
+    frame = FeatureFrame(np.arange(len(FEATURE_CHANNELS), dtype=np.float64))
+    recorder = Recorder(str(tmp_path / 'take.csv'), fps=30)
+    recorder.record(frame)
+    recorder.close()
+    _, channels, values = load_recording(tmp_path / 'take.csv')
+    assert channels == FEATURE_CHANNELS
+    assert values[0].tolist() == frame.values.tolist()
+
+    _, addon_values = addon.load_recording_arrays(str(tmp_path / 'take.csv'))
+    assert addon_values[0].tolist() == frame.values.tolist()
+
+LEGACY_CHANNELS = ('head_pitch', 'head_yaw', 'head_roll', 'mouth_open', 'mouth_width', 'left_eyelid',
+                   'right_eyelid', 'left_pupil_x', 'left_pupil_y', 'right_pupil_x', 'right_pupil_y')
+
+def test_legacy_recording_without_brows_and_teeth(addon, tmp_path):
+    path = tmp_path / 'legacy.csv'
+    timestamps = np.arange(10) / 30.0
+    values = np.random.default_rng(4).normal(size=(len(timestamps), len(LEGACY_CHANNELS)))
+    write_recording(path, timestamps, LEGACY_CHANNELS, values)
+
+    _, loaded = addon.load_recording_arrays(str(path))
+    legacy_cols = [addon.CHANNEL_INDEX[name] for name in LEGACY_CHANNELS]
+    np.testing.assert_allclose(loaded[:, legacy_cols], values)
+    for name in ('left_brow', 'right_brow', 'teeth_open'):
+        assert not loaded[:, addon.CHANNEL_INDEX[name]].any()
+
+    reader = addon.RecordingReader(str(path))
+    try:
+        np.testing.assert_allclose(reader.sample(timestamps[3])[legacy_cols], values[3], atol=1e-9)
+    finally:
+        reader.close()
@@ -0,0 +1,37 @@
+import numpy as np
+
+FPS = 24.0
+
+def jittered_timestamps(count, rate, seed=0):
+    """以 rate 采样但带抖动与丢帧的时间戳"""
+    rng = np.random.default_rng(seed)
+    steps = rng.uniform(0.7, 1.3, count) / rate
+    steps[rng.random(count) < 0.05] *= 3  # 丢帧
+    return 100.0 + np.cumsum(steps)
+
+def test_matches_np_interp_per_channel(addon):
+    timestamps = jittered_timestamps(300, 30.0)
+    values = np.random.default_rng(1).normal(size=(len(timestamps), 4))
+    frames, resampled = addon.resample_to_frames(timestamps, values, FPS, 10)
+
+    frame_times = timestamps[0] + (frames - 10) / FPS
+    assert frames[0] == 10 and np.all(np.diff(frames) == 1)
+    assert frame_times[-1] <= timestamps[-1] < frame_times[-1] + 1 / FPS
+    for c in range(values.shape[1]):
+        np.testing.assert_allclose(resampled[:, c], np.interp(frame_times, timestamps, values[:, c]), atol=1e-12)
+
+def test_duration_follows_timestamps_not_row_count(addon):
+    timestamps = np.arange(0, 60, 1 / 30.0)[:1800]  # 60 秒, 30 fps 录制
+    frames, _ = addon.resample_to_frames(timestamps, np.zeros((len(timestamps), 1)), FPS, 1)
+    assert len(frames) == int(np.floor((timestamps[-1] - timestamps[0]) * FPS)) + 1
+
+def test_clock_step_back_holds_value(addon):
+    timestamps = np.array([0.0, 0.1, 0.2, 0.15, 0.3])
+    values = np.arange(5, dtype=np.float64)[:, None]
+    frames, resampled = addon.resample_to_frames(timestamps, values, 10.0, 0)
+    assert len(frames) == 4
+    assert np.all(np.diff(resampled[:, 0]) >= 0)
+
+def test_single_sample(addon):
+    frames, resampled = addon.resample_to_frames([5.0], np.array([[0.5, 1.5]]), FPS, 3)
+    assert frames.tolist() == [3.0] and resampled.tolist() == [[0.5, 1.5]]
@@ -0,0 +1,81 @@
+import itertools
+import json
+import os
+import numpy as np
+import pytest
+from face_constants import FEATURE_CHANNELS, FeatureFrame
+from utils import network
+from utils.network import SharedMemoryTransmitter
+
+CAPACITY = 8
+_names = itertools.count()
+
+@pytest.fixture
+def ring(addon):
+    """(发送端, 已连接的读取端)"""
+    name = f'fpc_test_{os.getpid()}_{next(_names)}'
+    transmitter = SharedMemoryTransmitter(name, capacity=CAPACITY)
+    reader = addon.SharedMemoryReader(name)
+    assert reader.poll() == ([], 0)  # 连接; 不回放已有记录
+    if os.name == 'posix':
+        # 读取端连接时会注销同名段的清理登记; 同一进程中发送端仍持有它, 重新登记以便 unlink
+        from multiprocessing import resource_tracker
+        resource_tracker.register(transmitter.shm._name, 'shared_memory')
+    yield transmitter, reader
+    reader.close()
+    transmitter.close()
+
+def test_reader_layout_matches_transmitter(addon):
+    for name in ('SHM_MAGIC', 'SHM_COUNT_OFFSET', 'SHM_NAMES_OFFSET', 'SHM_DATA_OFFSET'):
+        assert getattr(addon, name) == getattr(network, name)
+    assert addon.SHM_HEADER.format == network.SHM_HEADER.format
+
+def test_header_and_record_layout(ring):
+    transmitter, reader = ring
+    buf = transmitter.shm.buf
+    magic, version, channels, capacity = network.SHM_HEADER.unpack_from(buf, 0)
+    assert (magic, version, channels, capacity) == (network.SHM_MAGIC, network.SHM_VERSION,
+                                                    len(FEATURE_CHANNELS), CAPACITY)
+    names = bytes(buf[network.SHM_NAMES_OFFSET:network.SHM_DATA_OFFSET]).rstrip(b'\0')
+    assert tuple(json.loads(names)) == tuple(FEATURE_CHANNELS) == reader.names
+    # seq u8 + time f8 + values f4[n], 无填充
+    assert reader.record_size == transmitter.dtype.itemsize == 16 + 4 * len(FEATURE_CHANNELS)
+    assert transmitter.shm.size >= network.SHM_DATA_OFFSET + CAPACITY * reader.record_size
+
+    transmitter.send({'head_pitch': 1.5}, timestamp=42.0)
+    count = np.ndarray((1,), dtype='<u8', buffer=buf, offset=network.SHM_COUNT_OFFSET)
+    record = np.ndarray((1,), dtype=network.shm_record_dtype(channels), buffer=buf,
+                        offset=network.SHM_DATA_OFFSET + (int(count[0]) - 1) % CAPACITY * reader.record_size)[0]
+    assert record['seq'] == count[0] and record['time'] == 42.0
+    assert record['values'][FEATURE_CHANNELS.index('head_pitch')] == 1.5
+    del count, record  # 视图需在关闭共享内存前释放
+
+def test_records_round_trip(ring):
+    transmitter, reader = ring
+    frame = FeatureFrame(np.linspace(-1, 1, len(FEATURE_CHANNELS)))
+    transmitter.send(frame, timestamp=1.0)
+    transmitter.send({'mouth_open': 0.25, 'not_a_channel': 3.0}, timestamp=2.0)
+    items, dropped = reader.poll()
+    assert dropped == 0
+    assert [t for t, _ in items] == [1.0, 2.0]
+    expected = dict(zip(FEATURE_CHANNELS, frame.values.astype(np.float32).tolist()))
+    assert items[0][1] == expected
+    assert items[1][1] == {'mouth_open': 0.25}  # 缺失通道写为 NaN, 读取时丢弃
+    assert reader.poll() == ([], 0)
+
+def test_overwritten_records_are_counted(ring):
+    transmitter, reader = ring
+    for i in range(CAPACITY + 3):
+        transmitter.send({'head_yaw': float(i)}, timestamp=float(i))
+    items, dropped = reader.poll()
+    assert dropped == 3
+    assert [info['head_yaw'] for _, info in items] == [float(i) for i in range(3, CAPACITY + 3)]
+
+def test_record_being_written_is_skipped(ring):
+    transmitter, reader = ring
+    transmitter.send({'head_yaw': 1.0})
+    transmitter.send({'head_yaw': 2.0})
+    transmitter.seqs[(transmitter.count - 1) % CAPACITY] = 0  # 写入中: seq 已清零
+    items, dropped = reader.poll()
+    assert dropped == 1
+    assert [info['head_yaw'] for _, info in items] == [1.0]
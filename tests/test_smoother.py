@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from face_constants import FEATURE_CHANNELS, FeatureFrame
+from models.smoother import FeatureSmoother, KalmanPredictor
+
+FACTORS = {'enable': True, 'head': 0.6, 'eyelids': 0.2, 'pupils': 0.3, 'mouth': 0.4, 'brows': 0.5, 'teeth': 0.5}
+
+def make_smoother():
+    smoother = FeatureSmoother()
+    smoother.factors = dict(FACTORS)
+    return smoother
+
+def test_feature_frame_mapping_access():
+    frame = FeatureFrame()
+    frame['mouth_open'] = 0.25
+    assert frame['mouth_open'] == 0.25 and frame.get('mouth_open') == 0.25
+    assert frame.get('unknown', -1.0) == -1.0
+    assert 'head_yaw' in frame and 'unknown' not in frame
+    assert len(frame) == len(FEATURE_CHANNELS) and list(frame) == FEATURE_CHANNELS
+    with pytest.raises(KeyError):
+        frame['unknown']
+
+def test_feature_frame_to_dict_order_and_update():
+    frame = FeatureFrame.from_mapping({'teeth_open': 3.0, 'head_pitch': 1.0, 'unknown': 9.0})
+    frame.update({'left_brow': 2.0, 'not_a_channel': 5.0})
+    data = frame.to_dict()
+    assert list(data) == FEATURE_CHANNELS
+    assert data['head_pitch'] == 1.0 and data['left_brow'] == 2.0 and data['teeth_open'] == 3.0
+    assert sum(data.values()) == 6.0  # 未知键被忽略, 其余通道为 0
+    assert dict(frame.items()) == data
+    copy = frame.copy()
+    copy['head_pitch'] = 7.0
+    assert frame['head_pitch'] == 1.0
+
+def test_partial_dict_round_trips():
+    smoother = make_smoother()
+    first = {'mouth_open': 0.5, 'custom_value': 2.0}
+    assert smoother.apply(first) == first
+    out = smoother.apply({'mouth_open': 1.0, 'custom_value': 4.0})
+    assert list(out) == ['mouth_open', 'custom_value']
+    assert out['mouth_open'] == pytest.approx(0.4 * 0.5 + 0.6 * 1.0)
+    assert out['custom_value'] == pytest.approx(3.0)  # 未知通道 alpha 0.5
+
+def test_dict_keys_keep_history_when_the_key_set_changes():
+    smoother = make_smoother()
+    smoother.apply({'mouth_open': 0.0})
+    out = smoother.apply({'head_yaw': 10.0, 'mouth_open': 1.0})
+    assert out == {'head_yaw': 10.0, 'mouth_open': pytest.approx(0.6)}
+
+def test_frame_and_dict_inputs_agree():
+    rows = np.random.default_rng(0).normal(size=(20, len(FEATURE_CHANNELS)))
+    by_frame, by_dict = make_smoother(), make_smoother()
+    for row in rows:
+        frame_out = by_frame.apply(FeatureFrame(row.copy()))
+        dict_out = by_dict.apply(dict(zip(FEATURE_CHANNELS, row.tolist())))
+        assert isinstance(frame_out, FeatureFrame)
+        np.testing.assert_allclose(frame_out.values, list(dict_out.values()))
+
+def test_kalman_partial_dict_round_trips():
+    predictor = KalmanPredictor({'latency': 0.0})
+    first = {'mouth_open': 0.5, 'custom_value': 2.0}
+    assert predictor.apply(first, 0.0) == first
+    assert list(predictor.apply({'mouth_open': 0.6, 'custom_value': 2.5}, 0.033)) == ['mouth_open', 'custom_value']
+
+KALMAN_GROUPS = {'mouth': {'noise': 0.01, 'accel': 0.5}}
+
+def run_kalman(predictor, signal, dt=1 / 30.0):
+    return np.array([predictor.apply({'mouth_open': float(v)}, i * dt)['mouth_open'] for i, v in enumerate(signal)])
+
+def test_kalman_converges_to_constant():
+    noisy = 0.5 + np.random.default_rng(0).normal(0, 0.01, 300)
+    out = run_kalman(KalmanPredictor({'latency': 0.0, 'groups': KALMAN_GROUPS}), noisy)
+    assert abs(out[-60:].mean() - 0.5) < 0.003
+    assert out[-60:].std() < 0.7 * noisy[-60:].std()
+
+def test_kalman_tracks_ramp_without_lag():
+    ramp = np.arange(300) * 0.01
+    out = run_kalman(KalmanPredictor({'latency': 0.0, 'groups': KALMAN_GROUPS}), ramp)
+    np.testing.assert_allclose(out[-30:], ramp[-30:], atol=1e-6)
+
+def test_kalman_extrapolates_ramp_by_horizon():
+    dt = 1 / 30.0
+    ramp = np.arange(300) * 0.01
+    out = run_kalman(KalmanPredictor({'latency': 0.1, 'groups': KALMAN_GROUPS}), ramp, dt)
+    lead = out[-30:] - ramp[-30:]
+    full = 0.01 / dt * 0.1
+    # 速度置信度 < 1 时外推会打折, 但不会超过完整提前量
+    assert np.all(lead > 0.75 * full) and np.all(lead <= full + 1e-9)
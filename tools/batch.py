@@ -0,0 +1,247 @@
+"""批量处理视频: 多进程提取关键点并计算特征, 结果按内容与设置缓存, 中断后可续跑
+
+python -m tools.batch clips/ -o batch_output --workers 4
+
+缓存分两级: 关键点由 (视频内容哈希, 检测器设置) 决定, 特征再加上校准数据;
+只修改校准时只重新计算特征, 不重新运行 MediaPipe。
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from config.settings import CONFIG
+from face_constants import FEATURE_CHANNELS, get_calib, get_head_calib
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v')
+CACHE_VERSION = 1  # 修改关键点/特征计算方式时递增, 使旧缓存失效
+MANIFEST_NAME = 'manifest.json'
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mozi's Facecap Batch Processing")
+    parser.add_argument('inputs', nargs='+', help='Video files, directories, or .txt lists of paths')
+    parser.add_argument('-o', '--output', type=str, default='batch_output', help='Output directory (with cache and manifest)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: half the CPUs)')
+    parser.add_argument('--no_mirror', action='store_true', help='Do not mirror frames (main.py mirrors camera input)')
+    parser.add_argument('--force', action='store_true', help='Ignore the cache and recompute everything')
+    return parser.parse_args()
+
+def collect_videos(inputs):
+    """展开目录与列表文件, 返回去重后的视频路径"""
+    videos = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            videos += sorted(p for p in path.rglob('*') if p.suffix.lower() in VIDEO_EXTENSIONS)
+        elif path.suffix.lower() == '.txt':
+            with open(path, 'r') as f:
+                videos += [Path(line.strip()) for line in f if line.strip() and not line.startswith('#')]
+        else:
+            videos.append(path)
+    return list(dict.fromkeys(p.resolve() for p in videos))
+
+def file_hash(path, chunk=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while block := f.read(chunk):
+            digest.update(block)
+    return digest.hexdigest()
+
+def settings_hash(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def landmark_settings(mirror):
+    """影响关键点结果的设置"""
+    try:
+        from importlib.metadata import version
+        mp_version = version('mediapipe')
+    except Exception:
+        mp_version = None
+    detector = {k: v for k, v in CONFIG.get('detector', {}).items() if k != 'head_pose_from_matrix'}
+    return CACHE_VERSION, detector, mirror, mp_version
+
+def feature_settings():
+    """影响特征结果的设置 (在关键点之上)"""
+    return (CACHE_VERSION, FEATURE_CHANNELS, get_calib(), get_head_calib(),
+            CONFIG['calibration'], CONFIG['head_calibration'])
+
+class Manifest:
+    """记录每个视频的哈希、缓存键与处理状态, 每完成一个视频即原子写入"""
+    def __init__(self, path):
+        self.path = Path(path)
+        self.clips = {}
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                self.clips = json.load(f).get('clips', {})
+
+    def cached_hash(self, video):
+        """文件大小和修改时间未变时沿用上次的内容哈希, 避免重复读取大文件"""
+        entry = self.clips.get(str(video), {})
+        stat = video.stat()
+        if entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+            return entry.get('hash')
+        return None
+
+    def update(self, video, **fields):
+        self.clips.setdefault(str(video), {}).update(fields)
+        self.save()
+
+    def save(self):
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'clips': self.clips}, f, indent=2)
+        os.replace(tmp, self.path)
+
+def extract_landmarks(video, base_path, mirror):
+    """逐帧运行检测器并写入关键点录制, 时间戳取视频自身的时间轴"""
+    import cv2
+    from models.detector import FaceLandmarkerDetector, FaceMeshDetector
+    from models.face_utils import landmarks_to_array
+    from utils.recording import LandmarkRecorder
+
+    cap = cv2.VideoCapture(str(video))
+    if not cap.isOpened():
+        raise RuntimeError(f"Unable to open video: {video}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    # 离线处理需要逐帧结果, Tasks 后端使用 VIDEO 模式而不是异步模式
+    cfg = CONFIG.get('detector', {})
+    if cfg.get('backend') == 'tasks':
+        detector = FaceLandmarkerDetector(dict(cfg, running_mode='video'))
+    else:
+        detector = FaceMeshDetector()
+
+    recorder = LandmarkRecorder(base_path, size, start_time=0.0)
+    frames = index = 0
+    frame = flipped = None
+    try:
+        while True:
+            ok, frame = cap.read(image=frame)
+            if not ok:
+                break
+            msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+            timestamp = msec / 1000.0 if msec > 0 or index == 0 else index / fps
+            index += 1
+            if mirror:
+                flipped = cv2.flip(frame, 1, dst=flipped)
+            lm = detector.process(flipped if mirror else frame)
+            if lm is not None:
+                recorder.record(landmarks_to_array(lm), timestamp)
+                frames += 1
+    finally:
+        recorder.close()
+        detector.close()
+        cap.release()
+    return index, frames
+
+def process_clip(video, lm_dir, feature_path, mirror):
+    """工作进程: 需要时提取关键点, 然后计算特征 CSV"""
+    from models.face_utils import calculate_features_batch
+    from utils.recording import load_landmarks, write_recording
+
+    t0 = time.perf_counter()
+    lm_dir = Path(lm_dir)
+    index = lm_dir / 'clip_landmarks.json'
+    total = None
+    if not index.exists():
+        tmp = lm_dir.with_name(f'{lm_dir.name}.{os.getpid()}.partial')
+        shutil.rmtree(tmp, ignore_errors=True)
+        total, _ = extract_landmarks(video, tmp / 'clip', mirror)
+        try:
+            os.replace(tmp, lm_dir)  # 完整写完后再放入缓存, 中断不会留下半成品
+        except OSError:
+            # 同内容的视频已由其他进程放入缓存 (目录非空时 Linux 报 ENOTEMPTY, Windows 报
+            # FileExistsError/PermissionError); 缓存按内容寻址, 丢弃本次结果即可
+            if not index.exists():
+                raise
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    timestamps, landmarks, meta = load_landmarks(index)
+    features = calculate_features_batch(landmarks, meta['frame_size'], workers=1)
+    feature_path = Path(feature_path)
+    tmp = feature_path.with_name(f'{feature_path.name}.{os.getpid()}.partial')
+    write_recording(tmp, timestamps, FEATURE_CHANNELS, features)
+    os.replace(tmp, feature_path)
+    return {'frames': int(meta['frames']), 'video_frames': total, 'seconds': time.perf_counter() - t0}
+
+def main():
+    args = parse_args()
+    output = Path(args.output)
+    lm_cache = output / 'cache' / 'landmarks'
+    feature_cache = output / 'cache' / 'features'
+    lm_cache.mkdir(parents=True, exist_ok=True)
+    feature_cache.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(output / MANIFEST_NAME)
+    mirror = not args.no_mirror
+
+    videos = [v for v in collect_videos(args.inputs) if v.exists()]
+    if not videos:
+        raise SystemExit("No videos found")
+
+    # 内容哈希 (I/O 为主, 用线程并行); 大小与修改时间未变时沿用清单中的哈希
+    def hash_video(video):
+        return video, manifest.cached_hash(video) or file_hash(video)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        hashes = dict(pool.map(hash_video, videos))
+
+    lm_settings = settings_hash(landmark_settings(mirror))
+    ft_settings = settings_hash(feature_settings())
+    jobs, outputs, scheduled = {}, {}, set()
+    cached = 0
+    for video in videos:
+        digest = hashes[video]
+        lm_key = f"{digest[:16]}_{lm_settings}"
+        ft_key = f"{lm_key}_{ft_settings}"
+        stat = video.stat()
+        manifest.clips.setdefault(str(video), {}).update(
+            hash=digest, size=stat.st_size, mtime=stat.st_mtime, landmarks_key=lm_key, features_key=ft_key)
+        outputs[video] = output / f"{video.stem}_{digest[:8]}.csv"
+        feature_path = feature_cache / f"{ft_key}.csv"
+        if args.force:
+            shutil.rmtree(lm_cache / lm_key, ignore_errors=True)
+            feature_path.unlink(missing_ok=True)
+        if feature_path.exists():
+            cached += 1
+            continue
+        if ft_key in scheduled:
+            continue  # 内容相同的视频已在队列中
+        scheduled.add(ft_key)
+        jobs[video] = (str(video), str(lm_cache / lm_key), str(feature_path), mirror)
+    manifest.save()
+
+    print(f"{len(videos)} videos, {cached} cached, {len(jobs)} to process")
+    workers = args.workers or max((os.cpu_count() or 2) // 2, 1)
+    failed = 0
+    t0 = time.perf_counter()
+    if jobs:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = {pool.submit(process_clip, *job): video for video, job in jobs.items()}
+            for done, future in enumerate(as_completed(futures), 1):
+                video = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    manifest.update(video, status='failed', error=str(e))
+                    print(f"[{done}/{len(jobs)}] FAILED {video.name}: {str(e)}")
+                    continue
+                manifest.update(video, status='done', error=None, **result)
+                print(f"[{done}/{len(jobs)}] {video.name}: {result['frames']} frames in {result['seconds']:.1f}s")
+
+    # 将缓存中的特征复制到输出目录 (按视频名 + 哈希前缀命名, 避免重名覆盖)
+    for video in videos:
+        entry = manifest.clips[str(video)]
+        feature_path = feature_cache / f"{entry['features_key']}.csv"
+        if feature_path.exists():
+            shutil.copyfile(feature_path, outputs[video])
+            entry.update(status='done', output=str(outputs[video]))
+    manifest.save()
+    print(f"Finished in {time.perf_counter() - t0:.1f}s: {len(jobs) - failed} processed, "
+          f"{cached} cached, {failed} failed -> {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""不依赖 Blender 的接收端插件性能基准
+
+python -m tools.bench_addon --packets 20000 --frames 1000 10000 100000
+
+用 tools/bpy_stub 替代 bpy/mathutils 导入 addons.py, 以合成数据驱动
+udp_listener、process_data、apply_facial_data、parse_recording_data 与烘焙,
+输出每秒包数、每包开销 (含属性写入/关键帧调用次数)、烘焙耗时随帧数的变化,
+以及默认容差下关键帧精简的实测倍数 (keys / 精简后 keys)。
+"""
+import argparse
+import collections
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import numpy as np
+from face_constants import FEATURE_CHANNELS
+from tools import bpy_stub
+from tools.loadgen import SyntheticFace
+from utils.network import UDPTransmitter
+from utils.recording import write_recording
+
+bpy = bpy_stub.install()
+import addons  # noqa: E402  需要先安装 bpy 替身
+
+FLOW_WINDOW = 128  # 发送端领先接收端的最大包数, 避免超出内核接收缓冲区
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mozi's Facecap Addon Benchmark")
+    parser.add_argument('--packets', type=int, default=20000, help='Synthetic packets per receive benchmark')
+    parser.add_argument('--frames', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Recording lengths (frames) for the parse and bake benchmarks')
+    parser.add_argument('--delta', action='store_true', help='Use dead-band delta packets')
+    parser.add_argument('--fps', type=float, default=30.0, help='Recording and scene frame rate')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic face')
+    parser.add_argument('--per_tick', type=int, default=4,
+                        help='Packets queued per process_data call (a burst is posed/keyed once)')
+    args = parser.parse_args()
+    if args.per_tick <= 0:
+        parser.error('--per_tick must be positive')
+    return args
+
+def synthetic_values(count, fps, seed):
+    """(count, channels) 的平滑合成特征, 按 fps 采样"""
+    face = SyntheticFace(1, np.random.default_rng(seed))
+    return np.stack([face.sample(i / fps)[0] for i in range(count)])
+
+def capture_packets(values, delta):
+    """经 UDPTransmitter 编码合成特征并在本地收回, 得到实际发送的字节"""
+    capture = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    capture.bind(('127.0.0.1', 0))
+    capture.settimeout(1.0)
+    transmitter = UDPTransmitter(*capture.getsockname(), delta=delta, destinations=[])
+    packets = []
+    try:
+        for start in range(0, len(values), FLOW_WINDOW):
+            block = values[start:start + FLOW_WINDOW]
+            skipped = transmitter.skipped
+            for row in block.tolist():
+                transmitter.send(dict(zip(FEATURE_CHANNELS, row)))
+            # 无变化的增量帧不发送
+            packets += [capture.recv(4096) for _ in range(len(block) - transmitter.skipped + skipped)]
+    finally:
+        transmitter.close()
+        capture.close()
+    return packets
+
+def make_armature():
+    return bpy_stub.Object(addons.BASE_ARMATURE_NAME, addons.controls.values())
+
+def make_scene(fps):
+    sc = bpy_stub.make_scene(fps)
+    sc.fpc_active_armature = make_armature()
+    bpy.context.scene = sc
+    return sc
+
+def bench_listener(packets):
+    """真实 socket 上运行 udp_listener, 发送端按 FLOW_WINDOW 流控, 测接收线程吞吐"""
+    listen = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    listen.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+    listen.bind(('127.0.0.1', 0))
+    listen.setblocking(False)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    addr = listen.getsockname()
+
+    addons.data_queue = collections.deque(maxlen=len(packets))
+    addons.receiver_stats.reset()
+    addons.is_receiving = True
+    thread = threading.Thread(target=addons.udp_listener, args=(listen, False), daemon=True)
+    thread.start()
+    queue = addons.data_queue
+    start = time.perf_counter()
+    try:
+        for i, data in enumerate(packets):
+            while i - len(queue) > FLOW_WINDOW:
+                time.sleep(0)
+            sender.sendto(data, addr)
+        deadline = time.perf_counter() + 2.0
+        while len(queue) < len(packets) and time.perf_counter() < deadline:
+            time.sleep(0.001)
+    finally:
+        addons.is_receiving = False
+        thread.join()
+        listen.close()
+        sender.close()
+
+    received = len(queue)
+    elapsed = (queue[-1][0] - start) if received else 0.0
+    stats = addons.receiver_stats.snapshot()
+    return {'received': received, 'seconds': elapsed, 'bytes': stats['bytes'], 'errors': stats['errors']}
+
+def bench_process(sc, infos, per_tick, auto_key=False, take=False):
+    """按插件计时器的方式处理: 每次调用 process_data 前放入 per_tick 个包, 返回 (秒, 调用计数)"""
+    addons.channel_state.clear()
+    addons.active_take = addons.TakeRecorder(sc.frame_current) if take else None
+    sc.tool_settings.use_keyframe_insert_auto = auto_key
+    now = time.perf_counter()
+    items = [(now, info) for info in infos]
+    addons.data_queue = collections.deque(maxlen=len(infos))
+    bpy_stub.calls.clear()
+    start = time.perf_counter()
+    for i in range(0, len(items), per_tick):
+        addons.data_queue.extend(items[i:i + per_tick])
+        addons.process_data()
+    elapsed = time.perf_counter() - start
+    addons.active_take = None
+    return elapsed, dict(bpy_stub.calls)
+
+def bench_apply(sc, values):
+    """每行一次完整更新 (无 changed 过滤)"""
+    armature = sc.fpc_active_armature
+    rows = [dict(zip(FEATURE_CHANNELS, row)) for row in values.tolist()]
+    bpy_stub.calls.clear()
+    start = time.perf_counter()
+    for info in rows:
+        addons.apply_facial_data(sc, armature, info, sc.frame_current, auto_key=False)
+    return time.perf_counter() - start, dict(bpy_stub.calls)
+
+def bench_bake(sc, path, smooth='NONE', reduce=False):
+    sc.fpc_record_file = path
+    sc.fpc_bake_smooth = smooth
+    sc.fpc_bake_reduce = reduce
+    sc.fpc_active_armature = make_armature()
+    operator = addons.FPC_OT_BakeRecording()
+    bpy_stub.calls.clear()
+    start = time.perf_counter()
+    result = operator.execute(type('Context', (), {'scene': sc})())
+    elapsed = time.perf_counter() - start
+    if result != {'FINISHED'}:
+        raise RuntimeError(f"Bake failed: {operator.last_report[1]}")
+    return elapsed, bpy_stub.calls['keys_written']
+
+def per_packet(name, seconds, count, calls=None):
+    us = seconds * 1e6 / count if count else 0.0
+    rate = count / seconds if seconds > 0 else float('inf')
+    line = f"{name:<28}{rate:>12.0f}{us:>10.2f}"
+    if calls is not None:
+        line += (f"{calls.get('property_write', 0) / count:>9.1f}"
+                 f"{calls.get('keyframe_insert', 0) / count:>9.1f}")
+    return line
+
+def main():
+    args = parse_args()
+    addons.register()
+    sc = make_scene(args.fps)
+    values = synthetic_values(args.packets, args.fps, args.seed)
+    packets = capture_packets(values, args.delta)
+    size = sum(len(p) for p in packets) / len(packets)
+    print(f"{len(packets)} {'delta' if args.delta else 'full'} packets, {size:.0f} bytes on average")
+
+    print(f"\n{'Receive path':<28}{'pkt/s':>12}{'us/pkt':>10}{'writes':>9}{'keys':>9}")
+    listener = bench_listener(packets)
+    print(per_packet("udp_listener", listener['seconds'], listener['received'])
+          + f"   ({len(packets) - listener['received']} lost, {listener['errors']} errors)")
+    infos = [json.loads(p) for p in packets]
+    seconds, calls = bench_process(sc, infos, args.per_tick)
+    print(per_packet(f"process_data ({args.per_tick}/tick)", seconds, len(infos), calls))
+    seconds, calls = bench_process(sc, infos, args.per_tick, auto_key=True)
+    print(per_packet("process_data (auto key)", seconds, len(infos), calls))
+    seconds, calls = bench_process(sc, infos, args.per_tick, take=True)
+    print(per_packet("process_data (take)", seconds, len(infos), calls))
+    seconds, calls = bench_apply(sc, values)
+    print(per_packet("apply_facial_data (full)", seconds, len(values), calls))
+
+    print(f"\n{'Frames':>8}{'parse (s)':>11}{'bake (s)':>10}{'keys':>10}"
+          f"{'bake+reduce (s)':>17}{'keys':>10}{'reduction':>11}{'us/frame':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for frames in args.frames:
+            path = os.path.join(tmp, f"bench_{frames}.csv")
+            recording = synthetic_values(frames, args.fps, args.seed)
+            write_recording(path, np.arange(frames) / args.fps, FEATURE_CHANNELS, recording)
+
+            start = time.perf_counter()
+            rows = addons.parse_recording_data(path)
+            parse = time.perf_counter() - start
+            if len(rows) != frames:
+                raise RuntimeError(f"Parsed {len(rows)} of {frames} rows")
+            bake, keys = bench_bake(sc, path)
+            reduced, reduced_keys = bench_bake(sc, path, smooth='BUTTERWORTH', reduce=True)
+            print(f"{frames:>8}{parse:>11.3f}{bake:>10.3f}{keys:>10}"
+                  f"{reduced:>17.3f}{reduced_keys:>10}{keys / max(reduced_keys, 1):>10.1f}x"
+                  f"{bake * 1e6 / frames:>10.2f}")
+    addons.unregister()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""Blender (bpy / mathutils) 的轻量替身, 在没有 Blender 的环境中导入并驱动 addons.py
+
+只实现接收端插件用到的接口; 属性写入、关键帧插入和 F-curve 批量写入计入 calls,
+供 tools/bench_addon.py 统计每个包/每帧的 Blender 端开销。
+"""
+import os
+import sys
+import types
+from collections import Counter
+import numpy as np
+
+calls = Counter()
+
+class Vector(tuple):
+    def __new__(cls, values=(0.0, 0.0, 0.0)):
+        return super().__new__(cls, values)
+
+    def __add__(self, other):
+        return Vector(a + b for a, b in zip(self, other))
+
+class TrackedArray(list):
+    """骨骼的 scale/location 等数组属性, 按分量写入也计为一次属性写入"""
+    def __setitem__(self, index, value):
+        calls['property_write'] += 1
+        super().__setitem__(index, value)
+
+class PoseBone:
+    ARRAYS = ('scale', 'location', 'rotation_euler')
+
+    def __init__(self, name):
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'rotation_mode', 'QUATERNION')
+        object.__setattr__(self, 'scale', TrackedArray((1.0, 1.0, 1.0)))
+        object.__setattr__(self, 'location', TrackedArray((0.0, 0.0, 0.0)))
+        object.__setattr__(self, 'rotation_euler', TrackedArray((0.0, 0.0, 0.0)))
+
+    def __setattr__(self, name, value):
+        calls['property_write'] += 1
+        object.__setattr__(self, name, TrackedArray(value) if name in self.ARRAYS else value)
+
+    def keyframe_insert(self, data_path, index=-1, frame=None, **kwargs):
+        calls['keyframe_insert'] += 1
+        return True
+
+class KeyframePoints:
+    """关键帧以数组保存: co 为 (N, 2), interpolation 为枚举值 (新关键帧默认 BEZIER=2)"""
+    def __init__(self):
+        self.co = np.empty((0, 2), dtype=np.float32)
+        self.interpolation = np.empty(0, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.co)
+
+    def add(self, count):
+        self.co = np.concatenate([self.co, np.zeros((count, 2), dtype=np.float32)])
+        self.interpolation = np.concatenate([self.interpolation, np.full(count, 2, dtype=np.int32)])
+
+    def clear(self):
+        self.co = self.co[:0]
+        self.interpolation = self.interpolation[:0]
+
+    def foreach_set(self, attr, seq):
+        calls['foreach_set'] += 1
+        if attr == 'co':
+            calls['keys_written'] += len(self.co)
+        target = getattr(self, attr)
+        target[...] = np.asarray(seq, dtype=target.dtype).reshape(target.shape)
+
+    def foreach_get(self, attr, seq):
+        seq[:] = getattr(self, attr).ravel()
+
+class FCurve:
+    def __init__(self, data_path, index=0, action_group=''):
+        self.data_path = data_path
+        self.array_index = index
+        self.group = action_group
+        self.keyframe_points = KeyframePoints()
+
+    def update(self):
+        calls['fcurve_update'] += 1
+
+class FCurves(list):
+    def find(self, data_path, index=0):
+        for fcurve in self:
+            if fcurve.data_path == data_path and fcurve.array_index == index:
+                return fcurve
+        return None
+
+    def new(self, data_path, index=0, action_group=''):
+        fcurve = FCurve(data_path, index, action_group)
+        self.append(fcurve)
+        return fcurve
+
+class Action:
+    def __init__(self, name):
+        self.name = name
+        self.fcurves = FCurves()
+
+class Actions(list):
+    def new(self, name):
+        action = Action(name)
+        self.append(action)
+        return action
+
+class Object:
+    def __init__(self, name, bone_names=()):
+        self.name = name
+        self.type = 'ARMATURE'
+        self.pose = types.SimpleNamespace(bones={name: PoseBone(name) for name in bone_names})
+        self.animation_data = None
+
+    def animation_data_create(self):
+        self.animation_data = types.SimpleNamespace(action=None)
+        return self.animation_data
+
+class Property:
+    """bpy.props.*Property 的返回值, 只保留默认值"""
+    DEFAULTS = {'StringProperty': '', 'IntProperty': 0, 'FloatProperty': 0.0,
+                'BoolProperty': False, 'PointerProperty': None, 'EnumProperty': None}
+
+    def __init__(self, kind, **kwargs):
+        default = kwargs.get('default', self.DEFAULTS[kind])
+        if kind == 'EnumProperty' and default is None:
+            default = kwargs['items'][0][0]
+        self.default = default
+
+class Timers:
+    def __init__(self):
+        self.registered = []
+
+    def register(self, func, **kwargs):
+        self.registered.append(func)
+
+    def unregister(self, func):
+        self.registered.remove(func)
+
+    def is_registered(self, func):
+        return func in self.registered
+
+def install():
+    """注册 bpy / bpy.types / bpy.props / bpy_extras / mathutils 替身模块, 返回 bpy"""
+    bpy = types.ModuleType('bpy')
+    bpy_types = types.ModuleType('bpy.types')
+    for name in ('Operator', 'Panel', 'Scene'):
+        setattr(bpy_types, name, type(name, (), {}))
+    bpy_types.Operator.report = lambda self, level, message: setattr(self, 'last_report', (level, message))
+    bpy_types.Object = Object
+    bpy_props = types.ModuleType('bpy.props')
+    for kind in Property.DEFAULTS:
+        setattr(bpy_props, kind, lambda kind=kind, **kwargs: Property(kind, **kwargs))
+    bpy.types, bpy.props = bpy_types, bpy_props
+    bpy.utils = types.SimpleNamespace(register_class=lambda cls: None, unregister_class=lambda cls: None)
+    bpy.app = types.SimpleNamespace(timers=Timers())
+    bpy.path = types.SimpleNamespace(abspath=os.path.abspath)
+    bpy.data = types.SimpleNamespace(actions=Actions())
+    bpy.context = types.SimpleNamespace(scene=None, window_manager=types.SimpleNamespace(windows=[]))
+    bpy.ops = types.SimpleNamespace()
+
+    io_utils = types.ModuleType('bpy_extras.io_utils')
+    io_utils.ImportHelper = type('ImportHelper', (), {})
+    bpy_extras = types.ModuleType('bpy_extras')
+    bpy_extras.io_utils = io_utils
+    mathutils = types.ModuleType('mathutils')
+    mathutils.Vector = Vector
+
+    sys.modules.update({'bpy': bpy, 'bpy.types': bpy_types, 'bpy.props': bpy_props,
+                        'bpy_extras': bpy_extras, 'bpy_extras.io_utils': io_utils, 'mathutils': mathutils})
+    return bpy
+
+def make_scene(fps=30):
+    """按插件注册的场景属性默认值构造场景 (需先调用 addons.register())"""
+    scene_type = sys.modules['bpy.types'].Scene
+    scene = scene_type()
+    for name, value in vars(scene_type).items():
+        if isinstance(value, Property):
+            setattr(scene, name, value.default)
+    scene.frame_current = 1
+    scene.render = types.SimpleNamespace(fps=fps, fps_base=1.0)
+    scene.tool_settings = types.SimpleNamespace(use_keyframe_insert_auto=False)
+    return scene
@@ -0,0 +1,106 @@
+"""合成多路面部数据流, 用于测试接收端的承载能力
+
+python -m tools.loadgen --subjects 4 --rate 60 --ports 2 --duration 30
+"""
+import argparse
+import time
+import numpy as np
+from face_constants import FEATURE_CHANNELS, feature_group
+from utils.network import UDPTransmitter
+
+# 各分组的 (中心值, 幅度), 与实际捕捉数据的量级相当
+CHANNEL_RANGES = {
+    'head': (0.0, 15.0),
+    'eyelids': (0.25, 0.15),
+    'pupils': (0.0, 0.02),
+    'mouth': (0.05, 0.05),
+    'brows': (0.0, 0.1),
+    'teeth': (0.1, 0.1),
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mozi's Facecap Load Generator")
+    parser.add_argument('--udp_ip', type=str, default='127.0.0.1', help='UDP Destination IP')
+    parser.add_argument('--udp_port', type=int, default=12345, help='First UDP port')
+    parser.add_argument('--ports', type=int, default=1, help='Number of consecutive ports to spread subjects over')
+    parser.add_argument('--subjects', type=int, default=1, help='Number of simultaneous synthetic streams')
+    parser.add_argument('--rate', type=float, default=60.0, help='Packets per second per subject')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run (0 = until interrupted)')
+    parser.add_argument('--delta', action='store_true', help='Send only changed channels (dead-band delta encoding)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible streams')
+    args = parser.parse_args()
+    if args.rate <= 0:
+        parser.error('--rate must be positive')
+    if args.subjects <= 0:
+        parser.error('--subjects must be positive')
+    return args
+
+class SyntheticFace:
+    """用若干正弦叠加生成平滑的随机运动, 所有主体/通道一次向量化计算"""
+    def __init__(self, subjects, rng, components=3):
+        shape = (subjects, len(FEATURE_CHANNELS), components)
+        self.freqs = rng.uniform(0.1, 2.0, shape)
+        self.phases = rng.uniform(0, 2 * np.pi, shape)
+        ranges = np.array([CHANNEL_RANGES[feature_group(k)] for k in FEATURE_CHANNELS])
+        self.center = ranges[:, 0]
+        self.amplitude = ranges[:, 1]
+
+    def sample(self, t):
+        """返回 (subjects, channels) 的特征值"""
+        wave = np.sin(2 * np.pi * self.freqs * t + self.phases).mean(axis=2)
+        return self.center + self.amplitude * wave
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    face = SyntheticFace(args.subjects, rng)
+
+    transmitters = [
+        UDPTransmitter(args.udp_ip, args.udp_port + i % max(args.ports, 1), delta=True if args.delta else None)
+        for i in range(args.subjects)
+    ]
+    print(f"Sending {args.subjects} subject(s) at {args.rate:g} Hz to "
+          f"{args.udp_ip}:{args.udp_port}-{args.udp_port + max(args.ports, 1) - 1}")
+
+    interval = 1.0 / args.rate
+    sent = errors = 0
+    report_sent = report_errors = 0
+    start = report_time = time.perf_counter()
+    next_tick = start
+    try:
+        while not args.duration or time.perf_counter() - start < args.duration:
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -interval:
+                next_tick = time.perf_counter()  # 跟不上时不补发, 避免突发
+            next_tick += interval
+
+            values = face.sample(time.perf_counter() - start)
+            for transmitter, row in zip(transmitters, values.tolist()):
+                # 发送错误由 Fanout 计数并限频打印
+                if transmitter.send(dict(zip(FEATURE_CHANNELS, row))):
+                    errors += 1
+                else:
+                    sent += 1
+
+            now = time.perf_counter()
+            if now - report_time >= 1.0:
+                rate = (sent - report_sent) / (now - report_time)
+                print(f"{rate:8.1f} pkt/s total, {rate / args.subjects:6.1f} pkt/s per subject, "
+                      f"{errors - report_errors} errors")
+                report_time, report_sent, report_errors = now, sent, errors
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for transmitter in transmitters:
+            transmitter.close()
+
+    elapsed = time.perf_counter() - start
+    sent -= sum(transmitter.skipped for transmitter in transmitters)  # 无变化的增量帧未发送
+    target = args.rate * args.subjects
+    print(f"Sent {sent} packets in {elapsed:.1f}s: {sent / elapsed:.1f} pkt/s "
+          f"(target {target:g}), {errors} socket errors")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""从原始关键点录制重新计算特征, 生成CSV录制 (无需重新运行MediaPipe)
+
+python -m tools.rederive recordings/recording_xxx_landmarks.json -o recordings/recording_xxx_rederived.csv
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from face_constants import FEATURE_CHANNELS
+from models.face_utils import calculate_features_batch
+from utils.recording import load_landmarks, write_recording
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mozi's Facecap Feature Re-derivation")
+    parser.add_argument('landmarks', type=str, help='Landmark recording index (.json) or _landmarks.npy')
+    parser.add_argument('-o', '--output', type=str, default=None, help='Output CSV (default: <name>_rederived.csv)')
+    parser.add_argument('--calibration', type=str, default=None, help='Facial calibration file (default: current)')
+    parser.add_argument('--head_calibration', type=str, default=None, help='Head calibration file (default: current)')
+    parser.add_argument('--workers', type=int, default=None, help='Threads for head pose solving')
+    return parser.parse_args()
+
+def _load_json(path):
+    if path is None:
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def main():
+    args = parse_args()
+    t0 = time.perf_counter()
+    timestamps, landmarks, meta = load_landmarks(args.landmarks)
+    if not len(landmarks):
+        raise SystemExit(f"Landmark recording is empty: {args.landmarks}")
+
+    features = calculate_features_batch(
+        landmarks, meta['frame_size'],
+        calib=_load_json(args.calibration),
+        head_calib=_load_json(args.head_calibration),
+        workers=args.workers
+    )
+
+    output = args.output
+    if output is None:
+        stem = Path(args.landmarks).with_suffix('').name.removesuffix('_landmarks')
+        output = Path(args.landmarks).parent / f"{stem}_rederived.csv"
+    write_recording(output, timestamps, FEATURE_CHANNELS, features)
+    print(f"Re-derived {len(features)} frames in {time.perf_counter() - t0:.2f}s -> {output}")
+
+if __name__ == '__main__':
+    main()
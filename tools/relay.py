@@ -0,0 +1,81 @@
+"""UDP中继: 接收一路特征流并转发给多个接收端, 可按接收端限速和过滤通道
+
+未过滤、未限速的接收端直接转发原始字节, 不做任何解码和编码。
+
+python -m tools.relay --listen_port 12345 --dest 192.168.1.20:12345 --dest 127.0.0.1:12350
+"""
+import argparse
+import json
+import socket
+import time
+from config.settings import CONFIG
+from utils.network import Fanout, parse_destination
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mozi's Facecap Relay")
+    parser.add_argument('--listen_ip', type=str, default='0.0.0.0', help='Address to receive the stream on')
+    parser.add_argument('--listen_port', type=int, default=12345, help='Port to receive the stream on')
+    parser.add_argument('--dest', action='append', default=[], metavar='IP:PORT',
+                        help='Destination (repeatable); defaults to network.destinations in config.yaml')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    specs = args.dest or CONFIG.get('network', {}).get('destinations') or []
+    destinations = [parse_destination(spec) for spec in specs]
+    if not destinations:
+        raise SystemExit("No destinations, use --dest IP:PORT or network.destinations in config.yaml")
+
+    listen = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    listen.bind((args.listen_ip, args.listen_port))
+    listen.settimeout(1.0)  # 定期返回, 便于 Ctrl+C 退出
+    out = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    fanout = Fanout(out, destinations)
+    decode = any(d.channels is not None or d.limited for d in destinations)
+    print(f"Relaying {args.listen_ip}:{args.listen_port} -> "
+          + ", ".join(f"{d.addr[0]}:{d.addr[1]}" for d in destinations))
+
+    state = {}  # 合并增量包后的完整状态, 供限速的接收端使用
+    received = errors = 0
+    report_received, report_time = 0, time.perf_counter()
+    try:
+        while True:
+            try:
+                data, _ = listen.recvfrom(65536)
+            except socket.timeout:
+                data = None
+            except OSError as e:
+                # Windows 下对端关闭会触发 ConnectionResetError
+                print(f"Receive error: {str(e)}")
+                data = None
+
+            if data is not None:
+                received += 1
+                info = None
+                if decode:
+                    try:
+                        info = json.loads(data)
+                    except ValueError:
+                        errors += 1
+                        continue
+                    if not isinstance(info, dict):
+                        errors += 1  # 合法 JSON 但不是特征包 (数组、数字等)
+                        continue
+                    if not info.get('_delta'):
+                        state.clear()
+                    state.update((k, v) for k, v in info.items() if not k.startswith('_'))
+                errors += fanout.send(info, full=state, raw=data)
+
+            now = time.perf_counter()
+            if now - report_time >= 5.0:
+                rate = (received - report_received) / (now - report_time)
+                print(f"{rate:8.1f} pkt/s in, {errors} errors")
+                report_received, report_time = received, now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listen.close()
+        out.close()
+
+if __name__ == '__main__':
+    main()
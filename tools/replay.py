@@ -0,0 +1,66 @@
+"""回放录制文件到UDP, 无需摄像头即可驱动Blender接收端
+
+python -m tools.replay recordings/recording_xxx.csv --speed 2 --loop
+"""
+import argparse
+import time
+from utils.network import UDPTransmitter
+from utils.recording import load_recording
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mozi's Facecap Recording Replay")
+    parser.add_argument('recording', type=str, help='CSV recording to replay')
+    parser.add_argument('--udp_ip', type=str, default='127.0.0.1', help='UDP Destination IP')
+    parser.add_argument('--udp_port', type=int, default=12345, help='UDP port')
+    parser.add_argument('--speed', type=float, default=1.0, help='Playback speed multiplier (1 = original timing)')
+    parser.add_argument('--fast', action='store_true', help='Send as fast as possible, ignoring timestamps')
+    parser.add_argument('--loop', action='store_true', help='Loop the recording until interrupted')
+    parser.add_argument('--delta', action='store_true', help='Send only changed channels (dead-band delta encoding)')
+    return parser.parse_args()
+
+def replay(transmitter, timestamps, channels, values, speed=1.0, fast=False):
+    """按原始时间轴(或倍速)发送一遍录制数据, 返回 (发送包数, 发送错误数)"""
+    sent, errors = 0, 0
+    skipped = transmitter.skipped
+    start = time.perf_counter()
+    offsets = (timestamps - timestamps[0]) / speed if len(timestamps) else timestamps
+
+    for i, row in enumerate(values):
+        if not fast:
+            delay = start + offsets[i] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        # 发送错误由 Fanout 计数并限频打印
+        if transmitter.send(dict(zip(channels, row.tolist()))):
+            errors += 1
+        else:
+            sent += 1
+    return sent - (transmitter.skipped - skipped), errors  # 无变化的增量帧未发送
+
+def main():
+    args = parse_args()
+    if args.speed <= 0:
+        raise SystemExit("--speed must be positive (use --fast for unthrottled replay)")
+
+    timestamps, channels, values = load_recording(args.recording)
+    if not len(values):
+        raise SystemExit(f"Recording is empty: {args.recording}")
+    duration = timestamps[-1] - timestamps[0]
+    print(f"Loaded {len(values)} frames ({duration:.1f}s, {len(channels)} channels) from {args.recording}")
+
+    transmitter = UDPTransmitter(args.udp_ip, args.udp_port, delta=True if args.delta else None)
+    try:
+        while True:
+            t0 = time.perf_counter()
+            sent, errors = replay(transmitter, timestamps, channels, values, args.speed, args.fast)
+            elapsed = time.perf_counter() - t0
+            print(f"Sent {sent} packets in {elapsed:.2f}s ({sent / max(elapsed, 1e-9):.1f} pkt/s, {errors} errors)")
+            if not args.loop:
+                break
+    except KeyboardInterrupt:
+        print("Replay interrupted")
+    finally:
+        transmitter.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""对CSV录制做离线零相位滤波 (烘焙前去抖, 无相位滞后)
+
+python -m tools.smooth_recording recordings/recording_xxx.csv --method butterworth --cutoff 6
+"""
+import argparse
+import time
+from pathlib import Path
+from config.settings import CONFIG
+from models.offline_filter import METHODS, estimate_fs, smooth_recording
+from utils.recording import load_recording, write_recording
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mozi's Facecap Offline Smoothing")
+    parser.add_argument('recording', type=str, help='CSV recording to smooth')
+    parser.add_argument('-o', '--output', type=str, default=None, help='Output CSV (default: <name>_smoothed.csv)')
+    parser.add_argument('--method', choices=METHODS, default=None, help='Override the method for all channels')
+    parser.add_argument('--cutoff', type=float, default=None, help='Butterworth cutoff frequency (Hz)')
+    parser.add_argument('--order', type=int, default=None, help='Butterworth order (even)')
+    parser.add_argument('--window', type=int, default=None, help='Savitzky-Golay window (frames, odd)')
+    parser.add_argument('--polyorder', type=int, default=None, help='Savitzky-Golay polynomial order')
+    parser.add_argument('--alpha', type=float, default=None, help='Exponential smoothing factor')
+    return parser.parse_args()
+
+def build_config(args):
+    """命令行参数覆盖配置文件; 指定 --method 时忽略分组覆盖"""
+    config = dict(CONFIG.get('offline_smoothing', {}))
+    overrides = {k: getattr(args, k) for k in ('method', 'cutoff', 'order', 'window', 'polyorder', 'alpha')
+                 if getattr(args, k) is not None}
+    if overrides:
+        config.update(overrides)
+        config['channels'] = {}
+    return config
+
+def main():
+    args = parse_args()
+    t0 = time.perf_counter()
+    timestamps, channels, values = load_recording(args.recording)
+    if not len(values):
+        raise SystemExit(f"Recording is empty: {args.recording}")
+
+    fs = estimate_fs(timestamps)
+    smoothed = smooth_recording(channels, values, fs, build_config(args))
+
+    output = args.output or Path(args.recording).with_name(f"{Path(args.recording).stem}_smoothed.csv")
+    write_recording(output, timestamps, channels, smoothed)
+    print(f"Smoothed {len(values)} frames ({fs:.1f} Hz) in {time.perf_counter() - t0:.2f}s -> {output}")
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,85 @@
 import cv2
+import time
 import platform
+import collections
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from config.settings import CONFIG
 
+# 解码缩放倍数 -> imdecode 标志 (libjpeg 在 DCT 阶段直接缩小, 比先解码再缩放快得多)
+REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+class MJPEGDecoder:
+    """在线程池中并行解码摄像头的 MJPG 压缩帧, 按采集顺序返回
+
+    采集端关闭 CAP_PROP_CONVERT_RGB 后 cap.read() 只取出压缩数据; 每次 read()
+    提交一帧新数据并返回最早提交的一帧, 解码 (imdecode 释放 GIL) 与等待下一帧、
+    主循环推理并行。代价是 workers - 1 帧的额外延迟。
+    """
+    def __init__(self, cap, workers=2, scale=1):
+        self.cap = cap
+        self.flags = REDUCED_FLAGS[scale]
+        self.depth = max(int(workers), 1)
+        self.pool = ThreadPoolExecutor(max_workers=self.depth, thread_name_prefix='mjpeg')
+        self.pending = collections.deque()  # (采集时间, future), 先进先出保证顺序
+        # 镜像输出缓冲区: 排队中的帧各占一个, 调用方持有一个
+        self._buffers = collections.deque([None] * (self.depth + 1))
+
+    def _decode(self, data, dst):
+        image = cv2.imdecode(data, self.flags)
+        if image is None:
+            return None  # 损坏的帧 (USB 传输错误时偶尔出现)
+        return cv2.flip(image, 1, dst=dst if dst is not None and dst.shape == image.shape else None)
+
+    def _submit(self):
+        ok, data = self.cap.read()
+        if not ok:
+            return False
+        dst = self._buffers.popleft()
+        self.pending.append((time.time(), self.pool.submit(self._decode, data, dst)))
+        return True
+
+    @staticmethod
+    def _wait_decoded(future):
+        """等待解码完成; 单独成函数, 性能分析时计入 convert 阶段"""
+        return future.result()
+
+    def read(self):
+        """返回 (采集时间, 镜像后的帧), 视频结束时返回 (None, None)"""
+        while True:
+            while len(self.pending) < self.depth and self._submit():
+                pass
+            if not self.pending:
+                return None, None
+            timestamp, future = self.pending.popleft()
+            frame = self._wait_decoded(future)
+            self._buffers.append(frame)
+            if frame is not None:
+                return timestamp, frame
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.pending.clear()
+
 class CameraManager:
     def __init__(self, source):
         self.source = source
         self.cap = None
+        self._raw = None  # 复用的采集缓冲区
+        self._frame = None  # 复用的镜像输出缓冲区
+        self.decoder = None  # MJPEGDecoder (camera.mjpeg_decode 启用时)
+        self.scale = 1
+        self.frame_time = None  # 最近一次返回的帧的采集时间 (time.time())
         self._init_opencl()
         self._init_camera()
         self._detect_best_settings()
+        self._init_decoder()
+        self._select_acceleration()
     
     # 添加上下文管理器支持
     def __enter__(self):
@@ -18,15 +89,66 @@ class CameraManager:
         self.release()
 
     def _init_opencl(self):
-        """初始化OpenCL加速"""
+        """初始化OpenCL加速 (enable: auto 时由 _select_acceleration 实测决定)"""
         if CONFIG['hardware_acceleration']['enable']:
             if cv2.ocl.haveOpenCL():
                 cv2.ocl.setUseOpenCL(True)
-                print("OpenCL acceleration enabled")
+                if CONFIG['hardware_acceleration']['enable'] is True:
+                    print("OpenCL acceleration enabled")
             else:
                 print("OpenCL not available, using CPU")
                 CONFIG['hardware_acceleration']['enable'] = False
 
+    def _select_acceleration(self, repeat=20):
+        """按当前分辨率对 BGR->RGB 转换做微基准, 选择更快的 CPU 或 OpenCL 路径"""
+        hw = CONFIG['hardware_acceleration']
+        if hw['enable'] != 'auto':
+            return
+        frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        rgb = np.empty_like(frame)
+
+        def cpu():
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+
+        def opencl():
+            cv2.cvtColor(cv2.UMat(frame), cv2.COLOR_BGR2RGB).get()
+
+        timings = {}
+        for name, fn in (('cpu', cpu), ('opencl', opencl)):
+            fn()  # 预热 (OpenCL 首次调用会编译内核)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                fn()
+            timings[name] = (time.perf_counter() - start) / repeat
+
+        hw['enable'] = timings['opencl'] < timings['cpu']
+        cv2.ocl.setUseOpenCL(hw['enable'])
+        print(f"Preprocessing: {'OpenCL' if hw['enable'] else 'CPU'} "
+              f"(cpu {timings['cpu'] * 1000:.2f} ms, opencl {timings['opencl'] * 1000:.2f} ms)")
+
+    def _init_decoder(self):
+        """MJPG 格式下改为取压缩帧并行解码; 后端不支持输出压缩数据时保持原路径"""
+        cfg = CONFIG['camera'].get('mjpeg_decode', {})
+        if not cfg.get('enable', False):
+            return
+        if self._get_fourcc() != 'MJPG':
+            print(f"Parallel MJPEG decode skipped: camera format is {self._get_fourcc()}")
+            return
+        scale = int(cfg.get('scale', 1))
+        if scale not in REDUCED_FLAGS:
+            raise ValueError(f"camera.mjpeg_decode.scale must be one of {sorted(REDUCED_FLAGS)}, got {scale}")
+
+        self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        ok, data = self.cap.read()
+        # 压缩帧为一维(或 1xN)字节缓冲区; 仍是三通道图像说明后端忽略了该设置
+        if not ok or data is None or data.ndim == 3 or cv2.imdecode(data, cv2.IMREAD_COLOR) is None:
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            print("Parallel MJPEG decode not supported by this capture backend, decoding on the capture thread")
+            return
+        self.scale = scale
+        self.decoder = MJPEGDecoder(self.cap, cfg.get('workers', 2), scale)
+        print(f"Parallel MJPEG decode: {self.decoder.depth} workers, output {self.width}x{self.height}")
+
     def _get_backend(self):
         """获取平台对应的视频后端"""
         system = platform.system()
@@ -154,16 +276,29 @@ class CameraManager:
 
     @property
     def width(self):
-        return int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        """输出帧宽度 (缩小解码时为缩小后的尺寸)"""
+        return -(-int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) // self.scale)
 
     @property
     def height(self):
-        return int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return -(-int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) // self.scale)
 
     def read_frame(self):
-        ok, frame = self.cap.read()
-        return cv2.flip(frame, 1) if ok else None
+        """读取并镜像一帧; 采集与镜像都写入复用的缓冲区, 返回的帧在下一次调用前有效"""
+        if self.decoder:
+            self.frame_time, frame = self.decoder.read()
+            return frame
+        ok, raw = self.cap.read(image=self._raw)
+        self.frame_time = time.time()
+        if not ok:
+            return None
+        self._raw = raw
+        self._frame = cv2.flip(raw, 1, dst=self._frame)
+        return self._frame
 
     def release(self):
+        if self.decoder:
+            self.decoder.close()
+            self.decoder = None
         if self.cap and self.cap.isOpened():
             self.cap.release()
\ No newline at end of file
@@ -0,0 +1,45 @@
+import socket
+import json
+
+# 控制通道支持的命令
+COMMANDS = (
+    'record_start', 'record_stop', 'record_toggle',
+    'calibrate_face', 'calibrate_head',
+    'shutdown',
+    'subscribe'  # {"cmd": "subscribe", "port": 接收端口, "channels": [...] 或 null, "rate": Hz}
+)
+
+class ControlServer:
+    """本地UDP控制通道, 无预览窗口时也能触发录制和校准"""
+    def __init__(self, ip, port):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((ip, port))
+        self.sock.setblocking(False)
+        print(f"Control channel listening on {ip}:{port}")
+
+    def poll(self):
+        """非阻塞读取所有待处理的命令, 返回 [(message, addr), ...]"""
+        messages = []
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(4096)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                # Windows 下对端关闭会触发 ConnectionResetError
+                print(f"Control channel error: {str(e)}")
+                break
+
+            try:
+                msg = json.loads(data.decode('utf-8'))
+            except ValueError:
+                # 兼容纯文本命令 (例如 `echo calibrate_face | nc -u ...`)
+                msg = {'cmd': data.decode('utf-8', 'ignore').strip()}
+            if not isinstance(msg, dict) or msg.get('cmd') not in COMMANDS:
+                print(f"Unknown control message from {addr[0]}: {data[:64]!r}")
+                continue
+            messages.append((msg, addr))
+        return messages
+
+    def close(self):
+        self.sock.close()
@@ -1,13 +1,287 @@
 import socket
 import json
+import struct
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from config.settings import CONFIG
+from face_constants import FEATURE_CHANNELS, FeatureFrame, feature_group
+
+def parse_destination(spec):
+    """解析接收端配置: "ip:port" 字符串或 {ip, port, rate, channels} 字典"""
+    if isinstance(spec, str):
+        ip, _, port = spec.rpartition(':')
+        if not ip or not port.isdigit():
+            raise ValueError(f"Invalid destination '{spec}', expected IP:PORT")
+        return Destination(ip, int(port))
+    return Destination(spec['ip'], spec['port'], spec.get('rate', 0), spec.get('channels'))
+
+ERROR_LOG_INTERVAL = 5.0  # 秒, 同一接收端发送错误的日志间隔
+
+class Destination:
+    """一个接收端: 地址, 可选的限速 (Hz) 与通道过滤 (通道名或分组名)"""
+    def __init__(self, ip, port, rate=0, channels=None):
+        self.addr = (ip, int(port))
+        self.set_rate(rate)
+        self.set_channels(channels)
+        self.next_time = 0.0
+        self.errors = 0
+        self._logged_errors = 0
+        self._log_time = float('-inf')
+
+    def set_rate(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+
+    def set_channels(self, channels):
+        """None 为全部通道; 空列表只发送 `_` 开头的元数据"""
+        self.channels = None if channels is None else frozenset(channels)
+        self._wanted = {}
+
+    @property
+    def limited(self):
+        return self.interval > 0
+
+    def due(self, now):
+        """是否到了发送时间; 允许 10% 的提前量以吸收帧间隔抖动"""
+        if not self.interval:
+            return True
+        if now < self.next_time - 0.1 * self.interval:
+            return False
+        # 按节拍推进; 落后超过一个间隔 (首包或停顿后) 则从当前时间重新计时, 不补发
+        if now - self.next_time < self.interval:
+            self.next_time += self.interval
+        else:
+            self.next_time = now + self.interval
+        return True
+
+    def record_error(self, error, now):
+        """计数发送错误, 每个接收端最多每 ERROR_LOG_INTERVAL 秒打印一次"""
+        self.errors += 1
+        if now - self._log_time >= ERROR_LOG_INTERVAL:
+            new = self.errors - self._logged_errors
+            print(f"Send to {self.addr[0]}:{self.addr[1]} failed ({new} error{'s' if new > 1 else ''}): {str(error)}")
+            self._logged_errors, self._log_time = self.errors, now
+
+    def wants(self, key):
+        wanted = self._wanted.get(key)
+        if wanted is None:
+            wanted = self._wanted[key] = (key.startswith('_') or key in self.channels
+                                          or feature_group(key) in self.channels)
+        return wanted
+
+    def filter(self, data):
+        if self.channels is None:
+            return data
+        return {key: val for key, val in data.items() if self.wants(key)}
+
+class Fanout:
+    """把一路数据分发到多个接收端, 每种 (内容, 通道过滤) 组合只编码一次
+
+    payload 发给未限速的接收端; 限速的接收端会跳过部分包, 因此收到 full
+    (完整状态, 默认同 payload)。raw 为 payload 已编码的字节, 无过滤的接收端直接转发。
+    单个接收端出错 (不可达、ICMP 拒绝等) 只计数并限频打印, 不影响其他接收端和调用方。
+    """
+    def __init__(self, sock, destinations):
+        self.sock = sock
+        self.destinations = list(destinations)
+
+    def find(self, addr):
+        for dest in self.destinations:
+            if dest.addr == addr:
+                return dest
+        return None
+
+    def send(self, payload, full=None, raw=None):
+        """发送一包, 返回发送失败的接收端数"""
+        now = time.perf_counter()
+        full = payload if full is None else full
+        encoded = {}
+        failed = 0
+        for dest in self.destinations:
+            if not dest.due(now):
+                continue
+            data = full if dest.limited else payload
+            key = (data is payload, dest.channels)
+            packet = encoded.get(key)
+            if packet is None:
+                if raw is not None and data is payload and dest.channels is None:
+                    packet = raw
+                else:
+                    packet = json.dumps(dest.filter(data)).encode()
+                encoded[key] = packet
+            try:
+                self.sock.sendto(packet, dest.addr)
+            except OSError as e:
+                dest.record_error(e, now)
+                failed += 1
+        return failed
 
 class UDPTransmitter:
-    def __init__(self, ip, port):
+    def __init__(self, ip, port, delta=None, sndbuf=None, destinations=None):
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.target = (ip, port)
+
+        # 发送缓冲区大小 (字节), 0 表示使用系统默认值
+        net_cfg = CONFIG.get('network', {})
+        sndbuf = net_cfg.get('sndbuf', 0) if sndbuf is None else sndbuf
+        if sndbuf:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+
+        # 额外的接收端 (network.destinations), 每个包按内容只编码一次
+        extra = (net_cfg.get('destinations') or []) if destinations is None else destinations
+        self.fanout = Fanout(self.sock, [Destination(ip, port)] + [parse_destination(d) for d in extra])
+        if len(self.fanout.destinations) > 1:
+            print("Sending to " + ", ".join(f"{d.addr[0]}:{d.addr[1]}" for d in self.fanout.destinations))
+
+        # 增量(死区)编码: 只发送超过阈值的通道, 定期发送完整关键帧用于丢包恢复
+        delta_cfg = net_cfg.get('delta', {})
+        self.delta = delta_cfg.get('enable', False) if delta is None else delta
+        self.keyframe_interval = max(int(delta_cfg.get('keyframe_interval', 30)), 1)
+        self.heartbeat_interval = max(int(delta_cfg.get('heartbeat_interval', 10)), 1)
+        self.thresholds = delta_cfg.get('thresholds', {})
+        self.last_sent = {}
+        self.last_packet_seq = 0
+        self.seq = 0
+        self.skipped = 0  # 无变化而未发送的增量包数
+        self.unknown_subscribers = set()
     
-    def send(self, data):
-        self.sock.sendto(json.dumps(data).encode(), self.target)
+    def subscribe(self, addr, channels=None, rate=0):
+        """接收端订阅: 只发送其所需的通道 (通道名或分组名, None 为全部), rate 为最高频率 (Hz, 0 不限)
+
+        只接受已配置的接收端, 返回是否生效。接收端会定期重发订阅, 只在内容变化时打印
+        """
+        dest = self.fanout.find(addr)
+        if dest is None:
+            if addr not in self.unknown_subscribers:
+                self.unknown_subscribers.add(addr)
+                print(f"Subscription for unknown receiver {addr[0]}:{addr[1]} ignored")
+            return False
+        before = (dest.channels, dest.interval)
+        dest.set_channels(channels)
+        dest.set_rate(rate)
+        if (dest.channels, dest.interval) == before:
+            return True
+        wanted = 'all channels' if dest.channels is None else f"{len(dest.channels)} channels"
+        limit = f" at {rate} Hz" if dest.limited else ""
+        print(f"Receiver {addr[0]}:{addr[1]} subscribed to {wanted}{limit}")
+        return True
+
+    def send(self, data, timestamp=None):
+        """timestamp 为采集时间 (time.time()), 以 `_time` 随包发送, 接收端录制时按它排列样本"""
+        if isinstance(data, FeatureFrame):
+            data = data.to_dict()  # JSON 编码在此处才需要字典
+        full = data if timestamp is None else {**data, '_time': timestamp}
+        if self.delta:
+            payload = self._encode_delta(data)
+            if payload is None:
+                self.seq += 1
+                self.skipped += 1
+                return 0
+            if timestamp is not None:
+                payload['_time'] = timestamp
+        else:
+            payload = full
+        self.last_packet_seq = self.seq
+        self.seq += 1
+        return self.fanout.send(payload, full=full)
+
+    def _encode_delta(self, data):
+        """生成增量包; 关键帧与普通包格式兼容, 增量包带 `_delta` 标记
+
+        没有通道变化时返回 None 不发送, 但距上一个包满 heartbeat_interval 帧时仍发送空增量包作为心跳
+        """
+        if self.seq % self.keyframe_interval == 0:
+            self.last_sent = dict(data)
+            return {'_seq': self.seq, **data}
+
+        changed = {}
+        for key, val in data.items():
+            prev = self.last_sent.get(key)
+            threshold = self.thresholds.get(feature_group(key), 0)
+            if prev is None or abs(val - prev) > threshold:
+                changed[key] = val
+                self.last_sent[key] = val
+        if not changed and self.seq - self.last_packet_seq < self.heartbeat_interval:
+            return None
+        return {'_seq': self.seq, '_delta': 1, **changed}
     
     def close(self):
-        self.sock.close()
\ No newline at end of file
+        self.sock.close()
+
+# 共享内存环形缓冲区布局 (与 addons.py 中的读取端一致):
+#   [0, 64)      头部: magic, version, 通道数, 容量, 已写入记录数 (uint64)
+#   [64, 4096)   通道名 JSON (按记录中的顺序)
+#   [4096, ...)  记录: seq uint64, time float64, values float32[通道数]
+# 写入时先将 seq 置 0, 写完数据后再写入 seq, 读取端前后比对 seq 以丢弃被覆盖的记录
+SHM_MAGIC = b'FPCS'
+SHM_VERSION = 1
+SHM_HEADER = struct.Struct('<4sIII')
+SHM_COUNT_OFFSET = 16
+SHM_NAMES_OFFSET = 64
+SHM_DATA_OFFSET = 4096
+
+def shm_record_dtype(channels):
+    return np.dtype([('seq', '<u8'), ('time', '<f8'), ('values', '<f4', (channels,))])
+
+class SharedMemoryTransmitter:
+    """同机传输: 将特征写入共享内存环形缓冲区, 无系统调用和序列化"""
+    def __init__(self, name=None, capacity=None, channels=FEATURE_CHANNELS):
+        shm_cfg = CONFIG.get('network', {}).get('shm', {})
+        self.name = shm_cfg.get('name', 'fpc_features') if name is None else name
+        self.capacity = max(int(shm_cfg.get('capacity', 256) if capacity is None else capacity), 1)
+        self.channels = tuple(channels)
+        self.index = {key: i for i, key in enumerate(self.channels)}
+        self.dtype = shm_record_dtype(len(self.channels))
+        size = SHM_DATA_OFFSET + self.capacity * self.dtype.itemsize
+
+        names = json.dumps(self.channels).encode()
+        if len(names) > SHM_DATA_OFFSET - SHM_NAMES_OFFSET:
+            raise ValueError("Too many channels for the shared memory header")
+        header = SHM_HEADER.pack(SHM_MAGIC, SHM_VERSION, len(self.channels), self.capacity)
+
+        try:
+            self.shm = shared_memory.SharedMemory(self.name, create=True, size=size)
+            self.shm.buf[:SHM_HEADER.size] = header
+            self.shm.buf[SHM_NAMES_OFFSET:SHM_NAMES_OFFSET + len(names)] = names
+        except FileExistsError:
+            # 上次运行遗留或接收端仍持有: 布局一致则沿用, 计数继续递增
+            self.shm = shared_memory.SharedMemory(self.name)
+            if (bytes(self.shm.buf[:SHM_HEADER.size]) != header or self.shm.size < size
+                    or bytes(self.shm.buf[SHM_NAMES_OFFSET:SHM_NAMES_OFFSET + len(names)]) != names):
+                self.shm.close()
+                raise RuntimeError(f"Shared memory '{self.name}' exists with a different layout")
+
+        self.count_view = np.ndarray((1,), dtype='<u8', buffer=self.shm.buf, offset=SHM_COUNT_OFFSET)
+        records = np.ndarray((self.capacity,), dtype=self.dtype, buffer=self.shm.buf, offset=SHM_DATA_OFFSET)
+        self.seqs, self.times, self.values = records['seq'], records['time'], records['values']
+        self.row = np.full(len(self.channels), np.nan, dtype=np.float32)
+        self.frame_layout = self.channels == tuple(FEATURE_CHANNELS)  # FeatureFrame 可整行写入
+        self.count = int(self.count_view[0])
+        print(f"Shared memory transport '{self.name}' ({self.capacity} x {self.dtype.itemsize} bytes)")
+
+    def send(self, data, timestamp=None):
+        """写入一条记录; 不在通道表中的键被忽略, 缺失的通道写为 NaN; timestamp 为采集时间 (默认当前时间)"""
+        if self.frame_layout and isinstance(data, FeatureFrame):
+            row = data.values
+        else:
+            row = self.row
+            row.fill(np.nan)
+            for key, val in data.items():
+                i = self.index.get(key)
+                if i is not None:
+                    row[i] = val
+        slot = self.count % self.capacity
+        self.count += 1
+        self.seqs[slot] = 0
+        self.values[slot] = row
+        self.times[slot] = time.time() if timestamp is None else timestamp
+        self.seqs[slot] = self.count
+        self.count_view[0] = self.count
+
+    def close(self):
+        del self.count_view, self.seqs, self.times, self.values
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
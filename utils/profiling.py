@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# 管线阶段 (主循环中用 stage() 标记), 'other' 为控制通道轮询等其余开销
+STAGES = ('capture', 'convert', 'inference', 'features', 'smoothing', 'send', 'record', 'preview', 'other')
+
+# 调用栈中出现这些函数时, 采样归入对应阶段 (覆盖主循环标记)
+STAGE_FUNCTIONS = {
+    'to_rgb': 'convert',
+    '_wait_decoded': 'convert',  # 等待 MJPEG 解码线程池 (camera.mjpeg_decode)
+}
+
+class NullProfiler:
+    """未启用分析时的空实现, 主循环无需判断"""
+    expired = False
+
+    def next_frame(self):
+        pass
+
+    def stage(self, name):
+        pass
+
+    def stop(self):
+        pass
+
+class PipelineProfiler:
+    """采样式性能分析
+
+    后台线程每隔 interval 秒抓取主线程调用栈; 主循环用 stage() 标记当前阶段,
+    每个采样计入当时所处的阶段。结束时写出折叠栈文件 (flamegraph.pl / speedscope
+    可直接读取) 和按阶段汇总的表格。
+    """
+    def __init__(self, duration, output_dir='profiles', interval=0.005):
+        self.duration = duration
+        self.output_dir = output_dir
+        self.interval = interval
+        self.current = 'other'
+        self.frames = 0
+        self.stacks = Counter()
+        self.stage_samples = Counter()
+        self.leaf_samples = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, daemon=True)
+        self.start_time = time.perf_counter()
+        self._sampler.start()
+        print(f"Profiling for {duration:.0f}s (sampling every {interval * 1000:.0f} ms)")
+
+    @property
+    def expired(self):
+        return time.perf_counter() - self.start_time >= self.duration
+
+    def next_frame(self):
+        self.frames += 1
+        self.current = 'other'
+
+    def stage(self, name):
+        self.current = name
+
+    def _sample(self, frame):
+        marked, stage = self.current, None
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            if stage is None:
+                stage = STAGE_FUNCTIONS.get(code.co_name)  # 最内层匹配优先
+            # 不含行号, 同一函数的采样在火焰图中合并
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+            frame = frame.f_back
+        stage = stage or marked
+        self.leaf_samples[stack[0]] += 1
+        stack.append(stage)
+        self.stacks[';'.join(reversed(stack))] += 1
+        self.stage_samples[stage] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self._sample(frame)
+            del frame
+
+    def summary(self, elapsed):
+        total = sum(self.stage_samples.values()) or 1
+        fps = self.frames / elapsed if elapsed > 0 else 0.0
+        lines = [f"Profiled {elapsed:.1f}s, {self.frames} frames ({fps:.1f} fps), {total} samples",
+                 "",
+                 f"{'Stage':<12}{'Samples':>9}{'Share':>9}{'Time (s)':>10}{'ms/frame':>10}"]
+        for stage in STAGES:
+            count = self.stage_samples[stage]
+            seconds = elapsed * count / total
+            per_frame = seconds * 1000 / self.frames if self.frames else 0.0
+            lines.append(f"{stage:<12}{count:>9}{count / total:>9.1%}{seconds:>10.2f}{per_frame:>10.2f}")
+        lines += ["", "Top functions (self samples):"]
+        for leaf, count in self.leaf_samples.most_common(15):
+            lines.append(f"{count:>7}  {count / total:>6.1%}  {leaf}")
+        return "\n".join(lines)
+
+    def stop(self):
+        """停止采样并写出结果文件, 返回文件路径前缀"""
+        if self._stop.is_set():
+            return None
+        self._stop.set()
+        self._sampler.join()
+        elapsed = time.perf_counter() - self.start_time
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        stem = os.path.join(self.output_dir, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        with open(f"{stem}.collapsed", 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        summary = self.summary(elapsed)
+        with open(f"{stem}_summary.txt", 'w') as f:
+            f.write(summary + "\n")
+        print(summary)
+        print(f"Profile written to {stem}.collapsed and {stem}_summary.txt")
+        return stem
@@ -1,8 +1,15 @@
 import csv
+import json
 import time
+import numpy as np
 from pathlib import Path
 from datetime import datetime
 from config.settings import CONFIG
+from face_constants import FEATURE_CHANNELS, FeatureFrame
+
+# 特征录制 CSV 的通道 (timestamp 列之后), 与发送端一致。
+# 读取端按表头列名取值, 缺少的通道 (如旧录制中的眉毛/牙齿) 按 0 处理
+RECORD_CHANNELS = tuple(FEATURE_CHANNELS)
 
 class Recorder:
     def __init__(self, output_path=None, fps=None):
@@ -43,15 +50,7 @@ class Recorder:
         try:
             self.file = open(self.output_path, 'w', newline='')
             self.writer = csv.writer(self.file)
-            headers = [
-                'timestamp',
-                'head_pitch', 'head_yaw', 'head_roll',
-                'mouth_open', 'mouth_width',
-                'left_eyelid', 'right_eyelid',
-                'left_pupil_x', 'left_pupil_y',
-                'right_pupil_x', 'right_pupil_y'
-            ]
-            self.writer.writerow(headers)
+            self.writer.writerow(['timestamp', *RECORD_CHANNELS])
             print(f"Recording started: {self.output_path}")
             return True
         except IOError as e:
@@ -72,21 +71,11 @@ class Recorder:
         
         try:
             elapsed = round(current_time - self.recording_start_time, 3)
-            row = [
-                elapsed,
-                features.get('head_pitch', 0),
-                features.get('head_yaw', 0),
-                features.get('head_roll', 0),
-                features.get('mouth_open', 0),
-                features.get('mouth_width', 0),
-                features.get('left_eyelid', 0),
-                features.get('right_eyelid', 0),
-                features.get('left_pupil_x', 0),
-                features.get('left_pupil_y', 0),
-                features.get('right_pupil_x', 0),
-                features.get('right_pupil_y', 0)
-            ]
-            self.writer.writerow(row)
+            if isinstance(features, FeatureFrame):
+                values = features.values.tolist()
+            else:
+                values = [features.get(name, 0) for name in RECORD_CHANNELS]
+            self.writer.writerow([elapsed, *values])
             self.last_write = current_time
         except Exception as e:
             print(f"Write failed: {str(e)}")
@@ -96,4 +85,141 @@ class Recorder:
         if self.file and not self.file.closed:
             self.file.close()
             self.writer = None
-            print(f"Recording saved: {self.output_path}")
\ No newline at end of file
+            print(f"Recording saved: {self.output_path}")
+
+def load_recording(path):
+    """读取CSV录制文件, 返回 (timestamps, channels, values)
+
+    values 为 (N, len(channels)) 的 float64 数组, 不包含 timestamp 列
+    """
+    with open(path, 'r', newline='') as f:
+        header = next(csv.reader(f), None)
+        if not header:
+            raise ValueError(f"Empty recording: {path}")
+        data = np.loadtxt(f, delimiter=',', dtype=np.float64, ndmin=2)
+    if data.size == 0:
+        data = np.empty((0, len(header)))
+
+    ts_col = header.index('timestamp')
+    channels = [name for i, name in enumerate(header) if i != ts_col]
+    values = np.delete(data, ts_col, axis=1)
+    return data[:, ts_col], channels, values
+
+def write_recording(path, timestamps, channels, values):
+    """将 (N, len(channels)) 数组写成与 Recorder 相同格式的CSV"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = np.column_stack([timestamps, values])
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(['timestamp'] + list(channels)) + '\n')
+        np.savetxt(f, data, delimiter=',', fmt=['%.3f'] + ['%.17g'] * len(channels))
+
+# 原始关键点数组格式 (MediaPipe refine_landmarks 输出)
+LANDMARK_SHAPE = (478, 3)
+_NPY_HEADER_SIZE = 128  # 固定头长度, 关闭时原地改写帧数
+
+def _npy_header(shape, dtype):
+    """生成固定长度的 .npy v1.0 文件头"""
+    header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (np.dtype(dtype).str, tuple(shape))
+    header = header.ljust(_NPY_HEADER_SIZE - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1')
+
+class _IncrementalNpy:
+    """逐帧追加写入的 .npy 文件"""
+    def __init__(self, path, item_shape, dtype):
+        self.path = path
+        self.item_shape = tuple(item_shape)
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        self.file = open(path, 'wb')
+        self.file.write(_npy_header((0,) + self.item_shape, self.dtype))
+        self.file.flush()
+
+    def append(self, array):
+        self.file.write(np.ascontiguousarray(array, dtype=self.dtype).tobytes())
+        self.count += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(0)
+        self.file.write(_npy_header((self.count,) + self.item_shape, self.dtype))
+        self.file.close()
+
+class LandmarkRecorder:
+    """录制每帧完整的原始关键点 (N, 478, 3) float32, 便于离线重新计算特征
+
+    生成三个文件: <name>_landmarks.npy (关键点), <name>_landmarks_ts.npy (采集时间戳)
+    以及 <name>_landmarks.json (索引/元数据)
+    """
+    def __init__(self, base_path, frame_size, start_time=None):
+        base_path = Path(base_path)
+        stem = base_path.with_suffix('') if base_path.suffix else base_path
+        stem.parent.mkdir(parents=True, exist_ok=True)
+        self.index_path = Path(f"{stem}_landmarks.json")
+        self.landmarks = _IncrementalNpy(Path(f"{stem}_landmarks.npy"), LANDMARK_SHAPE, np.float32)
+        self.timestamps = _IncrementalNpy(Path(f"{stem}_landmarks_ts.npy"), (), np.float64)
+        self.frame_size = [int(frame_size[0]), int(frame_size[1])]
+        self.start_time = time.time() if start_time is None else start_time
+        self._write_index()  # 先写索引, 异常退出时数据仍可读取
+        print(f"Landmark recording started: {self.landmarks.path}")
+
+    def _write_index(self):
+        index = {
+            'version': 1,
+            'frames': self.landmarks.count,
+            'shape': list(LANDMARK_SHAPE),
+            'dtype': 'float32',
+            'frame_size': self.frame_size,
+            'landmarks': self.landmarks.path.name,
+            'timestamps': self.timestamps.path.name,
+        }
+        with open(self.index_path, 'w') as f:
+            json.dump(index, f, indent=2)
+
+    def record(self, landmarks, capture_time=None):
+        """landmarks: (478, 3) 数组; capture_time: 帧采集时间 (time.time())"""
+        if self.landmarks.file.closed:
+            return
+        capture_time = time.time() if capture_time is None else capture_time
+        self.landmarks.append(landmarks)
+        self.timestamps.append(capture_time - self.start_time)
+
+    def close(self):
+        if self.landmarks.file.closed:
+            return
+        self.landmarks.close()
+        self.timestamps.close()
+        self._write_index()
+        print(f"Landmark recording saved: {self.index_path} ({self.landmarks.count} frames)")
+
+def _open_npy_memmap(path, dtype, item_shape):
+    """以内存映射方式打开 .npy; 帧数由文件大小推算, 未正常关闭的文件也可读取"""
+    with open(path, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            np.lib.format.read_array_header_1_0(f)
+        else:
+            np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+        size = f.seek(0, 2)
+    item_bytes = np.dtype(dtype).itemsize * int(np.prod(item_shape))
+    count = (size - offset) // item_bytes
+    if count == 0:
+        return np.empty((0,) + tuple(item_shape), dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,) + tuple(item_shape))
+
+def load_landmarks(path):
+    """读取关键点录制 (传入 .json 索引或 _landmarks.npy), 返回 (timestamps, landmarks, meta)
+
+    landmarks 为只读内存映射 (N, 478, 3), 读取不需要把整个文件载入内存
+    """
+    path = Path(path)
+    if path.suffix == '.npy':
+        path = path.with_suffix('.json')
+    with open(path, 'r') as f:
+        meta = json.load(f)
+    landmarks = _open_npy_memmap(path.parent / meta['landmarks'], np.float32, meta.get('shape', LANDMARK_SHAPE))
+    timestamps = _open_npy_memmap(path.parent / meta['timestamps'], np.float64, ())
+    count = min(len(landmarks), len(timestamps))
+    return np.asarray(timestamps[:count]), landmarks[:count], meta